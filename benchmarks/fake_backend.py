@@ -0,0 +1,35 @@
+import re
+import time
+from typing import Iterator, Sequence
+
+from src.ai.backends import InferenceBackend, collect
+from src.ai.stub_server import fake_completion
+
+
+class FakeBackend(InferenceBackend):
+    """
+    Deterministic offline stand-in for the language model.
+
+    Answers are the stub server's canned completions, streamed word by word
+    with an optional simulated cost per token, so simplification timings
+    reflect the pipeline's own overhead plus a fixed, reproducible model cost.
+    """
+
+    model_name = 'benchmark-fake'
+    streams = True
+
+    def __init__(self, token_seconds: float = 0.0, first_token_seconds: float = 0.0, concurrency: int = 1):
+        self.token_seconds = token_seconds
+        self.first_token_seconds = first_token_seconds
+        self.concurrency = concurrency
+
+    def generate(self, prompt: str, max_tokens: int, stop: Sequence[str] = ()) -> str:
+        return collect(self.stream(prompt, max_tokens, stop), stop)[0]
+
+    def stream(self, prompt: str, max_tokens: int, stop: Sequence[str] = ()) -> Iterator[str]:
+        if self.first_token_seconds:
+            time.sleep(self.first_token_seconds)
+        for token in re.findall(r'\s*\S+', fake_completion(prompt, max_tokens))[:max_tokens]:
+            if self.token_seconds:
+                time.sleep(self.token_seconds)
+            yield token
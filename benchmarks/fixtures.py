@@ -0,0 +1,197 @@
+"""
+Synthetic input documents for the benchmarks.
+
+Every generator is deterministic for a given seed and size, so timings from
+different commits are measured on identical inputs. The text mixes plain
+sentences with definitional ones ("X is Y", "X refers to Y", ...) so the
+NLP and simplification stages have realistic work to do.
+"""
+import os
+import random
+from typing import Callable, Dict, List, Tuple
+
+SUBJECTS = [
+    'photosynthesis', 'osmosis', 'mitosis', 'entropy', 'inertia', 'a catalyst', 'an enzyme', 'the nucleus',
+    'a molecule', 'a polymer', 'an ecosystem', 'a glacier', 'erosion', 'a tariff', 'inflation', 'a democracy',
+    'a sonnet', 'an algorithm', 'a compiler', 'a vector', 'a derivative', 'a prime number', 'velocity',
+    'momentum', 'a habitat', 'a watershed', 'a hypothesis', 'a theorem', 'a protein', 'a neuron'
+]
+PHRASES = [
+    'the process by which', 'a structure that', 'a quantity that', 'a system in which', 'a method that',
+    'the tendency of', 'a substance that', 'a property that'
+]
+CLAUSES = [
+    'plants convert light into chemical energy', 'water moves across a membrane', 'cells divide into two',
+    'energy spreads out over time', 'objects resist changes in motion', 'reactions speed up',
+    'information is stored and copied', 'populations interact with their environment',
+    'prices rise across an economy', 'instructions are translated for a machine'
+]
+TEMPLATES = [
+    '{subject} is {phrase} {clause}.',
+    '{subject} is defined as {phrase} {clause}.',
+    '{subject} refers to {phrase} {clause}.',
+    '{subject} means {phrase} {clause}.',
+    'Scientists studied {subject} because {clause}.',
+    'In this chapter we explain how {clause}.',
+    'The next section compares {subject} with {other}.'
+]
+
+# Units of work per size: (pages or slides or sheets, paragraphs per unit)
+SIZES = {
+    'small': (4, 6),
+    'medium': (32, 12),
+    'large': (200, 16)
+}
+
+
+def sentences(count: int, seed: int = 0) -> List[str]:
+    """Deterministic mix of definitional and plain sentences."""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        subject, other = rng.sample(SUBJECTS, 2)
+        text = rng.choice(TEMPLATES).format(
+            subject=subject, other=other, phrase=rng.choice(PHRASES), clause=rng.choice(CLAUSES)
+        )
+        result.append(text[0].upper() + text[1:])
+    return result
+
+
+def paragraphs(count: int, seed: int = 0, per_paragraph: int = 4) -> List[str]:
+    words = sentences(count * per_paragraph, seed)
+    return [" ".join(words[i:i + per_paragraph]) for i in range(0, len(words), per_paragraph)]
+
+
+def make_pdf(path: str, pages: int, per_page: int, seed: int = 0) -> str:
+    """
+    Write a text PDF with one Helvetica text object per page.
+
+    The file is assembled by hand (objects, content streams and xref table)
+    so no PDF authoring library is needed.
+    """
+    texts = paragraphs(pages * per_page, seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once the page objects are numbered
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    page_ids = []
+    for page in range(pages):
+        lines = []
+        for paragraph in texts[page * per_page:(page + 1) * per_page]:
+            words = paragraph.split()
+            # Wrap at roughly 90 characters so text stays on the page
+            line = []
+            for word in words:
+                if sum(len(w) + 1 for w in line) + len(word) > 90:
+                    lines.append(" ".join(line))
+                    line = []
+                line.append(word)
+            lines.append(" ".join(line))
+            lines.append("")
+        escaped = [line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') for line in lines]
+        stream = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        stream = stream.encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    data = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, 'wb') as file:
+        file.write(data)
+    return path
+
+
+def make_docx(path: str, pages: int, per_page: int, seed: int = 0) -> str:
+    from docx import Document
+
+    document = Document()
+    for i, paragraph in enumerate(paragraphs(pages * per_page, seed)):
+        if i % per_page == 0:
+            document.add_heading(f"Section {i // per_page + 1}", level=1)
+        document.add_paragraph(paragraph)
+    document.save(path)
+    return path
+
+
+def make_pptx(path: str, pages: int, per_page: int, seed: int = 0) -> str:
+    from pptx import Presentation
+
+    presentation = Presentation()
+    layout = presentation.slide_layouts[1]
+    texts = sentences(pages * per_page, seed)
+    for slide_index in range(pages):
+        slide = presentation.slides.add_slide(layout)
+        slide.shapes.title.text = f"Slide {slide_index + 1}"
+        body = slide.placeholders[1].text_frame
+        for i, text in enumerate(texts[slide_index * per_page:(slide_index + 1) * per_page]):
+            paragraph = body.paragraphs[0] if i == 0 else body.add_paragraph()
+            paragraph.text = text
+    presentation.save(path)
+    return path
+
+
+def make_xlsx(path: str, pages: int, per_page: int, seed: int = 0) -> str:
+    """A glossary sheet (term/definition columns) and a free-form notes sheet."""
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    workbook = Workbook(write_only=True)
+    glossary = workbook.create_sheet('Glossary')
+    glossary.append(['Term', 'Definition'])
+    for i in range(pages * per_page):
+        glossary.append([f"{rng.choice(SUBJECTS)} {i}", f"{rng.choice(PHRASES)} {rng.choice(CLAUSES)}"])
+    notes = workbook.create_sheet('Notes')
+    notes.append(['Topic', 'Notes'])
+    for i, text in enumerate(sentences(pages * per_page, seed + 1)):
+        notes.append([f"Topic {i}", text])
+    workbook.save(path)
+    return path
+
+
+def make_image(path: str, pages: int, per_page: int, seed: int = 0) -> str:
+    """A tall white PNG with black text lines, for the OCR path."""
+    from PIL import Image, ImageDraw
+
+    lines = sentences(pages * per_page, seed)
+    line_height = 24
+    img = Image.new('L', (1700, line_height * len(lines) + 80), 255)
+    draw = ImageDraw.Draw(img)
+    for i, line in enumerate(lines):
+        draw.text((40, 40 + i * line_height), line, fill=0)
+    img.save(path, dpi=(300, 300))
+    return path
+
+
+GENERATORS: Dict[str, Tuple[str, Callable[..., str]]] = {
+    'pdf': ('pdf', make_pdf),
+    'docx': ('docx', make_docx),
+    'pptx': ('pptx', make_pptx),
+    'xlsx': ('xlsx', make_xlsx),
+    'image': ('png', make_image)
+}
+
+
+def build_fixture(kind: str, size: str, directory: str, seed: int = 0) -> str:
+    """Create (or reuse) the fixture of this kind and size and return its path."""
+    extension, generator = GENERATORS[kind]
+    pages, per_page = SIZES[size]
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{kind}_{size}_{seed}.{extension}")
+    if not os.path.exists(path):
+        generator(path, pages, per_page, seed)
+    return path
@@ -0,0 +1,330 @@
+"""
+Benchmark the extraction, NLP and simplification stages and the full pipeline.
+
+    python -m benchmarks.run --size small --repeat 5
+    python -m benchmarks.run --stages extract,pipeline --formats pdf,docx --size medium
+    python -m benchmarks.run --compare benchmarks/results/<earlier>.json
+
+Fixtures are generated deterministically, the language model is replaced by
+benchmarks.fake_backend.FakeBackend so runs are offline and reproducible, and
+results (latency percentiles, throughput and peak RSS per benchmark) are
+written as JSON named after the current commit for comparison across commits.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from benchmarks.fixtures import GENERATORS, SIZES, build_fixture, paragraphs, sentences
+
+STAGES = ('startup', 'extract', 'nlp', 'simplify', 'pipeline')
+RESULTS_DIR = os.path.join(project_root, 'benchmarks', 'results')
+# How often peak RSS is sampled while a benchmark runs
+RSS_SAMPLE_SECONDS = 0.01
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Linearly interpolated percentile of a non-empty list."""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class PeakRSS:
+    """Sample this process's RSS in the background and keep the maximum."""
+
+    def __init__(self):
+        from src.utils.model_registry import current_rss_mb
+        self._read = current_rss_mb
+        self.peak_mb = self._read()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> 'PeakRSS':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, self._read())
+
+    def _run(self) -> None:
+        while not self._stop.wait(RSS_SAMPLE_SECONDS):
+            self.peak_mb = max(self.peak_mb, self._read())
+
+
+def measure(name: str, repeat: int, run: Callable[[], Tuple[float, str]],
+            setup: Optional[Callable[[], None]] = None, **info: Any) -> Dict[str, Any]:
+    """
+    Time run() `repeat` times after one untimed warm-up call.
+
+    run() returns (units of work done, unit name); throughput is total units
+    over total time.
+    """
+    record = dict(info, name=name, repeat=repeat)
+    try:
+        if setup:
+            setup()
+        run()
+        latencies = []
+        units, unit = 0.0, ''
+        with PeakRSS() as rss:
+            for _ in range(repeat):
+                if setup:
+                    setup()
+                gc.collect()
+                start = time.perf_counter()
+                done, unit = run()
+                latencies.append(time.perf_counter() - start)
+                units += done
+        record.update(
+            latency_seconds={
+                'mean': round(sum(latencies) / len(latencies), 6),
+                'min': round(min(latencies), 6),
+                'p50': round(percentile(latencies, 0.5), 6),
+                'p90': round(percentile(latencies, 0.9), 6),
+                'p99': round(percentile(latencies, 0.99), 6),
+                'max': round(max(latencies), 6)
+            },
+            throughput={'value': round(units / sum(latencies), 3) if sum(latencies) else 0.0, 'unit': unit},
+            peak_rss_mb=round(rss.peak_mb, 1)
+        )
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {str(e)}"
+    status = record.get('error') or (
+        f"p50 {record['latency_seconds']['p50']:.4f}s  p90 {record['latency_seconds']['p90']:.4f}s  "
+        f"{record['throughput']['value']} {record['throughput']['unit']}  peak {record['peak_rss_mb']}MB"
+    )
+    print(f"{name:<24} {status}", flush=True)
+    return record
+
+
+STARTUP_SCRIPT = (
+    "import json, time\n"
+    "start = time.perf_counter()\n"
+    "import src.wsgi\n"
+    "from src.utils.model_registry import current_rss_mb\n"
+    "print(json.dumps({'seconds': time.perf_counter() - start, 'rss_mb': current_rss_mb()}))\n"
+)
+
+
+def bench_startup(repeat: int) -> List[Dict[str, Any]]:
+    """Time a fresh interpreter importing the WSGI app (without model preloading)."""
+    env = dict(os.environ, SAGEAI_PRELOAD_MODELS='0')
+    children = []
+
+    def run():
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=project_root, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        children.append(json.loads(output.strip().splitlines()[-1]))
+        return 1, 'starts/s'
+
+    record = measure('startup', repeat, run, stage='startup')
+    if children:
+        record['import_seconds_p50'] = round(percentile([child['seconds'] for child in children], 0.5), 6)
+        record['worker_rss_mb'] = round(max(child['rss_mb'] for child in children), 1)
+    return [record]
+
+
+def bench_extract(formats: List[str], size: str, repeat: int, fixture_dir: str) -> List[Dict[str, Any]]:
+    from src.extractors.text_extractor import TextExtractor
+
+    extractor = TextExtractor()
+    records = []
+    for kind in formats:
+        path = build_fixture(kind, size, fixture_dir)
+
+        def run(path=path):
+            segments = list(extractor.iter_extract(path))
+            if not segments:
+                raise ValueError("No text extracted")
+            return len(segments), 'segments/s'
+
+        records.append(measure(f"extract.{kind}", repeat, run, stage='extract', format=kind, size=size,
+                               bytes=os.path.getsize(path)))
+    return records
+
+
+def bench_nlp(size: str, repeat: int, spacy_model: str) -> List[Dict[str, Any]]:
+    from src.processors.nlp_processor import NLPProcessor
+
+    pages, per_page = SIZES[size]
+    text = paragraphs(pages * per_page, seed=1)
+    words = sum(len(paragraph.split()) for paragraph in text)
+    processor = NLPProcessor(spacy_model)
+
+    def run():
+        list(processor.iter_terms(iter(text), max_definitions=10 ** 9))
+        return words, 'words/s'
+
+    return [measure('nlp', repeat, run, stage='nlp', size=size, words=words)]
+
+
+def bench_simplify(size: str, repeat: int, backend_args: Dict[str, float], work_dir: str) -> List[Dict[str, Any]]:
+    from benchmarks.fake_backend import FakeBackend
+    from src.ai.result_cache import ResultCache
+    from src.ai.simplifier import Simplifier
+
+    pages, per_page = SIZES[size]
+    items = [{'term': f"term {i}", 'definition': text} for i, text in enumerate(sentences(pages * per_page, seed=2))]
+    state = {}
+
+    def setup():
+        # A fresh cache each run, so every run generates every field
+        cache_dir = tempfile.mkdtemp(dir=work_dir)
+        state['simplifier'] = Simplifier(cache=ResultCache(os.path.join(cache_dir, 'results.sqlite')),
+                                         backend=FakeBackend(**backend_args))
+
+    def run():
+        state['simplifier'].process_batch(items)
+        return len(items), 'terms/s'
+
+    return [measure('simplify', repeat, run, setup=setup, stage='simplify', size=size, terms=len(items))]
+
+
+def bench_pipeline(formats: List[str], size: str, repeat: int, fixture_dir: str, work_dir: str,
+                   backend_args: Dict[str, float], spacy_model: str) -> List[Dict[str, Any]]:
+    from benchmarks.fake_backend import FakeBackend
+    from src.ai.result_cache import ResultCache
+    from src.ai.simplifier import Simplifier
+    from src.processors.nlp_processor import NLPProcessor
+    from src.pipeline import run_pipeline
+    from src.utils.model_registry import get_registry
+
+    registry = get_registry()
+    registry.register('nlp', lambda: NLPProcessor(spacy_model), size_mb=250)
+    output_dir = os.path.join(work_dir, 'output')
+    records = []
+    for kind in formats:
+        path = build_fixture(kind, size, fixture_dir)
+
+        def setup():
+            # Cold result cache per run; checkpoints are cleared by each finished run
+            cache_dir = tempfile.mkdtemp(dir=work_dir)
+            registry.evict('simplifier')
+            registry.register('simplifier', lambda: Simplifier(
+                cache=ResultCache(os.path.join(cache_dir, 'results.sqlite')),
+                backend=FakeBackend(**backend_args)
+            ), size_mb=50)
+
+        def run(path=path):
+            result = run_pipeline(path, output_dir, max_definitions=10 ** 6, output_name=f"bench_{kind}")
+            return result['terms_processed'], 'terms/s'
+
+        records.append(measure(f"pipeline.{kind}", repeat, run, setup=setup, stage='pipeline', format=kind,
+                               size=size, bytes=os.path.getsize(path)))
+    return records
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline_path: str) -> None:
+    """Print each benchmark's p50 latency and throughput against a baseline results file."""
+    with open(baseline_path, encoding='utf-8') as file:
+        previous = json.load(file)
+    baseline = {record['name']: record for record in previous['results']}
+    print(f"\nCompared with commit {previous.get('commit')} ({previous.get('size')}, {baseline_path})")
+    for record in current['results']:
+        before = baseline.get(record['name'])
+        if not before or 'error' in record or 'error' in before:
+            continue
+        p50 = record['latency_seconds']['p50'] / before['latency_seconds']['p50'] if before['latency_seconds']['p50'] else 0
+        rate = (record['throughput']['value'] / before['throughput']['value']) if before['throughput']['value'] else 0
+        print(f"{record['name']:<24} p50 x{p50:.2f}  throughput x{rate:.2f}  "
+              f"peak RSS {before['peak_rss_mb']}MB -> {record['peak_rss_mb']}MB")
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description='SageAI pipeline benchmarks')
+    parser.add_argument('--size', choices=sorted(SIZES), default='small', help='fixture size')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per benchmark')
+    parser.add_argument('--stages', default=','.join(STAGES), help=f"comma-separated subset of {','.join(STAGES)}")
+    parser.add_argument('--formats', default=','.join(GENERATORS), help='comma-separated fixture formats')
+    parser.add_argument('--spacy-model', default='en_core_web_sm')
+    parser.add_argument('--token-ms', type=float, default=0.0, help='simulated model time per generated token')
+    parser.add_argument('--first-token-ms', type=float, default=0.0, help='simulated model time to first token')
+    parser.add_argument('--fixtures', default=os.path.join(tempfile.gettempdir(), 'sageai-bench-fixtures'),
+                        help='where generated fixtures are kept between runs')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<commit>-<size>-<time>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    args = parser.parse_args(argv)
+
+    stages = [stage for stage in args.stages.split(',') if stage]
+    formats = [kind for kind in args.formats.split(',') if kind]
+    unknown = set(stages) - set(STAGES) or set(formats) - set(GENERATORS)
+    if unknown:
+        parser.error(f"Unknown stage or format: {', '.join(sorted(unknown))}")
+    backend_args = {'token_seconds': args.token_ms / 1000, 'first_token_seconds': args.first_token_ms / 1000}
+
+    work_dir = tempfile.mkdtemp(prefix='sageai-bench-')
+    # Keep checkpoints and the result cache out of the user's real directories
+    os.environ['SAGEAI_CHECKPOINT_DIR'] = os.path.join(work_dir, 'checkpoints')
+    os.environ['SAGEAI_CACHE_DIR'] = os.path.join(work_dir, 'cache')
+
+    results = []
+    try:
+        if 'startup' in stages:
+            results += bench_startup(args.repeat)
+        if 'extract' in stages:
+            results += bench_extract(formats, args.size, args.repeat, args.fixtures)
+        if 'nlp' in stages:
+            results += bench_nlp(args.size, args.repeat, args.spacy_model)
+        if 'simplify' in stages:
+            results += bench_simplify(args.size, args.repeat, backend_args, work_dir)
+        if 'pipeline' in stages:
+            results += bench_pipeline(formats, args.size, args.repeat, args.fixtures, work_dir,
+                                      backend_args, args.spacy_model)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    import resource
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'size': args.size,
+        'repeat': args.repeat,
+        'fake_backend': backend_args,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        # ru_maxrss is KB on Linux
+        'process_peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'children_peak_rss_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        'results': results
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{commit or 'unknown'}-{args.size}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        compare(report, args.compare)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+# gunicorn -c gunicorn.conf.py
+import os
+
+wsgi_app = 'src.wsgi:app'
+bind = os.environ.get('SAGEAI_BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('SAGEAI_WEB_WORKERS', 2))
+worker_class = 'gthread'
+threads = int(os.environ.get('SAGEAI_WEB_THREADS', 4))
+# Uploads of up to 250MB can take a while to stream in
+timeout = int(os.environ.get('SAGEAI_WEB_TIMEOUT', 300))
+
+# Import the app (and preload the models) once in the master, then fork,
+# so workers share the loaded models copy-on-write
+preload_app = True
+
+
+def post_fork(server, worker):
+    from src.wsgi import start_worker
+    start_worker()
+
+
+def worker_exit(server, worker):
+    from src.wsgi import jobs
+    jobs.shutdown()
@@ -0,0 +1,335 @@
+import os
+import re
+import json
+import time
+import queue
+import logging
+import threading
+import http.client
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "ggml-gpt4all-j-v1.3-groovy"
+MODEL_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'gpt4all')
+
+# Which backend Simplifier uses: gpt4all (in-process), workers or http
+BACKEND = os.environ.get('SAGEAI_BACKEND', 'gpt4all')
+BACKEND_WORKERS = int(os.environ.get('SAGEAI_BACKEND_WORKERS', 2))
+BACKEND_URL = os.environ.get('SAGEAI_BACKEND_URL', 'http://127.0.0.1:8081/v1')
+BACKEND_MODEL = os.environ.get('SAGEAI_BACKEND_MODEL', MODEL_NAME)
+BACKEND_API_KEY = os.environ.get('SAGEAI_BACKEND_API_KEY', '')
+BACKEND_CONCURRENCY = int(os.environ.get('SAGEAI_BACKEND_CONCURRENCY', 4))
+BACKEND_TIMEOUT = float(os.environ.get('SAGEAI_BACKEND_TIMEOUT', 120))
+BACKEND_CONNECT_TIMEOUT = float(os.environ.get('SAGEAI_BACKEND_CONNECT_TIMEOUT', 5))
+
+# OpenAI-compatible servers accept at most this many stop sequences
+MAX_STOP_SEQUENCES = 4
+SENTENCE_END = re.compile(r'[.!?]["\')\]]*(?=\s)')
+
+
+class BackendError(Exception):
+    """Raised when a backend cannot produce a completion."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English text (about four characters per token)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def _stop_point(text: str, scan_from: int, stop: Sequence[str], sentences: Optional[int]) -> Optional[int]:
+    """Offset to cut text at if a stop sequence or the sentence limit has been reached."""
+    cut = None
+    for sequence in stop:
+        index = text.find(sequence, max(0, scan_from - len(sequence)))
+        if index != -1 and (cut is None or index < cut):
+            cut = index
+    if sentences:
+        ends = [match.end() for match in SENTENCE_END.finditer(text)]
+        if len(ends) >= sentences and (cut is None or ends[sentences - 1] < cut):
+            cut = ends[sentences - 1]
+    return cut
+
+
+def collect(chunks: Iterable[str], stop: Sequence[str] = (), sentences: Optional[int] = None,
+            start: Optional[float] = None) -> Tuple[str, Dict[str, float]]:
+    """
+    Join streamed chunks, stopping as soon as a stop sequence appears or
+    `sentences` complete sentences have been produced.
+
+    The stream is closed on an early stop, which ends generation on backends
+    that stream. Returns the text (without the stop sequence) and timings:
+    chunks received, seconds, time to first chunk and chunks per second.
+    """
+    start = start or time.perf_counter()
+    first = None
+    parts = []
+    text = ''
+    count = 0
+    stopped = False
+    try:
+        for chunk in chunks:
+            if first is None:
+                first = time.perf_counter()
+            count += 1
+            scan_from = len(text)
+            parts.append(chunk)
+            text = ''.join(parts)
+            cut = _stop_point(text, scan_from, stop, sentences)
+            if cut is not None:
+                text = text[:cut]
+                stopped = True
+                break
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+    elapsed = time.perf_counter() - start
+    return text, {
+        'tokens': count,
+        'seconds': elapsed,
+        'ttft_seconds': (first - start) if first else elapsed,
+        'tokens_per_sec': count / elapsed if elapsed else 0.0,
+        'stopped': stopped
+    }
+
+
+class InferenceBackend:
+    """
+    Text generation behind generate() and stream() calls.
+
+    model_name identifies the model for the result cache, concurrency is how
+    many calls the backend can usefully serve at once, and streams tells
+    whether stream() yields real tokens (it otherwise yields one chunk holding
+    the whole answer).
+    """
+
+    model_name = MODEL_NAME
+    concurrency = 1
+    streams = False
+
+    def generate(self, prompt: str, max_tokens: int, stop: Sequence[str] = ()) -> str:
+        raise NotImplementedError
+
+    def stream(self, prompt: str, max_tokens: int, stop: Sequence[str] = ()) -> Iterator[str]:
+        yield self.generate(prompt, max_tokens, stop)
+
+    def close(self) -> None:
+        pass
+
+
+def _load_gpt4all(model_name: str):
+    from gpt4all import GPT4All
+
+    os.makedirs(MODEL_PATH, exist_ok=True)
+    logger.info(f"Initializing GPT4All with model path: {MODEL_PATH}")
+    return GPT4All(
+        model_name=model_name,
+        model_path=MODEL_PATH,
+        allow_download=True,
+        verbose=False
+    )
+
+
+class GPT4AllBackend(InferenceBackend):
+    """GPT4All loaded into the current process."""
+
+    streams = True
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        self.model_name = model_name
+        self.model = _load_gpt4all(model_name)
+        # The model is shared between request threads but generation is not re-entrant
+        self._lock = threading.Lock()
+
+    def generate(self, prompt: str, max_tokens: int, stop: Sequence[str] = ()) -> str:
+        return collect(self.stream(prompt, max_tokens, stop), stop)[0]
+
+    def stream(self, prompt: str, max_tokens: int, stop: Sequence[str] = ()) -> Iterator[str]:
+        # The lock is held until the consumer finishes or closes the stream
+        with self._lock:
+            yield from self.model.generate(prompt, max_tokens=max_tokens, streaming=True)
+
+
+_worker_model = None
+
+
+def _init_worker(model_name: str) -> None:
+    global _worker_model
+    _worker_model = _load_gpt4all(model_name)
+
+
+def _worker_generate(prompt: str, max_tokens: int, stop: Sequence[str]) -> str:
+    return collect(_worker_model.generate(prompt, max_tokens=max_tokens, streaming=True), stop)[0]
+
+
+class WorkerPoolBackend(InferenceBackend):
+    """
+    GPT4All running in a pool of separate model processes.
+
+    Each worker loads its own copy of the model at start-up, so generation
+    runs outside the web or job process and its GIL, and several prompts
+    are served in parallel.
+    """
+
+    def __init__(self, model_name: str = MODEL_NAME, workers: int = BACKEND_WORKERS):
+        self.model_name = model_name
+        self.concurrency = max(workers, 1)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.concurrency,
+            initializer=_init_worker,
+            initargs=(model_name,)
+        )
+        logger.info(f"Started {self.concurrency} model worker processes for {model_name}")
+
+    def generate(self, prompt: str, max_tokens: int, stop: Sequence[str] = ()) -> str:
+        return self._pool.submit(_worker_generate, prompt, max_tokens, tuple(stop)).result()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class HTTPBackend(InferenceBackend):
+    """
+    Client for an OpenAI-compatible /completions endpoint.
+
+    Connections are HTTP/1.1 keep-alive and reused from a pool of at most
+    `concurrency` connections; a semaphore caps in-flight requests at the
+    same number. Connect and read timeouts are applied to every request, and
+    a request on a connection the server has since closed is retried once
+    on a fresh one.
+    """
+
+    def __init__(self, base_url: str = BACKEND_URL, model_name: str = BACKEND_MODEL,
+                 api_key: str = BACKEND_API_KEY, concurrency: int = BACKEND_CONCURRENCY,
+                 timeout: float = BACKEND_TIMEOUT, connect_timeout: float = BACKEND_CONNECT_TIMEOUT):
+        url = urlsplit(base_url)
+        if url.scheme not in ('http', 'https') or not url.hostname:
+            raise BackendError(f"Invalid backend URL: {base_url}")
+        self.model_name = model_name
+        self.concurrency = max(concurrency, 1)
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self._scheme = url.scheme
+        self._host = url.hostname
+        self._port = url.port
+        self._path = url.path.rstrip('/') + '/completions'
+        self._headers = {'Content-Type': 'application/json'}
+        if api_key:
+            self._headers['Authorization'] = f"Bearer {api_key}"
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._idle = queue.LifoQueue()
+
+    def generate(self, prompt: str, max_tokens: int, stop: Sequence[str] = ()) -> str:
+        with self._slots:
+            conn, response = self._post(self._body(prompt, max_tokens, stop, stream=False))
+            try:
+                payload = response.read()
+            except Exception:
+                conn.close()
+                raise
+            self._release(conn, response)
+        if response.status != 200:
+            raise BackendError(f"Backend returned {response.status}: {payload[:200].decode('utf-8', 'replace')}")
+        data = json.loads(payload)
+        try:
+            return data['choices'][0]['text']
+        except (KeyError, IndexError, TypeError):
+            raise BackendError(f"Unexpected completion response: {str(data)[:200]}")
+
+    def stream(self, prompt: str, max_tokens: int, stop: Sequence[str] = ()) -> Iterator[str]:
+        """Yield tokens from a server-sent event stream as they arrive."""
+        with self._slots:
+            conn, response = self._post(self._body(prompt, max_tokens, stop, stream=True))
+            finished = False
+            try:
+                if response.status != 200:
+                    raise BackendError(f"Backend returned {response.status}: "
+                                       f"{response.read()[:200].decode('utf-8', 'replace')}")
+                for line in response:
+                    line = line.strip()
+                    if not line.startswith(b'data:'):
+                        continue
+                    data = line[5:].strip()
+                    if data == b'[DONE]':
+                        break
+                    try:
+                        text = json.loads(data)['choices'][0].get('text', '')
+                    except (ValueError, KeyError, IndexError, TypeError):
+                        raise BackendError(f"Unexpected stream event: {data[:200]!r}")
+                    if text:
+                        yield text
+                finished = True
+            finally:
+                if finished:
+                    response.read()
+                    self._release(conn, response)
+                else:
+                    # Abandoned mid-answer: the connection still carries the rest of it
+                    conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _body(self, prompt: str, max_tokens: int, stop: Sequence[str], stream: bool) -> str:
+        body = {
+            'model': self.model_name,
+            'prompt': prompt,
+            'max_tokens': max_tokens,
+            'stream': stream
+        }
+        if stop:
+            body['stop'] = list(stop)[:MAX_STOP_SEQUENCES]
+        return json.dumps(body)
+
+    def _post(self, body: str):
+        for attempt in range(2):
+            conn, reused = self._checkout(fresh=attempt > 0)
+            try:
+                conn.request('POST', self._path, body=body, headers=self._headers)
+                return conn, conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                # Keep-alive connections may have been closed by the server while idle
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+    def _release(self, conn, response) -> None:
+        if response.will_close:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    def _checkout(self, fresh: bool = False):
+        if not fresh:
+            try:
+                return self._idle.get_nowait(), True
+            except queue.Empty:
+                pass
+        connection_class = http.client.HTTPSConnection if self._scheme == 'https' else http.client.HTTPConnection
+        conn = connection_class(self._host, self._port, timeout=self.connect_timeout)
+        conn.connect()
+        conn.sock.settimeout(self.timeout)
+        return conn, False
+
+
+def create_backend(kind: Optional[str] = None) -> InferenceBackend:
+    """Build the backend named by kind, or by SAGEAI_BACKEND."""
+    kind = (kind or BACKEND).lower()
+    if kind == 'gpt4all':
+        return GPT4AllBackend()
+    if kind == 'workers':
+        return WorkerPoolBackend()
+    if kind == 'http':
+        return HTTPBackend()
+    raise ValueError(f"Unknown inference backend: {kind}")
@@ -0,0 +1,137 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from src.utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get('SAGEAI_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'sageai'))
+CACHE_MEMORY_ITEMS = int(os.environ.get('SAGEAI_CACHE_MEMORY_ITEMS', 4096))
+CACHE_MAX_MB = int(os.environ.get('SAGEAI_CACHE_MAX_MB', 512))
+
+
+def cache_key(model_name: str, prompt_template: str, term: str, definition: str) -> str:
+    """Content address for one generation: hash of model, prompt template, term and definition."""
+    digest = hashlib.sha256()
+    for part in (model_name, prompt_template, term, definition):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Two-tier cache of generated text.
+
+    Lookups hit an in-memory LRU first and then a SQLite file on disk. The disk
+    tier is shared between processes and evicts the least recently accessed
+    entries once it grows past max_bytes.
+    """
+
+    def __init__(self, path: Optional[str] = None, memory_items: int = CACHE_MEMORY_ITEMS,
+                 max_bytes: int = CACHE_MAX_MB * 1024 * 1024):
+        self.path = path or os.path.join(CACHE_DIR, 'results.sqlite')
+        self.memory_items = memory_items
+        self.max_bytes = max_bytes
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._writes = 0
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                get_metrics().inc('sageai_cache_lookups_total', result='memory_hit')
+                return self._memory[key]
+            try:
+                row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Result cache read error: {str(e)}")
+                row = None
+            if row is None:
+                self.misses += 1
+                get_metrics().inc('sageai_cache_lookups_total', result='miss')
+                return None
+            self.disk_hits += 1
+            get_metrics().inc('sageai_cache_lookups_total', result='disk_hit')
+            self._remember(key, row[0])
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """Store value under key in both tiers."""
+        if value is None:
+            return
+        with self._lock:
+            self._remember(key, value)
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                    (key, value, len(value.encode('utf-8')), time.time())
+                )
+                self._writes += 1
+                # Summing entry sizes is a table scan, so only check the budget periodically
+                if self._writes % 64 == 0:
+                    self._evict()
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Result cache write error: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for both tiers."""
+        with self._lock:
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'memory_items': len(self._memory)
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _remember(self, key: str, value: str) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict(self) -> None:
+        """Drop least recently accessed rows until the disk tier fits in max_bytes."""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in self._db.execute("SELECT key, size FROM results ORDER BY accessed"):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._db.executemany("DELETE FROM results WHERE key = ?", stale)
+        logger.info(f"Result cache evicted {len(stale)} entries ({freed} bytes)")
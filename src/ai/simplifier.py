@@ -1,40 +1,194 @@
 import logging
-from typing import Optional
-from gpt4all import GPT4All
+import re
+import time
+import threading
+from typing import Dict, List, Optional, Sequence
 import os
+from src.ai.backends import InferenceBackend, collect, create_backend, estimate_tokens
+from src.ai.result_cache import ResultCache, cache_key
+from src.utils.metrics import get_metrics
+from src.utils.pools import get_thread_pool
+
+SIMPLIFY_PROMPT = "Simplify this text for a middle school student: {definition}"
+ANALOGY_PROMPT = "Create a simple analogy for {term}: {definition}"
+MIND_MAP_PROMPT = "Create a mind map prompt for {term}. Include key concepts and relationships from: {definition}"
+
+# Prompt template of each output field on the single-field path
+FIELD_PROMPTS = {
+    'simplified_definition': SIMPLIFY_PROMPT,
+    'analogy': ANALOGY_PROMPT,
+    'mind_map_prompt': MIND_MAP_PROMPT
+}
+
+# Token budget per field: (floor, tokens per token of definition, ceiling).
+# Short definitions need short answers; long ones get room up to the ceiling.
+FIELD_BUDGETS = {
+    'simplified_definition': (24, 0.8, 160),
+    'analogy': (16, 0.25, 60),
+    'mind_map_prompt': (40, 0.8, 200)
+}
+# A field is complete after this many sentences (None: it may run to its budget)
+FIELD_SENTENCES = {
+    'simplified_definition': 3,
+    'analogy': 1,
+    'mind_map_prompt': None
+}
+# The model has finished its answer once it starts a new paragraph or prompt
+FIELD_STOPS = {
+    'simplified_definition': ["\n\n", "\nSimplify this text"],
+    'analogy': ["\n\n", "\nCreate a simple analogy"],
+    'mind_map_prompt': ["\n\n\n", "\nCreate a mind map prompt"]
+}
+
+# Stream tokens from the backend so generation can be stopped as soon as a field is complete
+STREAM_TOKENS = os.environ.get('SAGEAI_STREAM_TOKENS', '1') != '0'
+
+# Number of terms sent to the model in one batched generation
+BATCH_SIZE = int(os.environ.get('SAGEAI_SIMPLIFIER_BATCH_SIZE', 4))
+
+BATCH_PROMPT_HEADER = (
+    "For each numbered term below, write exactly three lines in this format:\n"
+    "[n] SIMPLIFIED: <the definition rewritten for a middle school student>\n"
+    "[n] ANALOGY: <a simple analogy for the term>\n"
+    "[n] MIND MAP: <key concepts and relationships for a mind map of the term>\n"
+)
+BATCH_PROMPT_ITEM = "\n[{index}] Term: {term}\nDefinition: {definition}\n"
+# Tokens for the "[n] LABEL:" prefixes of one term's three answer lines
+BATCH_LINE_TOKENS = 3 * 6
+
+# Answer labels with their whitespace removed, so "MIND MAP" and "MINDMAP" match
+BATCH_FIELDS = {
+    'SIMPLIFIED': 'simplified_definition',
+    'ANALOGY': 'analogy',
+    'MINDMAP': 'mind_map_prompt'
+}
+# Batched answers are cached under the batch template and their field, so a
+# change to either batch prompt invalidates them
+BATCH_TEMPLATES = {
+    field: f"{BATCH_PROMPT_HEADER}{BATCH_PROMPT_ITEM}\x00{field}" for field in FIELD_PROMPTS
+}
+BATCH_LINE = re.compile(r'^\s*\[(\d+)\]\s*(SIMPLIFIED|ANALOGY|MIND\s*MAP)\s*:\s*(.*)$', re.IGNORECASE)
 
 class Simplifier:
-    def __init__(self):
+    def __init__(self, cache: Optional[ResultCache] = None, backend: Optional[InferenceBackend] = None):
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.DEBUG)
-        
-        # Define model paths
-        model_name = "ggml-gpt4all-j-v1.3-groovy"
-        model_path = os.path.join(os.path.expanduser('~'), '.cache', 'gpt4all')
-        os.makedirs(model_path, exist_ok=True)
-        
+
         try:
-            self.logger.info(f"Initializing GPT4All with model path: {model_path}")
-            self.model = GPT4All(
-                model_name=model_name,
-                model_path=model_path,
-                allow_download=True,
-                verbose=True
-            )
-            self.logger.info("Model initialized successfully")
+            self.backend = backend or create_backend()
+            self.model_name = self.backend.model_name
+            self.logger.info(f"Model backend initialized: {type(self.backend).__name__} ({self.model_name})")
         except Exception as e:
             self.logger.error(f"Model initialization error: {str(e)}")
             # Fallback to simpler processing if model fails
-            self.model = None
+            self.backend = None
+            self.model_name = None
             self.logger.warning("Running in fallback mode without AI model")
 
+        try:
+            self.cache = cache or ResultCache()
+        except Exception as e:
+            self.logger.error(f"Result cache unavailable: {str(e)}")
+            self.cache = None
+
+        self.stream_tokens = STREAM_TOKENS
+        self.last_generation: Dict[str, float] = {}
+        self.generation_stats = {'calls': 0, 'tokens': 0, 'seconds': 0.0, 'ttft_seconds': 0.0, 'early_stops': 0}
+        self._stats_lock = threading.Lock()
+
+    def _generate(self, prompt: str, max_tokens: int, stop: Sequence[str] = (),
+                  sentences: Optional[int] = None) -> str:
+        """
+        Run a single generation on the configured backend.
+
+        Generation ends at max_tokens, at the first stop sequence or after
+        `sentences` complete sentences. Tokens per second and time to first
+        token are recorded in last_generation and generation_stats.
+        """
+        start = time.perf_counter()
+        if self.stream_tokens and self.backend.streams:
+            chunks = self.backend.stream(prompt, max_tokens, stop)
+        else:
+            chunks = iter([self.backend.generate(prompt, max_tokens, stop)])
+        text, stats = collect(chunks, stop, sentences, start)
+        if not (self.stream_tokens and self.backend.streams):
+            # One chunk held the whole answer; count its tokens instead
+            stats['tokens'] = estimate_tokens(text)
+            stats['tokens_per_sec'] = stats['tokens'] / stats['seconds'] if stats['seconds'] else 0.0
+        self._record(stats, max_tokens)
+        return text
+
+    def _record(self, stats: Dict[str, float], max_tokens: int) -> None:
+        self.last_generation = dict(stats, max_tokens=max_tokens)
+        with self._stats_lock:
+            totals = self.generation_stats
+            totals['calls'] += 1
+            totals['tokens'] += stats['tokens']
+            totals['seconds'] += stats['seconds']
+            totals['ttft_seconds'] += stats['ttft_seconds']
+            totals['early_stops'] += int(stats['stopped'])
+        metrics = get_metrics()
+        metrics.inc('sageai_generation_calls_total')
+        metrics.inc('sageai_generated_tokens_total', stats['tokens'])
+        metrics.observe('sageai_generation_seconds', stats['seconds'])
+        metrics.observe('sageai_generation_ttft_seconds', stats['ttft_seconds'])
+        self.logger.debug(
+            f"Generated {stats['tokens']}/{max_tokens} tokens in {stats['seconds']:.2f}s "
+            f"({stats['tokens_per_sec']:.1f} tokens/sec, first token after {stats['ttft_seconds']:.2f}s)"
+        )
+
+    def stats(self) -> Dict[str, float]:
+        """Averages over every generation this instance has run."""
+        with self._stats_lock:
+            totals = dict(self.generation_stats)
+        calls = totals['calls']
+        return dict(
+            totals,
+            tokens_per_sec=round(totals['tokens'] / totals['seconds'], 1) if totals['seconds'] else 0.0,
+            avg_ttft_seconds=round(totals['ttft_seconds'] / calls, 3) if calls else 0.0,
+            avg_seconds=round(totals['seconds'] / calls, 3) if calls else 0.0
+        )
+
+    def token_budget(self, field: str, definition: str) -> int:
+        """max_tokens for one field, scaled by the length of the definition."""
+        floor, ratio, ceiling = FIELD_BUDGETS[field]
+        return int(min(ceiling, floor + ratio * estimate_tokens(definition)))
+
+    def _field_key(self, field: str, term: str, definition: str, template: Optional[str] = None) -> str:
+        """Cache key of a field value, by the prompt template that produced it (default: the field's own)."""
+        return cache_key(self.model_name, template or FIELD_PROMPTS[field], term, definition)
+
+    def _cached(self, field: str, term: str, definition: str, template: Optional[str] = None) -> Optional[str]:
+        if not self.cache:
+            return None
+        return self.cache.get(self._field_key(field, term, definition, template))
+
+    def _store(self, field: str, term: str, definition: str, value: Optional[str],
+               template: Optional[str] = None) -> None:
+        if self.cache and value:
+            self.cache.set(self._field_key(field, term, definition, template), value)
+
+    def _generate_field(self, field: str, term: str, definition: str) -> str:
+        """Generate one output field, served from the result cache when possible."""
+        cached = self._cached(field, term, definition)
+        if cached is not None:
+            return cached
+        prompt = FIELD_PROMPTS[field].format(term=term, definition=definition)
+        response = self._generate(
+            prompt,
+            max_tokens=self.token_budget(field, definition),
+            stop=FIELD_STOPS[field],
+            sentences=FIELD_SENTENCES[field]
+        ).strip()
+        self._store(field, term, definition, response)
+        return response
+
     def simplify_definition(self, text: str) -> Optional[str]:
-        """Simplify text using GPT4All or fallback to basic processing."""
+        """Simplify text using the model or fallback to basic processing."""
         try:
-            if self.model:
-                prompt = f"Simplify this text for a middle school student: {text}"
-                response = self.model.generate(prompt, max_tokens=50)
-                return response.strip()
+            if self.backend:
+                # The simplify prompt does not use the term, so it is not part of the key
+                return self._generate_field('simplified_definition', '', text)
             else:
                 # Fallback processing
                 return f"Simplified: {text}"
@@ -43,12 +197,10 @@ class Simplifier:
             return None
 
     def generate_analogy(self, term: str, definition: str) -> Optional[str]:
-        """Generate analogy using GPT4All or fallback to basic response."""
+        """Generate analogy using the model or fallback to basic response."""
         try:
-            if self.model:
-                prompt = f"Create a simple analogy for {term}: {definition}"
-                response = self.model.generate(prompt, max_tokens=30)
-                return response.strip()
+            if self.backend:
+                return self._generate_field('analogy', term, definition)
             else:
                 # Fallback processing
                 return f"Analogy for {term}: Like a familiar example"
@@ -57,12 +209,10 @@ class Simplifier:
             return None
 
     def generate_mind_map_prompt(self, term: str, definition: str) -> Optional[str]:
-        """Generate mind map prompt using GPT4All or fallback to basic structure."""
+        """Generate mind map prompt using the model or fallback to basic structure."""
         try:
-            if self.model:
-                prompt = f"Create a mind map prompt for {term}. Include key concepts and relationships from: {definition}"
-                response = self.model.generate(prompt, max_tokens=100)
-                return response.strip()
+            if self.backend:
+                return self._generate_field('mind_map_prompt', term, definition)
             else:
                 # Fallback processing
                 return f"Mind map for {term}: Central concept - {term}"
@@ -78,4 +228,115 @@ class Simplifier:
             "simplified_definition": self.simplify_definition(text),
             "analogy": self.generate_analogy(term, text),
             "mind_map_prompt": self.generate_mind_map_prompt(term, text)
-        }
\ No newline at end of file
+        }
+
+    def process_batch(self, items: List[Dict[str, str]], batch_size: int = BATCH_SIZE) -> List[dict]:
+        """
+        Process many terms with one structured generation per group of terms.
+
+        Args:
+            items (List[Dict[str, str]]): Dicts with 'term' and 'definition' keys
+            batch_size (int): Number of terms per model call
+
+        Returns:
+            List[dict]: One process_text-shaped row per item, in input order
+        """
+        if not self.backend:
+            return [self.process_text(item['term'], item['definition']) for item in items]
+
+        results = [None] * len(items)
+        pending = []
+        for i, item in enumerate(items):
+            row = self._cached_row(item['term'], item['definition'])
+            if row:
+                results[i] = row
+            else:
+                pending.append(i)
+
+        groups = [pending[start:start + batch_size] for start in range(0, len(pending), max(batch_size, 1))]
+        if self.backend.concurrency > 1 and len(groups) > 1:
+            # Backends that serve several prompts at once get one group per slot
+            pool = get_thread_pool('simplifier', self.backend.concurrency)
+            answers = pool.map(lambda indexes: self._process_group([items[j] for j in indexes]), groups)
+        else:
+            answers = (self._process_group([items[j] for j in indexes]) for indexes in groups)
+        for indexes, rows in zip(groups, answers):
+            for i, row in zip(indexes, rows):
+                results[i] = row
+        if pending:
+            stats = self.stats()
+            self.logger.info(
+                f"Generation so far: {stats['calls']} calls at {stats['tokens_per_sec']} tokens/sec, "
+                f"{stats['avg_ttft_seconds']}s average to first token, {stats['early_stops']} stopped early"
+            )
+        return results
+
+    def _cached_row(self, term: str, text: str) -> Optional[dict]:
+        """
+        Return a full row if every field for this term is already cached.
+
+        Fields are looked up under the batch template first, then under the
+        per-field prompt that _process_group falls back to for fields the
+        batched answer missed.
+        """
+        fields = {
+            field: self._cached(field, term, text, BATCH_TEMPLATES[field])
+            or self._cached(field, '' if field == 'simplified_definition' else term, text)
+            for field in FIELD_PROMPTS
+        }
+        if not all(fields.values()):
+            return None
+        return dict({"term": term, "complicated_text": text}, **fields)
+
+    def _process_group(self, group: List[Dict[str, str]]) -> List[dict]:
+        """Generate all three fields for a group of terms in a single call."""
+        prompt = BATCH_PROMPT_HEADER + "".join(
+            BATCH_PROMPT_ITEM.format(index=i + 1, term=item['term'], definition=item['definition'])
+            for i, item in enumerate(group)
+        )
+        try:
+            max_tokens = sum(
+                BATCH_LINE_TOKENS + sum(self.token_budget(field, item['definition']) for field in FIELD_BUDGETS)
+                for item in group
+            )
+            # The answer is complete once the model starts an item that was not asked for
+            response = self._generate(prompt, max_tokens=max_tokens, stop=[f"[{len(group) + 1}]", "\n\n\n"])
+            parsed = self._parse_batch_response(response, len(group))
+        except Exception as e:
+            self.logger.error(f"Batched generation error: {str(e)}")
+            parsed = [{} for _ in group]
+
+        rows = []
+        for item, fields in zip(group, parsed):
+            term, text = item['term'], item['definition']
+            for field in FIELD_PROMPTS:
+                self._store(field, term, text, fields.get(field), BATCH_TEMPLATES[field])
+            # Fall back to the per-field prompts for anything the batch answer missed
+            rows.append({
+                "term": term,
+                "complicated_text": text,
+                "simplified_definition": fields.get('simplified_definition') or self.simplify_definition(text),
+                "analogy": fields.get('analogy') or self.generate_analogy(term, text),
+                "mind_map_prompt": fields.get('mind_map_prompt') or self.generate_mind_map_prompt(term, text)
+            })
+        return rows
+
+    def _parse_batch_response(self, response: str, count: int) -> List[Dict[str, str]]:
+        """Split a batched answer into per-term field dicts; unparsed fields are left out."""
+        parsed = [{} for _ in range(count)]
+        current = None
+        for line in response.splitlines():
+            match = BATCH_LINE.match(line)
+            if match:
+                index = int(match.group(1)) - 1
+                field = BATCH_FIELDS.get(re.sub(r'\s+', '', match.group(2).upper()))
+                if field and 0 <= index < count:
+                    current = (index, field)
+                    parsed[index][current[1]] = match.group(3).strip()
+                else:
+                    current = None
+            elif current and line.strip():
+                # Continuation of a field that wrapped onto the next line
+                index, field = current
+                parsed[index][field] = f"{parsed[index][field]} {line.strip()}".strip()
+        return parsed
\ No newline at end of file
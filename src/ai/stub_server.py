@@ -0,0 +1,119 @@
+"""
+Local stand-in for an OpenAI-compatible completion server.
+
+Answers POST /v1/completions with deterministic text (batched prompts get
+well-formed numbered answers), honouring stop sequences and streaming word
+by word when asked, so the HTTP backend and everything above it can be
+exercised without a model:
+
+    python -m src.ai.stub_server --port 8081 --delay 0.05
+    SAGEAI_BACKEND=http SAGEAI_BACKEND_MODEL=stub python src/main.py
+
+Giving the stub its own model name keeps its answers out of the real
+model's entries in the result cache.
+"""
+import re
+import json
+import time
+import argparse
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+BATCH_ITEM = re.compile(r'^\[(\d+)\] Term: (.*)$', re.MULTILINE)
+
+
+def fake_completion(prompt: str, max_tokens: int) -> str:
+    """Deterministic answer shaped like the model's for the Simplifier's prompts."""
+    items = BATCH_ITEM.findall(prompt)
+    if items:
+        return "\n".join(
+            f"[{index}] SIMPLIFIED: {term} explained simply.\n"
+            f"[{index}] ANALOGY: {term} is like a familiar example.\n"
+            f"[{index}] MIND MAP: {term} - key concepts and relationships."
+            for index, term in items
+        )
+    words = prompt.split()
+    return " ".join(words[-min(len(words), max_tokens, 24):])
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive between requests
+    protocol_version = 'HTTP/1.1'
+    delay = 0.0
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/completions'):
+            self._send(404, {'error': {'message': f"Unknown path {self.path}"}})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            prompt = request['prompt']
+        except (ValueError, KeyError, TypeError):
+            self._send(400, {'error': {'message': 'Expected a JSON body with a prompt'}})
+            return
+        if self.delay:
+            time.sleep(self.delay)
+        text = fake_completion(prompt, int(request.get('max_tokens', 16)))
+        for stop in request.get('stop') or []:
+            text = text.split(stop, 1)[0]
+        if request.get('stream'):
+            self._send_stream(re.findall(r'\s*\S+', text))
+            return
+        self._send(200, {
+            'object': 'text_completion',
+            'model': request.get('model', 'stub'),
+            'choices': [{'index': 0, 'text': text, 'finish_reason': 'stop'}]
+        })
+
+    def _send(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, tokens) -> None:
+        # Chunked, so the connection stays open for the client's next request
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for token in tokens:
+                event = {'object': 'text_completion', 'choices': [{'index': 0, 'text': token, 'finish_reason': None}]}
+                self._write_chunk(f"data: {json.dumps(event)}\n\n".encode('utf-8'))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading early
+            self.close_connection = True
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def make_server(host: str = '127.0.0.1', port: int = 8081, delay: float = 0.0) -> ThreadingHTTPServer:
+    """Build (but do not start) a stub server; port 0 picks a free port."""
+    handler = type('StubHandler', (StubHandler,), {'delay': delay})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local OpenAI-compatible completion stub')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds to wait before each answer')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = make_server(args.host, args.port, args.delay)
+    logger.info(f"Stub completion server on http://{args.host}:{server.server_port}/v1")
+    server.serve_forever()
@@ -0,0 +1,375 @@
+"""
+Build one dataset from many documents.
+
+    python -m src.batch course_docs/ --output output/batch --name biology
+    python -m src.batch manifest.txt more_docs/ --workers 8 --max-defs 200
+
+Inputs are documents, directories (searched recursively for supported
+files) or manifests: .txt files with one path per line or .jsonl files
+with a "path" field per record. Extraction and NLP run in a process pool,
+with small files packed into shared work items and long PDFs split into
+page ranges, while the parent process simplifies the terms as they arrive.
+Terms repeated across documents are simplified once, and all rows go
+into a single dataset next to a JSON report of the run.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from src.extractors.tabular import segment_chars
+from src.output.data_writer import DataWriter, output_paths
+from src.pipeline import TERM_BUFFER, ProgressCallback, no_progress
+from src.processors.nlp_processor import TermIndex
+from src.processors.term_clusters import TermClusters
+from src.utils.file_validator import ALLOWED_EXTENSIONS
+from src.utils.model_registry import get_registry
+from src.utils.pools import cpu_count, start_process_pool
+from src.utils.streams import batches, threaded
+
+logger = logging.getLogger(__name__)
+
+# Processes running extraction and NLP
+BATCH_WORKERS = int(os.environ.get('SAGEAI_BATCH_WORKERS', cpu_count()))
+# Files below this size are packed together into one work item
+PACK_MAX_BYTES = int(os.environ.get('SAGEAI_BATCH_PACK_KB', 1024)) * 1024
+PACK_TARGET_BYTES = 8 * PACK_MAX_BYTES
+PACK_MAX_FILES = 32
+# PDFs with at least twice this many pages are split into ranges of this many pages
+SPLIT_PAGES = int(os.environ.get('SAGEAI_BATCH_SPLIT_PAGES', 32))
+# Seconds between progress log lines
+PROGRESS_SECONDS = 10
+
+MANIFEST_EXTENSIONS = {'txt', 'jsonl'}
+
+
+def discover(inputs: Iterable[str]) -> List[str]:
+    """
+    Expand documents, directories and manifests into a list of document paths.
+
+    Paths are returned once each, in the order they were first found.
+    """
+    found: Dict[str, None] = {}
+    for entry in inputs:
+        if os.path.isdir(entry):
+            for root, dirs, files in os.walk(entry):
+                dirs.sort()
+                for name in sorted(files):
+                    if _extension(name) in ALLOWED_EXTENSIONS:
+                        found.setdefault(os.path.realpath(os.path.join(root, name)))
+        elif _extension(entry) in MANIFEST_EXTENSIONS:
+            found.update(dict.fromkeys(discover(_read_manifest(entry))))
+        elif _extension(entry) in ALLOWED_EXTENSIONS:
+            if not os.path.exists(entry):
+                raise FileNotFoundError(f"File not found: {entry}")
+            found.setdefault(os.path.realpath(entry))
+        else:
+            raise ValueError(f"Not a supported document, directory or manifest: {entry}")
+    return list(found)
+
+
+def _read_manifest(path: str) -> List[str]:
+    """Paths listed in a manifest, relative ones resolved against its directory."""
+    base = os.path.dirname(os.path.abspath(path))
+    entries = []
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            entry = json.loads(line)['path'] if _extension(path) == 'jsonl' else line
+            entries.append(os.path.join(base, os.path.expanduser(entry)))
+    return entries
+
+
+def _extension(path: str) -> str:
+    return path.rsplit('.', 1)[-1].lower() if '.' in os.path.basename(path) else ''
+
+
+def plan_work(paths: List[str]) -> List[Dict[str, Any]]:
+    """
+    Group documents into work items for the process pool.
+
+    Small files are packed into items of up to PACK_TARGET_BYTES so their
+    per-task overhead is shared, long PDFs become one item per page range,
+    and items are ordered largest first so no big item is left running
+    alone at the end of the batch. Each page range is searched for up to
+    the per-document limit of terms, and the merged document keeps the
+    earliest ones.
+    """
+    from src.extractors.text_extractor import pdf_page_count
+
+    items = []
+    pack = {'parts': [], 'bytes': 0}
+    for path in paths:
+        size = os.path.getsize(path)
+        if size < PACK_MAX_BYTES:
+            pack['parts'].append({'path': path, 'start': 0, 'stop': None, 'part_count': 1})
+            pack['bytes'] += size
+            if pack['bytes'] >= PACK_TARGET_BYTES or len(pack['parts']) >= PACK_MAX_FILES:
+                items.append(pack)
+                pack = {'parts': [], 'bytes': 0}
+            continue
+        pages = 0
+        if _extension(path) == 'pdf':
+            try:
+                pages = pdf_page_count(path)
+            except Exception as e:
+                # Left whole; the worker reports the error for this document
+                logger.warning(f"Could not count pages of {path}: {str(e)}")
+        if pages >= 2 * SPLIT_PAGES:
+            starts = range(0, pages, SPLIT_PAGES)
+            for start in starts:
+                stop = min(start + SPLIT_PAGES, pages)
+                items.append({
+                    'parts': [{'path': path, 'start': start, 'stop': stop, 'part_count': len(starts)}],
+                    'bytes': size * (stop - start) // pages
+                })
+        else:
+            items.append({'parts': [{'path': path, 'start': 0, 'stop': None, 'part_count': 1}], 'bytes': size})
+    if pack['parts']:
+        items.append(pack)
+    items.sort(key=lambda item: item['bytes'], reverse=True)
+    return items
+
+
+def _process_item(parts: List[Dict[str, Any]], max_definitions: int) -> List[Dict[str, Any]]:
+    """
+    Extract and find the terms of each part of a work item, in a pool worker.
+
+    The worker's model registry keeps the extractor and spaCy loaded across
+    items. Documents are extracted serially here: the pool already has one
+    process per CPU.
+    """
+    models = get_registry()
+    extractor = models.get('extractor')
+    results = []
+    with models.borrow('nlp') as processor:
+        for part in parts:
+            start = time.perf_counter()
+            counts = {'pages': 0, 'characters': 0}
+
+            def segments():
+                if _extension(part['path']) == 'pdf':
+                    pages = extractor.iter_pdf_pages(part['path'], workers=1, start=part['start'], stop=part['stop'])
+                else:
+                    pages = extractor.iter_extract(part['path'], workers=1)
+                for segment in pages:
+                    counts['pages'] += 1
+                    counts['characters'] += segment_chars(segment)
+                    yield segment
+
+            result = dict(part, **counts)
+            try:
+                result['terms'] = list(processor.iter_terms(segments(), max_definitions=max_definitions))
+            except Exception as e:
+                logger.error(f"Batch extraction failed for {part['path']}: {str(e)}")
+                result['error'] = str(e)
+            result.update(counts, seconds=round(time.perf_counter() - start, 3))
+            results.append(result)
+    return results
+
+
+class BatchProgress:
+    """Thread-safe counters for a batch run, logged with throughput every PROGRESS_SECONDS."""
+
+    def __init__(self, documents: int, total_bytes: int, callback: ProgressCallback = no_progress):
+        self.callback = callback
+        self.started = time.perf_counter()
+        self.counts = {
+            'documents': documents, 'documents_done': 0, 'documents_failed': 0,
+            'bytes_total': total_bytes, 'bytes_done': 0, 'pages': 0, 'characters': 0,
+            'terms_found': 0, 'terms_unique': 0, 'clusters': 0, 'rows_written': 0
+        }
+        self._lock = threading.Lock()
+        self._last_report = self.started
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                self.counts[name] += value
+        self.report()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+        seconds = time.perf_counter() - self.started
+        counts['seconds'] = round(seconds, 3)
+        counts['throughput'] = {
+            f"{name}_per_sec": round(counts[name] / seconds, 2) if seconds else 0.0
+            for name in ('documents_done', 'pages', 'characters', 'terms_found', 'rows_written')
+        }
+        if counts['bytes_done'] and counts['bytes_done'] < counts['bytes_total']:
+            counts['eta_seconds'] = round(seconds * (counts['bytes_total'] / counts['bytes_done'] - 1))
+        return counts
+
+    def report(self, force: bool = False) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            if not force and now - self._last_report < PROGRESS_SECONDS:
+                return
+            self._last_report = now
+        counts = self.snapshot()
+        rates = counts['throughput']
+        eta = f", ETA {counts['eta_seconds']}s" if 'eta_seconds' in counts else ''
+        logger.info(
+            f"Batch: {counts['documents_done']}/{counts['documents']} documents "
+            f"({counts['documents_failed']} failed), {counts['pages']} pages, "
+            f"{counts['terms_unique']} unique of {counts['terms_found']} terms in {counts['clusters']} clusters, "
+            f"{counts['rows_written']} rows | {rates['documents_done_per_sec']} docs/s, "
+            f"{rates['pages_per_sec']} pages/s, {rates['rows_written_per_sec']} rows/s{eta}"
+        )
+        self.callback('batch', **counts)
+
+
+def run_batch(inputs: Iterable[str], output_dir: str, name: str = 'batch', max_definitions: int = 100,
+              workers: int = BATCH_WORKERS, formats: Optional[List[str]] = None,
+              progress: ProgressCallback = no_progress) -> Dict[str, Any]:
+    """
+    Generate one deduplicated dataset from many documents.
+
+    Work items run on the 'batch' process pool with a bounded number in
+    flight. The pool's workers are forked before any thread of the batch
+    starts or any model is loaded, so no child inherits a held lock. Finished terms stream through a background thread into the
+    simplifier, so extraction, NLP and generation overlap. A term whose
+    normalised term and definition were already seen in an earlier
+    document is dropped, and near-duplicates of earlier terms (see
+    TermClusters) reuse their generated fields.
+
+    Args:
+        inputs (Iterable[str]): Documents, directories and manifests
+        output_dir (str): Directory for the dataset files and the report
+        name (str): Base name of the output files
+        max_definitions (int): Maximum number of terms taken from each document
+        workers (int): Extraction and NLP processes
+        formats (List[str]): Output formats (defaults to SAGEAI_OUTPUT_FORMATS)
+        progress (callable): Called as progress('batch', **counters) as work advances
+
+    Returns:
+        Dict[str, Any]: outputs, report_path, counters, throughput and per-document results
+    """
+    from src.ai.simplifier import BATCH_SIZE
+
+    paths = discover(inputs)
+    if not paths:
+        raise ValueError("No supported documents found")
+    items = plan_work(paths)
+    sizes = {path: os.path.getsize(path) for path in paths}
+    tracker = BatchProgress(len(paths), sum(sizes.values()), progress)
+    logger.info(f"Batch of {len(paths)} documents in {len(items)} work items on {workers} workers")
+
+    documents: List[Dict[str, Any]] = []
+    stop = threading.Event()
+    pool = start_process_pool('batch', workers)
+
+    def finish_document(parts: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Record a document whose parts are all done and return its terms."""
+        parts.sort(key=lambda part: part['start'])
+        errors = [part['error'] for part in parts if 'error' in part]
+        terms = [term for part in parts for term in part.get('terms', [])][:max_definitions]
+        documents.append({
+            'path': parts[0]['path'],
+            'pages': sum(part['pages'] for part in parts),
+            'characters': sum(part['characters'] for part in parts),
+            'terms': len(terms),
+            'seconds': round(sum(part['seconds'] for part in parts), 3),
+            **({'error': "; ".join(errors)} if errors else {})
+        })
+        tracker.add(documents_done=1, documents_failed=int(bool(errors)), terms_found=len(terms),
+                    bytes_done=sizes[parts[0]['path']])
+        return terms
+
+    def found_terms() -> Iterator[Dict[str, str]]:
+        queued = list(reversed(items))
+        in_flight = set()
+        split_parts: Dict[str, List[Dict[str, Any]]] = {}
+        index = TermIndex()
+        try:
+            while queued or in_flight:
+                while queued and len(in_flight) < workers * 2:
+                    in_flight.add(pool.submit(_process_item, queued.pop()['parts'], max_definitions))
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for part in future.result():
+                        tracker.add(pages=part['pages'], characters=part['characters'])
+                        if part['part_count'] > 1:
+                            # Split documents are merged in page order once every range is back
+                            collected = split_parts.setdefault(part['path'], [])
+                            collected.append(part)
+                            if len(collected) < part['part_count']:
+                                continue
+                            terms = finish_document(split_parts.pop(part['path']))
+                        else:
+                            terms = finish_document([part])
+                        for term in terms:
+                            if index.add(f"{term['term']}\n{term['definition']}"):
+                                tracker.add(terms_unique=1)
+                                yield term
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    dataset_paths = output_paths(output_dir, name, formats)
+    terms = threaded(found_terms(), TERM_BUFFER, stop, 'batch')
+    clusters = TermClusters()
+    models = get_registry()
+    try:
+        with models.borrow('simplifier') as simplifier, DataWriter(dataset_paths) as writer:
+            # Enough terms per call to keep every backend slot busy
+            group = BATCH_SIZE * max(getattr(simplifier.backend, 'concurrency', 1), 1)
+            for batch in batches(terms, group):
+                created = clusters.counts['clusters']
+                for row in clusters.simplify(batch, simplifier.process_batch):
+                    writer.write(row)
+                tracker.add(rows_written=len(batch), clusters=clusters.counts['clusters'] - created)
+    finally:
+        stop.set()
+
+    tracker.report(force=True)
+    report = dict(tracker.snapshot(), outputs=dataset_paths, documents_detail=documents)
+    report_path = os.path.join(output_dir, f"{name}_report.json")
+    with open(f"{report_path}.tmp", 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    os.replace(f"{report_path}.tmp", report_path)
+    return dict(report, report_path=report_path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate one dataset from many documents.")
+    parser.add_argument('inputs', nargs='+', help="documents, directories or manifests (.txt or .jsonl)")
+    parser.add_argument('--output', default=os.path.join(project_root, 'output'), help="output directory")
+    parser.add_argument('--name', default='batch', help="base name of the output files")
+    parser.add_argument('--max-defs', type=int, default=100, help="maximum terms per document")
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS, help="extraction and NLP processes")
+    parser.add_argument('--formats', help="comma-separated output formats (csv, jsonl, parquet)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    formats = [fmt.strip() for fmt in args.formats.split(',')] if args.formats else None
+    # Fork the workers while this process has a single thread and no models loaded
+    start_process_pool('batch', args.workers)
+    try:
+        report = run_batch(args.inputs, args.output, name=args.name, max_definitions=args.max_defs,
+                           workers=args.workers, formats=formats)
+    except (OSError, ValueError) as e:
+        logger.error(str(e))
+        return 1
+    print(f"{report['rows_written']} rows from {report['documents_done']} documents "
+          f"({report['documents_failed']} failed) in {report['seconds']:.1f}s")
+    for fmt, path in report['outputs'].items():
+        print(f"  {fmt}: {path}")
+    print(f"  report: {report['report_path']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+import os
+import time
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import pytesseract
+from PIL import Image, ImageOps
+
+from src.utils.metrics import get_metrics
+from src.utils.pools import cpu_count, get_thread_pool
+
+logger = logging.getLogger(__name__)
+
+OCR_WORKERS = int(os.environ.get('SAGEAI_OCR_WORKERS', cpu_count()))
+OCR_DPI = int(os.environ.get('SAGEAI_OCR_DPI', 300))
+OCR_TIMEOUT = int(os.environ.get('SAGEAI_OCR_TIMEOUT', 120))
+# Tall images are split into strips of about this many pixels at OCR_DPI
+OCR_TILE_HEIGHT = 2400
+# How far from the nominal cut to look for a blank row to split on
+OCR_CUT_SEARCH = 240
+
+# Each tesseract call runs single-threaded; parallelism comes from the pool
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+# Configure Tesseract path
+pytesseract.pytesseract.tesseract_cmd = '/opt/homebrew/bin/tesseract'
+
+
+def prepare_image(img: Image.Image, source_dpi: Optional[float] = None, target_dpi: int = OCR_DPI) -> Image.Image:
+    """
+    Grayscale, rescale and binarize an image for OCR.
+
+    Images are scaled so text sits at target_dpi (tesseract is most accurate
+    around 300 DPI; oversized scans just cost time) and thresholded with
+    Otsu's method.
+    """
+    gray = ImageOps.grayscale(img)
+    dpi = source_dpi or (img.info.get('dpi') or (None,))[0]
+    if dpi:
+        scale = target_dpi / float(dpi)
+        if abs(scale - 1.0) > 0.1:
+            size = (max(1, int(gray.width * scale)), max(1, int(gray.height * scale)))
+            gray = gray.resize(size, Image.LANCZOS)
+    threshold = _otsu_threshold(gray.histogram())
+    return gray.point(lambda p: 255 if p > threshold else 0, mode='1').convert('L')
+
+
+def split_tiles(img: Image.Image, tile_height: int = OCR_TILE_HEIGHT) -> List[Image.Image]:
+    """Cut a tall image into horizontal strips, splitting on blank rows where possible."""
+    if img.height <= tile_height * 1.5:
+        return [img]
+    tiles = []
+    top = 0
+    while img.height - top > tile_height * 1.5:
+        cut = _blank_row_near(img, top + tile_height)
+        tiles.append(img.crop((0, top, img.width, cut)))
+        top = cut
+    tiles.append(img.crop((0, top, img.width, img.height)))
+    return tiles
+
+
+def _blank_row_near(img: Image.Image, target: int) -> int:
+    """Closest all-white row to target, so strips don't cut through a line of text."""
+    for offset in range(OCR_CUT_SEARCH):
+        for y in (target - offset, target + offset):
+            if 0 < y < img.height and img.crop((0, y, img.width, y + 1)).getextrema()[0] == 255:
+                return y
+    return target
+
+
+def _otsu_threshold(histogram: Sequence[int]) -> int:
+    total = sum(histogram)
+    weighted_total = sum(i * count for i, count in enumerate(histogram))
+    background = weighted_background = 0
+    best_threshold, best_variance = 127, 0.0
+    for i, count in enumerate(histogram):
+        background += count
+        if not background:
+            continue
+        foreground = total - background
+        if not foreground:
+            break
+        weighted_background += i * count
+        mean_background = weighted_background / background
+        mean_foreground = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = i, variance
+    return best_threshold
+
+
+def _ocr_tile(tile: Image.Image) -> str:
+    return pytesseract.image_to_string(tile, timeout=OCR_TIMEOUT)
+
+
+class OCREngine:
+    """
+    Parallel OCR over pages and image tiles.
+
+    Each page is prepared (DPI normalisation and binarization) and split into
+    strips; all strips of all pages are fanned out over a shared pool of
+    persistent worker threads, each driving its own tesseract process, and
+    reassembled in order. Timings for the most recent call are kept in
+    last_timings, and every page is counted in the process metrics.
+
+    Engines are cheap, but the pool behind them is not: build one per
+    process and reuse it. Inside workers of an already parallel extraction
+    use workers=1, so the process count is not multiplied by the threads.
+    """
+
+    def __init__(self, workers: int = OCR_WORKERS, dpi: int = OCR_DPI):
+        self.workers = workers
+        self.dpi = dpi
+        self.last_timings: List[Dict[str, float]] = []
+
+    def ocr_image(self, img: Image.Image, source_dpi: Optional[float] = None) -> str:
+        """OCR a single image."""
+        return self.ocr_pages([img], [source_dpi])[0]
+
+    def ocr_pages(self, images: Sequence[Image.Image],
+                  source_dpis: Optional[Sequence[Optional[float]]] = None) -> List[str]:
+        """
+        OCR several page images in parallel.
+
+        Args:
+            images: Page images in reading order
+            source_dpis: Resolution of each image if known (else read from the image)
+
+        Returns:
+            List[str]: Recognised text for each image
+        """
+        source_dpis = source_dpis or [None] * len(images)
+        # Pools are shared by name, so engines of different sizes each get their own
+        pool = get_thread_pool(f'ocr-{self.workers}', self.workers)
+        metrics = get_metrics()
+        timings = []
+        page_futures = []
+        for index, (img, dpi) in enumerate(zip(images, source_dpis)):
+            start = time.perf_counter()
+            tiles = split_tiles(prepare_image(img, dpi, self.dpi))
+            timings.append({'page': index + 1, 'tiles': len(tiles), 'prepare_seconds': time.perf_counter() - start})
+            page_futures.append((start, [pool.submit(_ocr_tile, tile) for tile in tiles]))
+
+        texts = []
+        for timing, (start, futures) in zip(timings, page_futures):
+            text = "\n".join(future.result().strip() for future in futures)
+            timing['seconds'] = round(time.perf_counter() - start, 3)
+            timing['prepare_seconds'] = round(timing['prepare_seconds'], 3)
+            logger.debug(f"OCR page {timing['page']}: {timing['tiles']} tiles in {timing['seconds']}s")
+            metrics.inc('sageai_ocr_pages_total')
+            metrics.inc('sageai_ocr_tiles_total', timing['tiles'])
+            metrics.observe('sageai_ocr_page_seconds', timing['seconds'])
+            texts.append(text.strip())
+        self.last_timings = timings
+        return texts
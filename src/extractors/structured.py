@@ -0,0 +1,297 @@
+import os
+import re
+import logging
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.extractors.tabular import Segment, iter_table_segments
+from src.utils.pools import cpu_count, get_process_pool
+
+logger = logging.getLogger(__name__)
+
+# Slide-parallel PPTX extraction settings
+PPTX_WORKERS = int(os.environ.get('SAGEAI_PPTX_WORKERS', cpu_count()))
+PPTX_PARALLEL_MIN_SLIDES = int(os.environ.get('SAGEAI_PPTX_PARALLEL_MIN_SLIDES', 32))
+PPTX_MAX_SLIDES_PER_TASK = 16
+
+# Characters of block text joined into one segment for spaCy
+BLOCK_SEGMENT_CHARS = 4000
+
+# "Term: definition" paragraphs whose term is set in bold skip NLP when the
+# term is short and the definition is more than a couple of words
+TERM_MAX_WORDS = 8
+DEFINITION_MIN_WORDS = 3
+TERM_SEPARATORS = (':', '-', '–', '—')
+LEADING_SEPARATOR = re.compile(r'^\s*[:\-–—]\s*')
+
+# Block = {'kind': ..., 'text': ..., 'location': ...}, plus 'term' and
+# 'definition' for glossary-style blocks. Kinds: heading, paragraph, bullet,
+# table, note, header, footer, footnote
+Block = Dict[str, Any]
+
+
+def split_bold_term(runs: Sequence[Tuple[str, Optional[bool]]],
+                    text: Optional[str] = None) -> Optional[Tuple[str, str]]:
+    """
+    Term and definition of a paragraph that opens with a bold term.
+
+    Matches "**Osmosis**: the movement of water ..." and the same with a
+    dash, where the separator may be inside or after the bold run.
+
+    Args:
+        runs: (text, bold) for each run of the paragraph
+        text: Full text of the paragraph. Runs leave out hyperlinks (DOCX)
+            and fields (PPTX), so when given, the definition is taken from
+            this text and the runs only locate the bold term.
+
+    Returns:
+        (term, definition), or None if the paragraph is not shaped like that
+    """
+    lead = []
+    for run_text, bold in runs:
+        if not (bold or (lead and not run_text.strip())):
+            break
+        lead.append(run_text)
+    if not lead:
+        return None
+
+    term = "".join(lead)
+    if text is None:
+        rest = "".join(run_text for run_text, _ in runs[len(lead):])
+    elif text.startswith(term):
+        rest = text[len(term):]
+    else:
+        # The paragraph opens with text the runs do not show, such as a link
+        return None
+    term = term.strip()
+    separated = term.endswith(TERM_SEPARATORS)
+    term = term.rstrip("".join(TERM_SEPARATORS)).strip()
+    match = LEADING_SEPARATOR.match(rest)
+    if match:
+        separated = True
+        rest = rest[match.end():]
+    definition = rest.strip()
+    if (not separated or not term or len(term.split()) > TERM_MAX_WORDS
+            or len(definition.split()) < DEFINITION_MIN_WORDS):
+        return None
+    return term, definition
+
+
+def _text_block(kind: str, text: str, runs: Sequence[Tuple[str, Optional[bool]]], location: str) -> Optional[Block]:
+    block_text = text.strip()
+    if not block_text:
+        return None
+    block = {'kind': kind, 'text': block_text, 'location': location}
+    if kind in ('paragraph', 'bullet'):
+        glossary = split_bold_term(runs, text)
+        if glossary:
+            block['term'], block['definition'] = glossary
+    return block
+
+
+def _table_blocks(rows: Iterable[Sequence[str]], location: str) -> Iterator[Block]:
+    """Tables go through the spreadsheet logic, so glossary tables become term blocks."""
+    for segment in iter_table_segments(rows, source=location):
+        if isinstance(segment, dict):
+            yield {'kind': 'table', 'text': f"{segment['term']}: {segment['definition']}",
+                   'location': location, 'term': segment['term'], 'definition': segment['definition']}
+        else:
+            yield {'kind': 'table', 'text': segment, 'location': location}
+
+
+def blocks_to_segments(blocks: Iterable[Block]) -> Iterator[Segment]:
+    """
+    Turn typed blocks into pipeline segments.
+
+    Glossary-style blocks become {'term', 'definition'} dicts that skip NLP.
+    The text of the other blocks is joined one paragraph per block, up to
+    BLOCK_SEGMENT_CHARS at a time, so headings and bullets stay separate
+    sentences for spaCy.
+    """
+    buffer = []
+    size = 0
+    for block in blocks:
+        if block.get('term'):
+            yield {'term': block['term'], 'definition': block['definition']}
+            continue
+        buffer.append(block['text'])
+        size += len(block['text'])
+        if size >= BLOCK_SEGMENT_CHARS:
+            yield "\n\n".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield "\n\n".join(buffer)
+
+
+# DOCX
+
+def iter_docx_blocks(filepath: str) -> Iterator[Block]:
+    """
+    Yield the blocks of a Word document in reading order.
+
+    The body's paragraphs and tables come first, then the headers and
+    footers of each section and the footnotes. Style names are looked up
+    once per style id; python-docx's paragraph.style searches every style
+    on each call.
+    """
+    from docx import Document
+    from docx.oxml.ns import qn
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+
+    document = Document(filepath)
+    styles = {style.style_id: (style.name or '') for style in document.styles}
+    paragraphs = tables = 0
+    for child in document.element.body.iterchildren():
+        if child.tag == qn('w:p'):
+            paragraphs += 1
+            paragraph = Paragraph(child, document)
+            style = styles.get(child.style, '')
+            if style.startswith('Heading') or style == 'Title':
+                kind = 'heading'
+            elif 'List' in style or (child.pPr is not None and child.pPr.numPr is not None):
+                kind = 'bullet'
+            else:
+                kind = 'paragraph'
+            block = _text_block(kind, paragraph.text, [(run.text, run.bold) for run in paragraph.runs],
+                                f"paragraph {paragraphs}")
+            if block:
+                yield block
+        elif child.tag == qn('w:tbl'):
+            tables += 1
+            rows = ([cell.text.strip() for cell in row.cells] for row in Table(child, document).rows)
+            yield from _table_blocks(rows, f"table {tables}")
+
+    for number, section in enumerate(document.sections, start=1):
+        for kind, part in (('header', section.header), ('footer', section.footer)):
+            # Linked parts repeat the previous section's text
+            if part.is_linked_to_previous:
+                continue
+            for paragraph in part.paragraphs:
+                block = _text_block(kind, paragraph.text, [(run.text, run.bold) for run in paragraph.runs],
+                                    f"section {number} {kind}")
+                if block:
+                    yield block
+    yield from _docx_footnotes(document)
+
+
+def _docx_footnotes(document) -> Iterator[Block]:
+    """Footnotes, read from the footnotes part (python-docx has no API for them)."""
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import qn
+
+    for rel in document.part.rels.values():
+        if rel.is_external or not rel.reltype.endswith('/footnotes'):
+            continue
+        root = parse_xml(rel.target_part.blob)
+        for note in root.iterchildren(qn('w:footnote')):
+            note_id = int(note.get(qn('w:id'), '0'))
+            # Ids below 1 are the separator lines
+            if note_id < 1:
+                continue
+            text = " ".join(
+                "".join(t.text or '' for t in paragraph.iter(qn('w:t'))) for paragraph in note.iter(qn('w:p'))
+            ).strip()
+            if text:
+                yield {'kind': 'footnote', 'text': text, 'location': f"footnote {note_id}"}
+
+
+# PPTX
+
+def iter_pptx_blocks(filepath: str, workers: int = PPTX_WORKERS) -> Iterator[Block]:
+    """
+    Yield the blocks of a presentation slide by slide.
+
+    Large decks are split into slide ranges that a process pool walks in
+    parallel, with a bounded number of ranges in flight and blocks yielded
+    in slide order.
+
+    Args:
+        filepath (str): Path to the PPTX
+        workers (int): Pool size; 1 walks the slides serially in this process
+    """
+    from pptx import Presentation
+
+    presentation = Presentation(filepath)
+    slide_count = len(presentation.slides)
+    logger.info(f"Presentation has {slide_count} slides")
+    if workers <= 1 or slide_count < PPTX_PARALLEL_MIN_SLIDES:
+        yield from _pptx_slide_blocks(filepath, 0, slide_count, presentation)
+        return
+
+    # Workers open their own copy, so drop ours before fanning out
+    del presentation
+    slides_per_task = max(1, min(PPTX_MAX_SLIDES_PER_TASK, slide_count // (workers * 4) or 1))
+    ranges = deque((start, min(start + slides_per_task, slide_count))
+                   for start in range(0, slide_count, slides_per_task))
+    pool = get_process_pool('pptx', workers)
+    in_flight = deque()
+    try:
+        while ranges or in_flight:
+            while ranges and len(in_flight) < workers * 2:
+                start, stop = ranges.popleft()
+                in_flight.append(pool.submit(_pptx_slide_blocks, filepath, start, stop))
+            yield from in_flight.popleft().result()
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+# Deck last opened by this pool worker, reused while it handles further ranges of it
+_worker_deck: Dict[str, Any] = {}
+
+
+def _pptx_slide_blocks(filepath: str, start: int, stop: int, presentation=None) -> List[Block]:
+    """Blocks of slides [start, stop), including grouped shapes, tables and speaker notes."""
+    if presentation is None:
+        from pptx import Presentation
+        key = (filepath, os.path.getmtime(filepath))
+        if _worker_deck.get('key') != key:
+            _worker_deck.clear()
+            _worker_deck.update(key=key, presentation=Presentation(filepath))
+        presentation = _worker_deck['presentation']
+    slides = presentation.slides
+    blocks = []
+    for index in range(start, stop):
+        slide = slides[index]
+        location = f"slide {index + 1}"
+        for shape in _iter_shapes(slide.shapes):
+            blocks.extend(_shape_blocks(shape, location))
+        if slide.has_notes_slide:
+            notes = slide.notes_slide.notes_text_frame
+            if notes is not None and notes.text.strip():
+                blocks.append({'kind': 'note', 'text': notes.text.strip(), 'location': f"{location} notes"})
+    return blocks
+
+
+def _iter_shapes(shapes) -> Iterator[Any]:
+    """Every shape on a slide, with group shapes expanded recursively."""
+    from pptx.shapes.group import GroupShape
+
+    for shape in shapes:
+        if isinstance(shape, GroupShape):
+            yield from _iter_shapes(shape.shapes)
+        else:
+            yield shape
+
+
+def _shape_blocks(shape, location: str) -> Iterator[Block]:
+    from pptx.enum.shapes import PP_PLACEHOLDER
+
+    if shape.has_table:
+        rows = ([cell.text.strip() for cell in row.cells] for row in shape.table.rows)
+        yield from _table_blocks(rows, f"{location} table")
+        return
+    if not shape.has_text_frame:
+        return
+    if shape.is_placeholder and shape.placeholder_format.type in (PP_PLACEHOLDER.TITLE, PP_PLACEHOLDER.CENTER_TITLE):
+        kind = 'heading'
+    elif shape.is_placeholder:
+        kind = 'bullet'
+    else:
+        kind = 'paragraph'
+    for paragraph in shape.text_frame.paragraphs:
+        block = _text_block(kind, paragraph.text, [(run.text, run.font.bold) for run in paragraph.runs], location)
+        if block:
+            yield block
@@ -0,0 +1,115 @@
+import csv
+import logging
+from itertools import zip_longest
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Rows of free-form table text grouped into one segment for spaCy
+ROWS_PER_SEGMENT = 200
+
+TERM_HEADERS = {'term', 'terms', 'word', 'concept', 'keyword', 'vocabulary', 'glossary'}
+DEFINITION_HEADERS = {'definition', 'definitions', 'meaning', 'explanation', 'defn'}
+# Also common in inventories and product lists ("Name | Description"), so these
+# only count opposite a header from the sets above
+WEAK_TERM_HEADERS = {'name'}
+WEAK_DEFINITION_HEADERS = {'description'}
+
+Segment = Union[str, Dict[str, str]]
+
+
+def segment_chars(segment: Segment) -> int:
+    """Characters in a text segment or a ready-made term/definition dict."""
+    if isinstance(segment, dict):
+        return len(segment['term']) + len(segment['definition'])
+    return len(segment)
+
+
+def iter_csv_rows(filepath: str) -> Iterator[List[str]]:
+    """Stream the rows of a CSV file without loading it."""
+    with open(filepath, newline='', encoding='utf-8-sig', errors='replace') as file:
+        sample = file.read(64 * 1024)
+        file.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(file, dialect)
+
+
+def iter_xlsx_sheets(filepath: str) -> Iterator[Tuple[str, Iterator[Sequence]]]:
+    """Yield (sheet name, row iterator) for every sheet, reading in read-only mode."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            yield sheet.title, sheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def detect_glossary(header: Sequence[str]) -> Optional[Tuple[int, int]]:
+    """
+    Return (term column, definition column) if the header looks like a glossary.
+
+    A generic header ("Name", "Description") is only accepted next to a
+    glossary-specific one, so "Term | Description" qualifies but
+    "Name | Description" does not.
+    """
+    names = [str(cell or '').strip().lower() for cell in header]
+    term_col = next((i for i, name in enumerate(names) if name in TERM_HEADERS), None)
+    definition_col = next((i for i, name in enumerate(names) if name in DEFINITION_HEADERS), None)
+    if term_col is None and definition_col is None:
+        return None
+    if term_col is None:
+        term_col = next((i for i, name in enumerate(names) if name in WEAK_TERM_HEADERS), None)
+    if definition_col is None:
+        definition_col = next((i for i, name in enumerate(names) if name in WEAK_DEFINITION_HEADERS), None)
+    if term_col is None or definition_col is None or term_col == definition_col:
+        return None
+    return term_col, definition_col
+
+
+def iter_table_segments(rows: Iterable[Sequence], source: str = '') -> Iterator[Segment]:
+    """
+    Turn table rows into pipeline segments.
+
+    Glossary-shaped tables (a term column and a definition column) yield
+    {'term', 'definition'} dicts that skip NLP entirely. Other tables yield
+    compact "column: value; ..." lines, grouped ROWS_PER_SEGMENT at a time.
+    """
+    header = None
+    glossary = None
+    lines = []
+    row_count = 0
+    for row in rows:
+        cells = ['' if cell is None else str(cell).strip() for cell in row]
+        if not any(cells):
+            continue
+        if header is None:
+            header = cells
+            glossary = detect_glossary(header)
+            if glossary:
+                logger.info(f"Glossary layout detected in {source or 'table'}: {header[glossary[0]]} | {header[glossary[1]]}")
+            continue
+
+        row_count += 1
+        if glossary:
+            term_col, definition_col = glossary
+            term = cells[term_col] if term_col < len(cells) else ''
+            definition = cells[definition_col] if definition_col < len(cells) else ''
+            if term and definition:
+                yield {'term': term, 'definition': definition}
+            continue
+
+        line = "; ".join(f"{name}: {value}" if name else value
+                         for name, value in zip_longest(header, cells, fillvalue='') if value)
+        lines.append(line if line.endswith('.') else f"{line}.")
+        if len(lines) >= ROWS_PER_SEGMENT:
+            yield "\n".join(lines)
+            lines = []
+
+    if lines:
+        yield "\n".join(lines)
+    logger.info(f"Processed {row_count} rows from {source or 'table'}")
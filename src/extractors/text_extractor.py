@@ -1,12 +1,16 @@
 import os
 import logging
-from PIL import Image
-from pypdf import PdfReader
-from docx import Document
-from pptx import Presentation
-import pandas as pd
-import pytesseract
-from typing import Optional
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from src.utils.metrics import get_metrics
+from src.utils.pools import cpu_count, get_process_pool
+# Format libraries (pypdf, python-docx, python-pptx, PIL, pytesseract) are
+# imported the first time a file of their type is seen, so starting the
+# server or a worker does not pay for all of them
+from src.extractors.structured import (
+    PPTX_WORKERS, Block, blocks_to_segments, iter_docx_blocks, iter_pptx_blocks
+)
+from src.extractors.tabular import Segment, iter_csv_rows, iter_table_segments, iter_xlsx_sheets
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -16,8 +20,72 @@ formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(messag
 handler.setFormatter(formatter)
 logger.addHandler(handler)
 
-# Configure Tesseract path
-pytesseract.pytesseract.tesseract_cmd = '/opt/homebrew/bin/tesseract'
+# Page-parallel PDF extraction settings
+PDF_WORKERS = int(os.environ.get('SAGEAI_PDF_WORKERS', cpu_count()))
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get('SAGEAI_PDF_PARALLEL_MIN_PAGES', 24))
+PDF_MAX_PAGES_PER_TASK = 32
+# OCR the embedded images of PDF pages that have no text layer (scanned documents)
+PDF_OCR_FALLBACK = os.environ.get('SAGEAI_PDF_OCR_FALLBACK', '1') != '0'
+
+
+# OCR engines of this process by thread count (0 for the SAGEAI_OCR_WORKERS default)
+_ocr_engines: Dict[int, Any] = {}
+
+
+def _ocr_engine(workers: Optional[int] = None):
+    """OCR engine shared by every image and scanned page this process reads."""
+    from src.extractors.ocr_engine import OCREngine
+    engine = _ocr_engines.get(workers or 0)
+    if engine is None:
+        engine = _ocr_engines[workers or 0] = OCREngine(workers) if workers else OCREngine()
+    return engine
+
+
+def _pdf_page_text(page, index: int, ocr_workers: Optional[int] = None) -> str:
+    """
+    Text of a PDF page, falling back to OCR of its images for scanned pages.
+
+    ocr_workers is the number of tesseract threads (default SAGEAI_OCR_WORKERS);
+    page-parallel workers pass 1.
+    """
+    text = page.extract_text() or ""
+    if text.strip() or not PDF_OCR_FALLBACK:
+        return text
+    try:
+        images = [image.image for image in page.images]
+    except Exception as e:
+        logger.warning(f"Could not read images on page {index + 1}: {str(e)}")
+        return text
+    if not images:
+        return text
+    # Resolution of each scan follows from its pixel width over the page width (72pt/inch)
+    page_inches = float(page.mediabox.width) / 72
+    dpis = [img.width / page_inches if page_inches else None for img in images]
+    engine = _ocr_engine(ocr_workers)
+    ocr_text = "\n".join(engine.ocr_pages(images, dpis))
+    seconds = sum(timing['seconds'] for timing in engine.last_timings)
+    logger.info(f"OCR fallback for page {index + 1}: {len(images)} image(s) in {seconds:.2f}s")
+    return ocr_text
+
+
+def pdf_page_count(filepath: str) -> int:
+    """Number of pages in a PDF, read from its page tree without extracting text."""
+    from pypdf import PdfReader
+    return len(PdfReader(filepath).pages)
+
+
+def _extract_pdf_range(filepath: str, start: int, stop: int) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Extract the text of pages [start, stop) in a pool worker.
+
+    Scanned pages are OCR'd on a single thread, since every worker of the
+    pool is already busy. The worker's metrics (OCR timings) are returned
+    with the text for the parent to merge.
+    """
+    from pypdf import PdfReader
+    reader = PdfReader(filepath)
+    texts = [_pdf_page_text(reader.pages[i], i, ocr_workers=1) for i in range(start, stop)]
+    return texts, get_metrics().snapshot(reset=True)
 
 class TextExtractor:
     """Class to handle text extraction from various file formats."""
@@ -69,31 +137,134 @@ class TextExtractor:
             logger.error(f"Extraction error: {str(e)}", exc_info=True)
             return ""
 
+    def iter_extract(self, filepath: str, workers: Optional[int] = None) -> Iterator[Segment]:
+        """
+        Yield the text of a file in pieces as soon as each piece is available.
+
+        PDFs are yielded page by page, spreadsheets a block of rows at a time
+        and Word and PowerPoint files a group of structured blocks at a time;
+        images are yielded as a single piece. Glossary-shaped rows, tables and
+        bold-term paragraphs are yielded as ready-made {'term', 'definition'}
+        dicts that need no NLP. Unlike extract(), errors are raised to the caller.
+
+        Args:
+            filepath (str): Path to the file
+            workers (int): Processes for page- or slide-parallel extraction
+                (defaults to the per-format setting; 1 extracts serially and
+                OCRs on a single thread, for callers that are parallel already)
+
+        Yields:
+            Segment: The next piece of extracted text, or a term/definition dict
+        """
+        logger.info(f"Starting streaming text extraction from: {filepath}")
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"File not found: {filepath}")
+
+        extension = filepath.rsplit('.', 1)[1].lower()
+        if extension == 'pdf':
+            yield from self.iter_pdf_pages(filepath, workers or PDF_WORKERS)
+            return
+        if extension in ('xlsx', 'csv'):
+            yield from self.iter_tabular(filepath)
+            return
+        if extension in ('docx', 'pptx'):
+            yield from blocks_to_segments(self.iter_blocks(filepath, workers))
+            return
+
+        if extension in ('jpeg', 'jpg', 'png'):
+            yield self._extract_from_image(filepath, ocr_workers=1 if workers == 1 else None)
+            return
+
+        extractor = self.extractors.get(extension)
+        if not extractor:
+            raise ValueError(f"No extractor available for .{extension} files")
+        yield extractor(filepath)
+
     def _extract_from_pdf(self, filepath: str) -> str:
         """Extract text from PDF files."""
         logger.info(f"Extracting text from PDF: {filepath}")
-        text = ""
         try:
-            with open(filepath, 'rb') as file:
-                reader = PdfReader(file)
-                logger.info(f"PDF has {len(reader.pages)} pages")
-                for i, page in enumerate(reader.pages):
-                    logger.debug(f"Processing page {i+1}")
-                    page_text = page.extract_text()
-                    text += page_text + "\n"
-            return text.strip()
+            return "\n".join(self.iter_pdf_pages(filepath)).strip()
         except Exception as e:
             logger.error(f"PDF extraction error: {str(e)}", exc_info=True)
             raise
 
+    def iter_pdf_pages(self, filepath: str, workers: int = PDF_WORKERS,
+                       start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        """
+        Yield the text of each PDF page in order as soon as it is extracted.
+
+        Large documents are split into page ranges that a process pool extracts
+        in parallel. Only a bounded number of ranges are in flight at once, so
+        memory stays flat however long the document is.
+
+        Args:
+            filepath (str): Path to the PDF
+            workers (int): Pool size; 1 extracts serially in this process and
+                OCRs scanned pages on a single thread
+            start (int): First page to extract
+            stop (int): Page to stop before (defaults to the end of the document)
+
+        Yields:
+            str: Text of the next page (empty string for pages without text)
+        """
+        from pypdf import PdfReader
+        reader = PdfReader(filepath)
+        stop = len(reader.pages) if stop is None else min(stop, len(reader.pages))
+        logger.info(f"PDF has {len(reader.pages)} pages, extracting {start + 1}-{stop}")
+
+        if workers <= 1 or stop - start < PDF_PARALLEL_MIN_PAGES:
+            ocr_workers = 1 if workers <= 1 else None
+            for i in range(start, stop):
+                logger.debug(f"Processing page {i+1}")
+                yield _pdf_page_text(reader.pages[i], i, ocr_workers)
+            return
+
+        # Workers open their own reader, so drop ours before fanning out
+        del reader
+        pages_per_task = max(1, min(PDF_MAX_PAGES_PER_TASK, (stop - start) // (workers * 4) or 1))
+        ranges = deque((first, min(first + pages_per_task, stop))
+                       for first in range(start, stop, pages_per_task))
+        pool = get_process_pool('pdf', workers)
+        metrics = get_metrics()
+        in_flight = deque()
+        try:
+            while ranges or in_flight:
+                while ranges and len(in_flight) < workers * 2:
+                    first, last = ranges.popleft()
+                    in_flight.append(pool.submit(_extract_pdf_range, filepath, first, last))
+                page_texts, worker_metrics = in_flight.popleft().result()
+                metrics.merge(worker_metrics)
+                for page_text in page_texts:
+                    yield page_text
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def iter_blocks(self, filepath: str, workers: Optional[int] = None) -> Iterator[Block]:
+        """
+        Yield the typed blocks of a DOCX or PPTX file with their source location.
+
+        Blocks are headings, paragraphs, bullets, table text, speaker notes,
+        headers, footers and footnotes; glossary-style ones also carry a term
+        and definition. Large decks are walked slide-parallel.
+
+        Args:
+            filepath (str): Path to the file
+            workers (int): Processes for slide-parallel PPTX extraction
+        """
+        extension = filepath.rsplit('.', 1)[1].lower()
+        if extension == 'docx':
+            return iter_docx_blocks(filepath)
+        if extension == 'pptx':
+            return iter_pptx_blocks(filepath, workers or PPTX_WORKERS)
+        raise ValueError(f"No structured extractor available for .{extension} files")
+
     def _extract_from_docx(self, filepath: str) -> str:
         """Extract text from DOCX files."""
         logger.info(f"Extracting text from DOCX: {filepath}")
         try:
-            doc = Document(filepath)
-            text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-            logger.info(f"Extracted {len(doc.paragraphs)} paragraphs")
-            return text.strip()
+            return "\n".join(block['text'] for block in iter_docx_blocks(filepath)).strip()
         except Exception as e:
             logger.error(f"DOCX extraction error: {str(e)}", exc_info=True)
             raise
@@ -102,15 +273,7 @@ class TextExtractor:
         """Extract text from PPTX files."""
         logger.info(f"Extracting text from PPTX: {filepath}")
         try:
-            prs = Presentation(filepath)
-            text = []
-            logger.info(f"Processing {len(prs.slides)} slides")
-            for i, slide in enumerate(prs.slides):
-                logger.debug(f"Processing slide {i+1}")
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        text.append(shape.text)
-            return "\n".join(text).strip()
+            return "\n".join(block['text'] for block in iter_pptx_blocks(filepath)).strip()
         except Exception as e:
             logger.error(f"PPTX extraction error: {str(e)}", exc_info=True)
             raise
@@ -119,23 +282,37 @@ class TextExtractor:
         """Extract text from Excel files (XLSX/CSV)."""
         logger.info(f"Extracting text from Excel/CSV: {filepath}")
         try:
-            if filepath.endswith('.xlsx'):
-                df = pd.read_excel(filepath)
-            else:
-                df = pd.read_csv(filepath)
-            logger.info(f"Processed {len(df)} rows and {len(df.columns)} columns")
-            return df.to_string()
+            return "\n".join(
+                f"{segment['term']}: {segment['definition']}" if isinstance(segment, dict) else segment
+                for segment in self.iter_tabular(filepath)
+            )
         except Exception as e:
             logger.error(f"Excel/CSV extraction error: {str(e)}", exc_info=True)
             raise
 
-    def _extract_from_image(self, filepath: str) -> str:
+    def iter_tabular(self, filepath: str) -> Iterator[Segment]:
+        """
+        Stream every sheet of an XLSX file, or a CSV file, as compact row text.
+
+        Rows are read one at a time (openpyxl read-only mode, csv.reader), so
+        memory stays bounded for very large spreadsheets.
+        """
+        if filepath.lower().endswith('.xlsx'):
+            for sheet_name, rows in iter_xlsx_sheets(filepath):
+                yield from iter_table_segments(rows, source=f"sheet '{sheet_name}'")
+        else:
+            yield from iter_table_segments(iter_csv_rows(filepath), source=os.path.basename(filepath))
+
+    def _extract_from_image(self, filepath: str, ocr_workers: Optional[int] = None) -> str:
         """Extract text from images using OCR."""
         logger.info(f"Extracting text from image using OCR: {filepath}")
         try:
+            from PIL import Image
             with Image.open(filepath) as img:
                 logger.debug(f"Image size: {img.size}")
-                text = pytesseract.image_to_string(img)
+                engine = _ocr_engine(ocr_workers)
+                text = engine.ocr_image(img)
+                logger.info(f"OCR timings: {engine.last_timings}")
                 if not text.strip():
                     logger.warning("No text detected in image")
                 return text.strip()
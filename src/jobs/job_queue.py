@@ -0,0 +1,451 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import queue
+import logging
+import threading
+import traceback
+import multiprocessing
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get('SAGEAI_JOB_WORKERS', 1))
+JOB_QUEUE_SIZE = int(os.environ.get('SAGEAI_JOB_QUEUE_SIZE', 16))
+# Finished jobs kept in memory; older ones are still served from their status files
+JOB_HISTORY = 1000
+# How often the collector checks that every worker process is still alive
+WORKER_CHECK_SECONDS = 1.0
+# Longest job id a worker can report through its shared current-job slot
+JOB_ID_MAX_LENGTH = 128
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+def _worker_loop(tasks, events, target: Callable, warm_up: bool, current=None) -> None:
+    """
+    Pull tasks until a None sentinel arrives, reporting progress as events.
+
+    The id of the job being run is also kept in current, a shared-memory
+    slot the parent can still read if this process is killed before its
+    events are delivered.
+    """
+    from src.utils.model_registry import get_registry
+    models = get_registry()
+    metrics = get_metrics()
+    if warm_up:
+        models.warm_up()
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        job_id = task['job_id']
+        if current is not None:
+            current.value = job_id.encode()
+        events.put(('running', job_id, {'worker': os.getpid()}))
+
+        def report(stage: str, **fields: Any) -> None:
+            events.put(('progress', job_id, dict(fields, stage=stage)))
+
+        try:
+            result = target(task, report)
+            events.put(('done', job_id, result))
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}", exc_info=True)
+            events.put(('failed', job_id, {'error': str(e), 'traceback': traceback.format_exc()}))
+        if current is not None:
+            current.value = b''
+        events.put(('models', None, {'worker': os.getpid(), 'stats': models.stats()}))
+        # Hand this job's metrics to the web process, which serves /metrics
+        events.put(('metrics', None, metrics.snapshot(reset=True)))
+
+
+def _is_alive(pid: Optional[int]) -> bool:
+    """True if a process with this pid is still running."""
+    if not pid or pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """
+    In-process job queue backed by a pool of worker processes.
+
+    Submitted tasks go onto a bounded multiprocessing queue; workers run the
+    target function and send status events back, which a collector thread
+    applies to the job table and persists as one JSON file per job so any
+    web process can answer status requests. Workers also send their metrics
+    after every job, which are merged into this process's metrics. With
+    workers=0 the loop runs in a
+    thread of the current process, which is handy for local testing.
+
+    Dedup keys are also claimed with a file in the job directory, so web
+    processes sharing it (gunicorn workers) run one job per key between
+    them rather than one each.
+
+    The collector also watches the worker processes: when one dies (OOM
+    kill, crash in native code) the job it was running is marked failed,
+    its dedup key is released and a replacement worker is started.
+    """
+
+    def __init__(self, job_dir: str, target: Callable[[Dict[str, Any], Callable], Dict[str, Any]],
+                 workers: int = JOB_WORKERS, max_pending: int = JOB_QUEUE_SIZE, warm_up: bool = True):
+        self.job_dir = job_dir
+        self.target = target
+        self.workers = workers
+        self.max_pending = max_pending
+        self.warm_up = warm_up
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._model_stats: Dict[int, Dict[str, Any]] = {}
+        self._inflight: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._workers: List[Any] = []
+        self._current: List[Any] = []
+        self._stopping = False
+        self._collector: Optional[threading.Thread] = None
+        self._tasks = None
+        self._events = None
+        os.makedirs(job_dir, exist_ok=True)
+
+    def start(self) -> None:
+        """Start the workers and the event collector (idempotent)."""
+        with self._lock:
+            if self._collector is not None:
+                return
+            if self.workers > 0:
+                self._tasks = multiprocessing.Queue()
+                self._events = multiprocessing.Queue()
+                for i in range(self.workers):
+                    self._workers.append(None)
+                    self._current.append(None)
+                    self._start_worker(i)
+            else:
+                self._tasks = queue.Queue()
+                self._events = queue.Queue()
+                worker = threading.Thread(
+                    target=_worker_loop,
+                    args=(self._tasks, self._events, self.target, self.warm_up),
+                    name='job-worker',
+                    daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+            self._collector = threading.Thread(target=self._collect, name='job-collector', daemon=True)
+            self._collector.start()
+            logger.info(f"Job queue started with {max(self.workers, 1)} worker(s)")
+        self._recover()
+
+    def submit(self, task: Dict[str, Any], job_id: Optional[str] = None,
+               dedup_key: Optional[str] = None) -> Tuple[str, bool]:
+        """
+        Enqueue a task and return its job id.
+
+        Tasks submitted with the dedup_key of a job that is still queued or
+        running are not queued again; the caller gets the in-flight job instead.
+
+        Returns:
+            Tuple[str, bool]: (job_id, created) where created is False for a joined job
+
+        Raises:
+            QueueFullError: If max_pending jobs are already queued or running
+        """
+        self.start()
+        job_id = job_id or uuid.uuid4().hex
+        with self._lock:
+            if dedup_key and dedup_key in self._inflight:
+                return self._inflight[dedup_key], False
+            if self._pending() >= self.max_pending:
+                raise QueueFullError(f"Job queue is full ({self.max_pending} pending jobs)")
+            if dedup_key:
+                holder = self._claim_dedup_key(dedup_key, job_id)
+                if holder is not None:
+                    return holder, False
+            now = time.time()
+            job = {
+                'id': job_id,
+                'status': 'queued',
+                'filename': task.get('filename'),
+                'progress': {},
+                'result': None,
+                'error': None,
+                'task': task,
+                'owner': os.getpid(),
+                'dedup_key': dedup_key,
+                'created': now,
+                'updated': now
+            }
+            self._jobs[job_id] = job
+            if dedup_key:
+                self._inflight[dedup_key] = job_id
+            self._persist(job)
+        self._tasks.put(dict(task, job_id=job_id))
+        return job_id, True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the job status, falling back to its status file."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job = json.loads(json.dumps(job))
+        if job is None:
+            job = self._load(job_id)
+        if job is not None:
+            # The task holds server-side paths that clients don't need
+            job.pop('task', None)
+        return job
+
+    def model_stats(self) -> Dict[int, Dict[str, Any]]:
+        """Latest model registry stats reported by each worker, keyed by pid."""
+        with self._lock:
+            return dict(self._model_stats)
+
+    def pending(self) -> int:
+        """Number of jobs that are queued or running."""
+        with self._lock:
+            return self._pending()
+
+    def _pending(self) -> int:
+        # Caller holds self._lock; the collector prunes the job table under it
+        return sum(1 for job in self._jobs.values() if job['status'] in ('queued', 'running'))
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Ask the workers to exit once the queue drains and wait for them."""
+        if self._tasks is None:
+            return
+        with self._lock:
+            self._stopping = True
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def _start_worker(self, index: int) -> None:
+        current = multiprocessing.Array('c', JOB_ID_MAX_LENGTH)
+        worker = multiprocessing.Process(
+            target=_worker_loop,
+            args=(self._tasks, self._events, self.target, self.warm_up, current),
+            name=f'job-worker-{index}'
+        )
+        worker.start()
+        self._workers[index] = worker
+        self._current[index] = current
+
+    def _collect(self) -> None:
+        last_check = time.monotonic()
+        while True:
+            if time.monotonic() - last_check >= WORKER_CHECK_SECONDS:
+                self._check_workers()
+                last_check = time.monotonic()
+            try:
+                kind, job_id, payload = self._events.get(timeout=WORKER_CHECK_SECONDS)
+            except queue.Empty:
+                continue
+            with self._lock:
+                if kind == 'models':
+                    self._model_stats[payload['worker']] = payload['stats']
+                    continue
+                if kind == 'metrics':
+                    get_metrics().merge(payload)
+                    continue
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                # Late events of a job already failed because its worker died
+                if kind in ('running', 'progress') and job['status'] in ('done', 'failed'):
+                    continue
+                if kind == 'running':
+                    job['status'] = 'running'
+                    job['worker'] = payload.get('worker')
+                elif kind == 'progress':
+                    job['progress'].update(payload)
+                elif kind == 'done':
+                    job['status'] = 'done'
+                    job['result'] = payload
+                elif kind == 'failed':
+                    job['status'] = 'failed'
+                    job['error'] = payload.get('error')
+                    logger.debug(payload.get('traceback'))
+                job['updated'] = time.time()
+                self._persist(job)
+                if kind in ('done', 'failed'):
+                    self._release_dedup(job)
+                    self._release_claim(job_id)
+                    self._prune()
+
+    def _check_workers(self) -> None:
+        """Fail the job of every worker process that died and start a replacement."""
+        with self._lock:
+            if self.workers <= 0 or self._stopping:
+                return
+            for index, worker in enumerate(self._workers):
+                if worker is None or worker.exitcode is None:
+                    continue
+                job_id = self._current[index].value.decode()
+                logger.error(f"Job worker {worker.pid} exited with code {worker.exitcode}"
+                             + (f" while running job {job_id}" if job_id else ""))
+                job = self._jobs.get(job_id)
+                if job is not None and job['status'] in ('queued', 'running'):
+                    job.update(status='failed', updated=time.time(),
+                               error=f"Worker process exited unexpectedly (exit code {worker.exitcode})")
+                    self._persist(job)
+                    self._release_dedup(job)
+                    self._release_claim(job_id)
+                self._model_stats.pop(worker.pid, None)
+                get_metrics().inc('sageai_job_worker_restarts_total')
+                self._start_worker(index)
+
+    def _recover(self) -> None:
+        """
+        Requeue jobs left queued or running by a previous server process.
+
+        Their uploads are only removed once a job finishes, so an interrupted
+        job can be rerun and resumes from its pipeline checkpoint.
+        """
+        for name in os.listdir(self.job_dir):
+            if not name.endswith('.json'):
+                continue
+            job_id = name[:-len('.json')]
+            with self._lock:
+                if job_id in self._jobs:
+                    continue
+            job = self._load(job_id)
+            if not job or job['status'] not in ('queued', 'running') or _is_alive(job.get('owner')):
+                continue
+            # Several web processes may share the job directory; only one requeues a job
+            try:
+                claim = os.open(os.path.join(self.job_dir, f"{job_id}.recovered"), os.O_CREAT | os.O_EXCL)
+                os.close(claim)
+            except FileExistsError:
+                continue
+            task = job.get('task') or {}
+            if not task.get('filepath') or not os.path.exists(task['filepath']):
+                job.update(status='failed', error='Interrupted by a server restart', updated=time.time())
+                self._persist(job)
+                self._release_dedup(job)
+                continue
+            logger.info(f"Requeueing interrupted job {job_id}")
+            job.update(status='queued', owner=os.getpid(), updated=time.time())
+            with self._lock:
+                self._jobs[job_id] = job
+                if job.get('dedup_key'):
+                    self._inflight[job['dedup_key']] = job_id
+                    self._write_dedup_claim(job['dedup_key'], job_id)
+                self._persist(job)
+            self._tasks.put(dict(task, job_id=job_id))
+
+    def _claim_dedup_key(self, dedup_key: str, job_id: str) -> Optional[str]:
+        """
+        Claim dedup_key for job_id across every process sharing the job directory.
+
+        Returns:
+            Optional[str]: None once claimed, or the id of the live job that holds the key
+        """
+        path = self._dedup_path(dedup_key)
+        with open(os.path.join(self.job_dir, '.dedup.lock'), 'a') as guard:
+            # Serialises taking over stale claims, which O_EXCL alone can't do safely
+            fcntl.flock(guard, fcntl.LOCK_EX)
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                holder = self._live_holder(path)
+                if holder is not None:
+                    return holder
+                logger.info(f"Taking over stale claim on {dedup_key}")
+                self._write_dedup_claim(dedup_key, job_id)
+                return None
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump({'job_id': job_id, 'owner': os.getpid()}, file)
+        return None
+
+    def _live_holder(self, path: str) -> Optional[str]:
+        """Job id in a claim file if that job is still queued or running in a live process."""
+        try:
+            with open(path, encoding='utf-8') as file:
+                claim = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return None
+        job = self._load(claim.get('job_id', ''))
+        if not job or job['status'] not in ('queued', 'running'):
+            return None
+        # Jobs of this process that were left over from a previous one were recovered by start()
+        owner = job.get('owner')
+        if owner != os.getpid() and not _is_alive(owner):
+            return None
+        return claim['job_id']
+
+    def _write_dedup_claim(self, dedup_key: str, job_id: str) -> None:
+        path = self._dedup_path(dedup_key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'job_id': job_id, 'owner': os.getpid()}, file)
+        os.replace(tmp_path, path)
+
+    def _release_dedup(self, job: Dict[str, Any]) -> None:
+        """Let the next submission with this job's dedup key start a new job."""
+        dedup_key = job.get('dedup_key')
+        if not dedup_key:
+            return
+        if self._inflight.get(dedup_key) == job['id']:
+            del self._inflight[dedup_key]
+        path = self._dedup_path(dedup_key)
+        try:
+            with open(path, encoding='utf-8') as file:
+                claim = json.load(file)
+            if claim.get('job_id') == job['id']:
+                os.remove(path)
+        except (OSError, json.JSONDecodeError):
+            pass
+
+    def _dedup_path(self, dedup_key: str) -> str:
+        return os.path.join(self.job_dir, f"{os.path.basename(dedup_key)}.lock")
+
+    def _release_claim(self, job_id: str) -> None:
+        claim = os.path.join(self.job_dir, f"{job_id}.recovered")
+        if os.path.exists(claim):
+            os.remove(claim)
+
+    def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        path = self._status_path(job_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Failed to read job {job_id}: {str(e)}")
+            return None
+
+    def _prune(self) -> None:
+        finished = [job for job in self._jobs.values() if job['status'] in ('done', 'failed')]
+        if len(finished) <= JOB_HISTORY:
+            return
+        finished.sort(key=lambda job: job['updated'])
+        for job in finished[:len(finished) - JOB_HISTORY]:
+            del self._jobs[job['id']]
+
+    def _status_path(self, job_id: str) -> str:
+        return os.path.join(self.job_dir, f"{os.path.basename(job_id)}.json")
+
+    def _persist(self, job: Dict[str, Any]) -> None:
+        path = self._status_path(job['id'])
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(job, file)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Failed to persist job {job['id']}: {str(e)}")
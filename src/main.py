@@ -1,23 +1,50 @@
 import os
 import sys
+import time
+
+# Process start, for the startup time reported on /models
+STARTED = time.perf_counter()
 import logging
+import threading
 from pathlib import Path
 
 project_root = str(Path(__file__).parent.parent)
 sys.path.append(project_root)
 
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, g, json, request, jsonify, render_template, send_file, url_for
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
 from werkzeug.utils import secure_filename
-from src.utils.file_validator import validate_file
-from src.extractors.text_extractor import TextExtractor
-from src.processors.nlp_processor import NLPProcessor
-from src.ai.simplifier import Simplifier
-from src.output.data_writer import DataWriter
+from src.output.data_writer import SINKS, iter_json_array
+from src.utils.result_store import ResultStore
+from src.utils.uploads import StreamingRequest
+from src.jobs.job_queue import JobQueue, QueueFullError
+from src.pipeline import run_job
+from src.utils.metrics import get_metrics
+from src.utils.model_registry import current_rss_mb
+from src.utils.profiler import SamplingProfiler
+
+# Allow clients to profile individual requests with ?profile=1
+PROFILING_ENABLED = os.environ.get('SAGEAI_PROFILING', '0') == '1'
+# Flask debug mode for the development server (python src/main.py)
+DEBUG = os.environ.get('SAGEAI_DEBUG', '0') == '1'
 
 # Initialize Flask app
 app = Flask(__name__, 
    template_folder=os.path.join(project_root, 'templates'),
    static_folder=os.path.join(project_root, 'static'))
+# Stream uploads to disk instead of spooling them through temporary files
+app.request_class = StreamingRequest
+
+metrics = get_metrics()
+
+def profiling_requested():
+    return PROFILING_ENABLED and request.args.get('profile') == '1'
+
+@app.before_request
+def before_request():
+    g.request_start = time.perf_counter()
+    if profiling_requested():
+        g.profiler = SamplingProfiler(thread_ids=[threading.get_ident()], include_idle=True).start()
 
 # Add CORS headers
 @app.after_request
@@ -25,6 +52,19 @@ def after_request(response):
     response.headers.add('Access-Control-Allow-Origin', '*')
     response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
     response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
+
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.inc('sageai_http_requests_total', endpoint=endpoint, status=response.status_code)
+    if 'request_start' in g:
+        metrics.observe('sageai_http_request_seconds', time.perf_counter() - g.request_start, endpoint=endpoint)
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+        body = response.get_json(silent=True) if response.is_json else None
+        if isinstance(body, dict):
+            body['request_profile'] = profiler.summary()
+            response.set_data(json.dumps(body))
     return response
 
 # Configure logging
@@ -41,10 +81,49 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 250 * 1024 * 1024  # 250MB max-length
 
+OUTPUT_FOLDER = os.path.join(project_root, 'output')
+results = ResultStore(OUTPUT_FOLDER)
+
+# Uploads are processed by a pool of worker processes, each of which loads
+# the models once and reuses them for every job it runs
+jobs = JobQueue(os.path.join(project_root, 'jobs'), target=run_job)
+
+@app.errorhandler(UnsupportedMediaType)
+def unsupported_file(error):
+    app.logger.error(f"File validation failed: {error.description}")
+    return jsonify({'error': error.description}), 400
+
+@app.errorhandler(RequestEntityTooLarge)
+def file_too_large(error):
+    limit = app.config['MAX_CONTENT_LENGTH'] / 1024 / 1024
+    return jsonify({'error': f"File exceeds limit of {limit:.0f}MB"}), 413
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+# Set by mark_ready() once the process can serve; under src/wsgi.py this includes model preloading
+startup = {'seconds': None}
+
+def mark_ready():
+    startup['seconds'] = round(time.perf_counter() - STARTED, 3)
+    app.logger.info(f"Ready in {startup['seconds']}s, RSS {current_rss_mb():.1f}MB (pid {os.getpid()})")
+
+@app.route('/models', methods=['GET'])
+def model_stats():
+    return jsonify({
+        'workers': jobs.model_stats(),
+        'web': {'pid': os.getpid(), 'rss_mb': round(current_rss_mb(), 1), 'startup_seconds': startup['seconds']}
+    })
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    metrics.set('sageai_jobs_pending', jobs.pending())
+    metrics.set('sageai_process_rss_bytes', int(current_rss_mb() * 1024 * 1024))
+    if startup['seconds'] is not None:
+        metrics.set('sageai_startup_seconds', startup['seconds'])
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/upload', methods=['GET', 'POST', 'OPTIONS'])
 def upload_file():
     if request.method == 'OPTIONS':
@@ -53,9 +132,7 @@ def upload_file():
     if request.method == 'GET':
         return jsonify({'status': 'ready'})
 
-    app.logger.info(f"Upload request received - Method: {request.method}")
-    app.logger.info(f"Files: {request.files}")
-    app.logger.info(f"Form data: {request.form}")
+    app.logger.info("Upload request received")
 
     if 'file' not in request.files:
         app.logger.error("No file in request")
@@ -66,73 +143,103 @@ def upload_file():
         app.logger.error("Empty filename")
         return jsonify({'error': 'No file selected'}), 400
 
+    max_definitions = request.form.get('maxDefs', 100, type=int)
+    if max_definitions < 1:
+        app.logger.error(f"Invalid maxDefs: {max_definitions}")
+        return jsonify({'error': 'maxDefs must be at least 1'}), 400
+
+    # StreamingRequest wrote the body straight into UPLOAD_FOLDER while parsing,
+    # checking its signature and hashing it on the way
+    upload = file.stream
     try:
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        app.logger.info(f"Saving file to: {filepath}")
-        file.save(filepath)
-
-        # Validate file
-        app.logger.info("File saved successfully, validating...")
-        valid, message = validate_file(filepath)
-        if not valid:
-            app.logger.error(f"File validation failed: {message}")
-            return jsonify({'error': message}), 400
-
-        # Extract text
-        app.logger.info("File validated, extracting text...")
-        extractor = TextExtractor()
-        text = extractor.extract(filepath)
-        if not text:
-            app.logger.error("Text extraction failed")
-            raise ValueError("Text extraction failed")
-
-        # Process with NLP
-        app.logger.info("Processing text with NLP...")
-        processor = NLPProcessor()
-        terms_defs = processor.process_text(text)
-        
-        # Process with GPT4ALL
-        app.logger.info("Processing with AI simplifier...")
-        simplifier = Simplifier()
-        dataset = []
-        for item in terms_defs:
-            processed = simplifier.process_text(item['term'], item['definition'])
-            dataset.append(processed)
-
-        # Save output files
-        app.logger.info("Saving output files...")
-        output_dir = os.path.join(project_root, 'output')
-        os.makedirs(output_dir, exist_ok=True)
-
-        base_name = Path(filename).stem
-        csv_path = os.path.join(output_dir, f"{base_name}_dataset.csv")
-        json_path = os.path.join(output_dir, f"{base_name}_dataset.json")
-
-        writer = DataWriter()
-        csv_success = writer.save_csv(dataset, csv_path)
-        json_success = writer.save_json(dataset, json_path)
-
-        if not (csv_success and json_success):
-            raise ValueError("Failed to save output files")
-
-        app.logger.info("Processing complete!")
+        filepath = upload.path
+        doc_hash = upload.hexdigest()
+        upload.close()
+        app.logger.info(f"Upload stored at: {filepath}")
+
+        # Identical documents are answered from the result store
+        result = results.lookup(doc_hash, max_definitions)
+        if result is not None:
+            app.logger.info(f"Returning stored result for {doc_hash}")
+            metrics.inc('sageai_documents_total', status='cached')
+            return jsonify(dict(public_result(result), message='Processing complete', cached=True))
+
+        # Hand off to the worker pool; the worker removes the upload when done.
+        # Concurrent uploads of the same document share a single job.
+        job_id, created = jobs.submit({
+            'filepath': filepath,
+            'filename': filename,
+            'output_dir': OUTPUT_FOLDER,
+            'output_name': f"{Path(filename).stem}_{doc_hash[:12]}_{max_definitions}",
+            'max_definitions': max_definitions,
+            'doc_hash': doc_hash,
+            'profile': profiling_requested()
+        }, dedup_key=ResultStore.key(doc_hash, max_definitions))
+        if created:
+            upload.keep()
+            app.logger.info(f"Queued job {job_id} for {filename}")
+        else:
+            app.logger.info(f"Joined in-flight job {job_id} for {filename}")
         return jsonify({
-            'message': 'Processing complete',
-            'csv_path': csv_path,
-            'json_path': json_path,
-            'terms_processed': len(dataset)
-        })
+            'message': 'Processing queued',
+            'job_id': job_id,
+            'status_url': url_for('job_status', job_id=job_id)
+        }), 202
+
+    except QueueFullError as e:
+        app.logger.warning(str(e))
+        response = jsonify({'error': 'Server is busy, please retry shortly'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
 
     except Exception as e:
-        app.logger.error(f"Processing error: {str(e)}", exc_info=True)
+        app.logger.error(f"Upload error: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
-    finally:
-        if 'filepath' in locals() and os.path.exists(filepath):
-            os.remove(filepath)
-            app.logger.info(f"Cleaned up temporary file: {filepath}")
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.get('result'):
+        job['result'] = public_result(job['result'])
+    return jsonify(job)
+
+def public_result(result):
+    """Replace the server-side output paths of a finished dataset with download URLs."""
+    result = dict(result)
+    formats = list(result.pop('outputs', {}))
+    if 'jsonl' in formats:
+        formats.append('json')
+    if result.get('dataset'):
+        result['downloads'] = {
+            fmt: url_for('download_dataset', dataset=result['dataset'], fmt=fmt) for fmt in formats
+        }
+    return result
+
+@app.route('/datasets/<dataset>/<fmt>', methods=['GET'])
+def download_dataset(dataset, fmt):
+    result = results.get(dataset)
+    if result is None:
+        return jsonify({'error': 'Dataset not found'}), 404
+    outputs = result['outputs']
+    name = Path(outputs.get(fmt) or outputs.get('jsonl', '')).stem
+    if fmt in outputs:
+        # Sent in chunks straight from disk, with range and conditional request support
+        return send_file(outputs[fmt], mimetype=SINKS[fmt].mimetype, as_attachment=True,
+                         download_name=f"{name}.{fmt}", conditional=True)
+    if fmt == 'json' and 'jsonl' in outputs:
+        # The JSON array is rendered from the JSON-lines file one row at a time
+        response = Response(iter_json_array(outputs['jsonl']), mimetype='application/json')
+        response.headers['Content-Disposition'] = f'attachment; filename="{name}.json"'
+        return response
+    return jsonify({'error': f"Format '{fmt}' is not available for this dataset"}), 404
 
 if __name__ == '__main__':
+    # Development server; use gunicorn with gunicorn.conf.py in production
     app.logger.info(f"Server starting. Project root: {project_root}")
-    app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
+    jobs.start()
+    mark_ready()
+    # The reloader would import everything twice and restart the job workers on every edit
+    app.run(debug=DEBUG, use_reloader=False, threaded=True, host='0.0.0.0', port=5001)
\ No newline at end of file
@@ -1,50 +1,224 @@
+import os
 import csv
 import json
 import logging
-from pathlib import Path
-from typing import List, Dict
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional
 
-class DataWriter:
-    def __init__(self):
-        self.logger = logging.getLogger(__name__)
+logger = logging.getLogger(__name__)
+
+# Columns of every dataset row, in output order
+FIELDNAMES = ['term', 'complicated_text', 'simplified_definition', 'analogy', 'mind_map_prompt']
+
+# Formats written for each document; parquet needs pyarrow installed
+OUTPUT_FORMATS = [
+    fmt.strip() for fmt in os.environ.get('SAGEAI_OUTPUT_FORMATS', 'csv,jsonl').split(',') if fmt.strip()
+]
+# Rows buffered per Parquet row group
+PARQUET_ROW_GROUP = int(os.environ.get('SAGEAI_PARQUET_ROW_GROUP', '1024'))
+
+
+class DatasetSink:
+    """
+    Append-only writer for one output file.
+
+    Rows go to a temporary file next to the destination and the file is
+    renamed into place by close(), so readers only ever see a complete
+    dataset. abort() discards the partial file instead. Each sink has its
+    own temporary file, so writers racing to the same destination never mix
+    rows; the last one to close wins.
+    """
+
+    extension = ''
+    mimetype = 'application/octet-stream'
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(path)}.", suffix='.tmp')
+        os.close(fd)
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._write({field: row.get(field, '') for field in FIELDNAMES})
+        self.rows += 1
+
+    def close(self) -> None:
+        self._finish()
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        try:
+            self._finish()
+        finally:
+            if os.path.exists(self.tmp_path):
+                os.remove(self.tmp_path)
+
+    def _write(self, row: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _finish(self) -> None:
+        raise NotImplementedError
+
+
+class _TextSink(DatasetSink):
+    """Line-oriented sink that flushes every row to the operating system."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.file = open(self.tmp_path, 'w', newline='', encoding='utf-8')
+
+    def _finish(self) -> None:
+        if not self.file.closed:
+            self.file.close()
+
+
+class CSVSink(_TextSink):
+    extension = 'csv'
+    mimetype = 'text/csv'
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.writer = csv.DictWriter(self.file, fieldnames=FIELDNAMES)
+        self.writer.writeheader()
+
+    def _write(self, row: Dict[str, Any]) -> None:
+        self.writer.writerow(row)
+        self.file.flush()
+
+
+class JSONLSink(_TextSink):
+    extension = 'jsonl'
+    mimetype = 'application/x-ndjson'
+
+    def _write(self, row: Dict[str, Any]) -> None:
+        self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.file.flush()
 
-    def save_csv(self, data: List[Dict], filepath: str) -> bool:
+
+class ParquetSink(DatasetSink):
+    """
+    Columnar sink backed by pyarrow.
+
+    Parquet stores columns per row group, so rows are buffered and written
+    PARQUET_ROW_GROUP at a time rather than one by one.
+    """
+
+    extension = 'parquet'
+    mimetype = 'application/vnd.apache.parquet'
+
+    def __init__(self, path: str, row_group: int = PARQUET_ROW_GROUP):
         try:
-            output_path = Path(filepath)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            fieldnames = ['term', 'complicated_text', 'simplified_definition', 'analogy', 'mind_map_prompt']
-            
-            with open(output_path, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.DictWriter(file, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(data)
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"CSV write error: {str(e)}")
-            return False
-
-    def save_json(self, data: List[Dict], filepath: str) -> bool:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)") from e
+
+        super().__init__(path)
+        self._pa = pa
+        self.row_group = row_group
+        self.schema = pa.schema([(field, pa.string()) for field in FIELDNAMES])
+        self.writer = pq.ParquetWriter(self.tmp_path, self.schema)
+        self.buffer: List[Dict[str, Any]] = []
+
+    def _write(self, row: Dict[str, Any]) -> None:
+        self.buffer.append(row)
+        if len(self.buffer) >= self.row_group:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self.buffer:
+            # Missing fields are written as empty strings, as the CSV writer does
+            columns = {field: ['' if row[field] is None else str(row[field]) for row in self.buffer]
+                       for field in FIELDNAMES}
+            self.writer.write_table(self._pa.Table.from_pydict(columns, schema=self.schema))
+            self.buffer = []
+
+    def _finish(self) -> None:
+        if self.writer is not None:
+            try:
+                self._flush()
+            finally:
+                self.writer.close()
+                self.writer = None
+
+
+SINKS = {sink.extension: sink for sink in (CSVSink, JSONLSink, ParquetSink)}
+
+
+def output_paths(output_dir: str, base_name: str, formats: Optional[List[str]] = None) -> Dict[str, str]:
+    """Destination of each output format for a dataset."""
+    formats = formats or OUTPUT_FORMATS
+    unknown = [fmt for fmt in formats if fmt not in SINKS]
+    if unknown:
+        raise ValueError(f"Unknown output formats: {', '.join(unknown)}")
+    return {fmt: os.path.join(output_dir, f"{base_name}_dataset.{fmt}") for fmt in formats}
+
+
+class DataWriter:
+    """
+    Writes dataset rows to every output format as they are produced.
+
+    Use as a context manager: on a clean exit every file is renamed into
+    place, and if the block raises all partial files are removed.
+    """
+
+    def __init__(self, paths: Dict[str, str]):
+        self.sinks: List[DatasetSink] = []
         try:
-            output_path = Path(filepath)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            formatted_data = []
-            for item in data:
-                formatted_item = {
-                    "term": item["term"],
-                    "complicated_text": item["complicated_text"],
-                    "simplified_definition": item["simplified_definition"],
-                    "analogy": item["analogy"],
-                    "mind_map_prompt": item["mind_map_prompt"]
-                }
-                formatted_data.append(formatted_item)
-                
-            with open(output_path, 'w', encoding='utf-8') as file:
-                json.dump(formatted_data, file, indent=2, ensure_ascii=False)
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"JSON write error: {str(e)}")
-            return False
\ No newline at end of file
+            for fmt, path in paths.items():
+                self.sinks.append(SINKS[fmt](path))
+        except Exception:
+            self.abort()
+            raise
+
+    @property
+    def rows(self) -> int:
+        return self.sinks[0].rows if self.sinks else 0
+
+    def write(self, row: Dict[str, Any]) -> None:
+        for sink in self.sinks:
+            sink.write(row)
+
+    def close(self) -> None:
+        """Rename every file into place; if one sink fails, discard the files not yet renamed."""
+        for i, sink in enumerate(self.sinks):
+            try:
+                sink.close()
+            except Exception:
+                for remaining in self.sinks[i:]:
+                    try:
+                        remaining.abort()
+                    except Exception as e:
+                        logger.error(f"Failed to discard {remaining.tmp_path}: {str(e)}")
+                raise
+
+    def abort(self) -> None:
+        for sink in self.sinks:
+            try:
+                sink.abort()
+            except Exception as e:
+                logger.error(f"Failed to discard {sink.tmp_path}: {str(e)}")
+
+    def __enter__(self) -> 'DataWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def iter_json_array(jsonl_path: str) -> Iterator[str]:
+    """Render a JSON-lines dataset as a JSON array, one row at a time."""
+    yield "["
+    separator = "\n  "
+    with open(jsonl_path, encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                yield separator + line
+                separator = ",\n  "
+    yield "\n]\n"
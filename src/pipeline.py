@@ -0,0 +1,265 @@
+import os
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from src.utils.model_registry import get_registry
+from src.output.data_writer import DataWriter, output_paths
+from src.extractors.tabular import segment_chars
+from src.processors.term_clusters import TermClusters
+from src.utils.checkpoint import Checkpoint, file_hash
+from src.utils.metrics import TimedIterator, get_metrics
+from src.utils.profiler import SamplingProfiler
+from src.utils.streams import batches, threaded
+from src.utils.result_store import ResultStore
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[..., None]
+
+# Items buffered between pipeline stages
+PAGE_BUFFER = 8
+TERM_BUFFER = 64
+ROW_BUFFER = 64
+
+
+def no_progress(stage: str, **fields: Any) -> None:
+    pass
+
+
+def run_pipeline(filepath: str, output_dir: str, max_definitions: int = 100,
+                 output_name: Optional[str] = None,
+                 progress: ProgressCallback = no_progress,
+                 doc_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run extraction, NLP and simplification for one file and write the dataset.
+
+    The stages run concurrently in their own threads: pages flow into spaCy as
+    they are extracted, terms flow into the simplifier as they are found and
+    rows are appended to every output format as soon as they are simplified.
+    Bounded buffers between the stages keep memory flat on large uploads, and
+    the output files are only renamed into place once they are complete.
+
+    Each stage checkpoints its output under the document's content hash, so a
+    rerun of the same document reuses extracted text, the term list and every
+    row simplified before the previous run stopped. Runs of the same document
+    take turns: each holds the checkpoint's lock until its outputs are written.
+
+    Before simplification, terms are grouped into clusters of near-duplicates
+    (same lemma and overlapping definitions, or near-identical definitions).
+    Only the first term of each cluster is sent to the model, and the other
+    members reuse its answer.
+
+    Busy time per stage (excluding time spent waiting on the previous stage)
+    and page, character, sentence and term counts are recorded in the
+    process metrics.
+
+    Args:
+        filepath (str): Path to the uploaded file
+        output_dir (str): Directory the dataset files are written to
+        max_definitions (int): Maximum number of terms to extract
+        output_name (str): Base name for output files (defaults to the file stem)
+        progress (callable): Called as progress(stage, **counters) as work advances
+        doc_hash (str): Content hash of the file, computed if not given
+
+    Returns:
+        Dict[str, Any]: outputs (path per format) and terms_processed
+    """
+    from src.ai.simplifier import BATCH_SIZE
+
+    models = get_registry()
+    metrics = get_metrics()
+    started = time.perf_counter()
+    counts = {'pages': 0, 'characters': 0, 'terms_found': 0, 'terms_simplified': 0}
+    # Seconds each stage spent working; stages skipped on resume stay None
+    timings: Dict[str, Optional[float]] = {'extract': None, 'nlp': None, 'simplify': None, 'write': None}
+    checkpoint = Checkpoint(doc_hash or file_hash(filepath))
+
+    def extract_stage() -> Iterator[Union[str, Dict[str, str]]]:
+        timings['extract'] = 0.0
+        resumed = checkpoint.has_text()
+        if resumed:
+            logger.info(f"Resuming from checkpointed text for {checkpoint.doc_hash}")
+            pages = checkpoint.iter_text()
+        else:
+            checkpoint.reset_text()
+            pages = models.get('extractor').iter_extract(filepath)
+        pages = TimedIterator(pages)
+        try:
+            for page in pages:
+                if not resumed:
+                    checkpoint.append_page(page)
+                characters = segment_chars(page)
+                counts['pages'] += 1
+                counts['characters'] += characters
+                metrics.inc('sageai_pages_total')
+                metrics.inc('sageai_characters_total', characters)
+                # Updated as it goes: the stage may be left suspended once NLP has enough terms
+                timings['extract'] = pages.seconds
+                progress('extracting', pages=counts['pages'], characters=counts['characters'])
+                yield page
+        finally:
+            pages.close()
+        if not counts['characters']:
+            raise ValueError("Text extraction failed")
+        checkpoint.finish_text()
+
+    def nlp_stage(pages: Iterator[Union[str, Dict[str, str]]]) -> Iterator[Dict[str, str]]:
+        checkpoint.reset_terms()
+        with models.borrow('nlp') as processor:
+            pages = TimedIterator(pages)
+            found = TimedIterator(processor.iter_terms(pages, max_definitions=max_definitions))
+            try:
+                for term in found:
+                    checkpoint.append_term(term)
+                    counts['terms_found'] += 1
+                    metrics.inc('sageai_terms_total')
+                    progress('analyzing', terms_found=counts['terms_found'])
+                    yield term
+            finally:
+                found.close()
+                timings['nlp'] = max(found.seconds - pages.seconds, 0.0)
+                metrics.inc('sageai_sentences_total', processor.last_stats.get('sentences', 0))
+        checkpoint.finish_terms(max_definitions, counts['terms_found'])
+
+    def simplify_stage(terms: Iterator[Dict[str, str]]) -> Iterator[dict]:
+        done = checkpoint.completed_rows()
+        if done:
+            logger.info(f"Resuming with {len(done)} rows already simplified")
+        timings['simplify'] = 0.0
+        # Near-duplicate terms share one generation instead of three each
+        clusters = TermClusters()
+        with models.borrow('simplifier') as simplifier:
+            for batch in batches(terms, BATCH_SIZE):
+                pending = [item for item in batch if (item['term'], item['definition']) not in done]
+                batch_start = time.perf_counter()
+                clustered = clusters.counts['clusters']
+                simplified = clusters.simplify(pending, simplifier.process_batch) if pending else []
+                timings['simplify'] += time.perf_counter() - batch_start
+                metrics.inc('sageai_terms_clustered_total', len(pending) - (clusters.counts['clusters'] - clustered))
+                for row in simplified:
+                    checkpoint.append_row(row)
+                    done[(row['term'], row['complicated_text'])] = row
+                for item in batch:
+                    yield done[(item['term'], item['definition'])]
+                counts['terms_simplified'] += len(batch)
+                progress('simplifying', terms_found=counts['terms_found'],
+                         terms_simplified=counts['terms_simplified'])
+        logger.info(f"Term clustering: {clusters.summary()}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    base_name = output_name or Path(filepath).stem
+    paths = output_paths(output_dir, base_name)
+
+    stop = threading.Event()
+    stages: List[threading.Thread] = []
+    # Held for the whole run: other runs of this document share the checkpoint files
+    with checkpoint:
+        if checkpoint.has_terms(max_definitions):
+            # The term list survived a previous run, so extraction and NLP are skipped
+            stored = checkpoint.load_terms(max_definitions)
+            logger.info(f"Resuming from {len(stored)} checkpointed terms for {checkpoint.doc_hash}")
+            counts['terms_found'] = len(stored)
+            terms = iter(stored)
+        else:
+            pages = threaded(extract_stage(), PAGE_BUFFER, stop, 'extract', stages)
+            terms = threaded(nlp_stage(pages), TERM_BUFFER, stop, 'nlp', stages)
+        rows = TimedIterator(threaded(simplify_stage(terms), ROW_BUFFER, stop, 'simplify', stages))
+
+        write_start = time.perf_counter()
+        try:
+            with DataWriter(paths) as writer:
+                for row in rows:
+                    if not writer.rows:
+                        logger.info(f"First row ready after {time.perf_counter() - started:.2f}s")
+                    writer.write(row)
+            timings['write'] = time.perf_counter() - write_start - rows.seconds
+        finally:
+            stop.set()
+            # Stages still running (after an error or an early stop) append to the
+            # checkpoint until they see stop, so wait for them while holding its lock
+            for stage in stages:
+                stage.join()
+            _record_timings(timings)
+        progress('writing', terms_simplified=writer.rows,
+                 stage_seconds={stage: round(seconds, 3) for stage, seconds in timings.items() if seconds is not None})
+        checkpoint.clear()
+
+    return {
+        'outputs': paths,
+        'terms_processed': writer.rows
+    }
+
+
+def _record_timings(timings: Dict[str, Optional[float]]) -> None:
+    """Observe the busy time of every stage that ran."""
+    metrics = get_metrics()
+    for stage, seconds in timings.items():
+        if seconds is not None:
+            metrics.observe('sageai_stage_seconds', seconds, stage=stage)
+    logger.info("Stage busy time: " + ", ".join(
+        f"{stage} {seconds:.2f}s" for stage, seconds in timings.items() if seconds is not None
+    ))
+
+
+def run_job(task: Dict[str, Any], progress: ProgressCallback) -> Dict[str, Any]:
+    """
+    Job queue entry point: run the pipeline for a task and remove its upload.
+
+    Results are recorded in the output directory's ResultStore under the
+    document hash, and a task whose document was already processed (for
+    example by another web process) returns the stored result directly.
+
+    Tasks with 'profile' set run under the sampling profiler; the busiest
+    functions are added to the result and the folded stacks are written
+    next to the outputs.
+    """
+    filepath = task['filepath']
+    max_definitions = task.get('max_definitions', 100)
+    metrics = get_metrics()
+    profiler = SamplingProfiler().start() if task.get('profile') else None
+    try:
+        doc_hash = task.get('doc_hash') or file_hash(filepath)
+        store = ResultStore(task['output_dir'])
+        result = store.lookup(doc_hash, max_definitions)
+        if result is not None:
+            logger.info(f"Reusing stored result for {doc_hash}")
+            metrics.inc('sageai_documents_total', status='reused')
+            return result
+        result = run_pipeline(
+            filepath,
+            task['output_dir'],
+            max_definitions=max_definitions,
+            output_name=task.get('output_name'),
+            progress=progress,
+            doc_hash=doc_hash
+        )
+        result['dataset'] = ResultStore.key(doc_hash, max_definitions)
+        store.save(doc_hash, max_definitions, result)
+        metrics.inc('sageai_documents_total', status='done')
+        if profiler:
+            # Kept out of the stored result, which later uploads are answered from
+            result = dict(result, profile=_save_profile(profiler, task))
+        return result
+    except Exception:
+        metrics.inc('sageai_documents_total', status='failed')
+        raise
+    finally:
+        if profiler:
+            profiler.stop()
+        if os.path.exists(filepath):
+            os.remove(filepath)
+            logger.info(f"Cleaned up temporary file: {filepath}")
+
+
+def _save_profile(profiler: SamplingProfiler, task: Dict[str, Any]) -> Dict[str, Any]:
+    """Stop the profiler, write its folded stacks and return a summary."""
+    profiler.stop()
+    profile_dir = os.path.join(task['output_dir'], 'profiles')
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, f"{task.get('job_id') or task.get('output_name') or 'job'}.folded")
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(profiler.folded())
+    return dict(profiler.summary(), folded_path=path)
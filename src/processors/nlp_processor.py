@@ -1,51 +1,262 @@
 # src/processors/nlp_processor.py
+import os
 import spacy
+from spacy.matcher import DependencyMatcher
 import re
-from typing import List, Dict
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Union
 import logging
 from tqdm import tqdm
 
+# Definition extraction only needs the parser, tagger and lemmatizer
+EXCLUDED_COMPONENTS = ["ner", "entity_ruler", "entity_linker", "textcat", "textcat_multilabel", "spancat"]
+
+NLP_PROCESSES = int(os.environ.get('SAGEAI_NLP_PROCESSES', 1))
+NLP_BATCH_SIZE = int(os.environ.get('SAGEAI_NLP_BATCH_SIZE', 32))
+# Upper bound on the text handed to spaCy as one Doc
+SEGMENT_CHARS = 20000
+SENTENCE_END = re.compile(r'[.!?]["\')\]]*\s+')
+
+# Definitional statements as dependency patterns. Every pattern names a
+# 'term' node and a 'definition' node whose subtree is the definition.
+DEFINITION_PATTERNS = {
+   # "A cell is the basic unit of life"
+   "copula": [
+       {"RIGHT_ID": "verb", "RIGHT_ATTRS": {"LEMMA": "be"}},
+       {"LEFT_ID": "verb", "REL_OP": ">", "RIGHT_ID": "term", "RIGHT_ATTRS": {"DEP": "nsubj"}},
+       {"LEFT_ID": "verb", "REL_OP": ">", "RIGHT_ID": "definition", "RIGHT_ATTRS": {"DEP": "attr"}}
+   ],
+   # "Osmosis is defined as the movement of water ..."
+   "defined_as": [
+       {"RIGHT_ID": "verb", "RIGHT_ATTRS": {"LEMMA": {"IN": ["define", "describe", "know"]}}},
+       {"LEFT_ID": "verb", "REL_OP": ">", "RIGHT_ID": "term", "RIGHT_ATTRS": {"DEP": "nsubjpass"}},
+       {"LEFT_ID": "verb", "REL_OP": ">", "RIGHT_ID": "as", "RIGHT_ATTRS": {"DEP": "prep", "LOWER": "as"}},
+       {"LEFT_ID": "as", "REL_OP": ">", "RIGHT_ID": "definition", "RIGHT_ATTRS": {"DEP": "pobj"}}
+   ],
+   # "Entropy refers to the degree of disorder ..."
+   "refers_to": [
+       {"RIGHT_ID": "verb", "RIGHT_ATTRS": {"LEMMA": "refer"}},
+       {"LEFT_ID": "verb", "REL_OP": ">", "RIGHT_ID": "term", "RIGHT_ATTRS": {"DEP": "nsubj"}},
+       {"LEFT_ID": "verb", "REL_OP": ">", "RIGHT_ID": "to", "RIGHT_ATTRS": {"DEP": "prep", "LOWER": "to"}},
+       {"LEFT_ID": "to", "REL_OP": ">", "RIGHT_ID": "definition", "RIGHT_ATTRS": {"DEP": "pobj"}}
+   ],
+   # "Photosynthesis means converting light into chemical energy"
+   "means": [
+       {"RIGHT_ID": "verb", "RIGHT_ATTRS": {"LEMMA": {"IN": ["mean", "denote"]}}},
+       {"LEFT_ID": "verb", "REL_OP": ">", "RIGHT_ID": "term", "RIGHT_ATTRS": {"DEP": "nsubj"}},
+       {"LEFT_ID": "verb", "REL_OP": ">", "RIGHT_ID": "definition", "RIGHT_ATTRS": {"DEP": {"IN": ["dobj", "ccomp", "xcomp"]}}}
+   ],
+   # "Mitochondria, which are the powerhouse of the cell, ..."
+   "which_is": [
+       {"RIGHT_ID": "term", "RIGHT_ATTRS": {"POS": {"IN": ["NOUN", "PROPN"]}}},
+       {"LEFT_ID": "term", "REL_OP": ">", "RIGHT_ID": "verb", "RIGHT_ATTRS": {"DEP": "relcl", "LEMMA": "be"}},
+       {"LEFT_ID": "verb", "REL_OP": ">", "RIGHT_ID": "definition", "RIGHT_ATTRS": {"DEP": "attr"}}
+   ],
+   # "DNA, a molecule that carries genetic information, ..."
+   "appositive": [
+       {"RIGHT_ID": "term", "RIGHT_ATTRS": {"POS": {"IN": ["NOUN", "PROPN"]}}},
+       {"LEFT_ID": "term", "REL_OP": ">", "RIGHT_ID": "definition", "RIGHT_ATTRS": {"DEP": "appos"}}
+   ]
+}
+APPOSITIVE_MIN_TOKENS = 3
+# Position of the term and definition nodes within each pattern's match
+PATTERN_ROLES = {
+   name: {node["RIGHT_ID"]: i for i, node in enumerate(pattern) if node["RIGHT_ID"] in ("term", "definition")}
+   for name, pattern in DEFINITION_PATTERNS.items()
+}
+
 class NLPProcessor:
-   def __init__(self, model: str = "en_core_web_sm"):
-       try:
-           self.nlp = spacy.load(model)
-           self.nlp.max_length = 2000000  # Increase max length
-       except OSError:
-           import subprocess
-           subprocess.run(["python", "-m", "spacy", "download", model])
-           self.nlp = spacy.load(model)
+   def __init__(self, model: str = "en_core_web_sm", n_process: int = NLP_PROCESSES,
+                batch_size: int = NLP_BATCH_SIZE, nlp=None):
+       self.n_process = n_process
+       self.batch_size = batch_size
+       self.last_stats = {}
+       if nlp is not None:
+           # Ready-made pipeline (e.g. spacy.blank in tests); model is not loaded
+           self.nlp = nlp
+       else:
+           try:
+               self.nlp = spacy.load(model, exclude=EXCLUDED_COMPONENTS)
+           except OSError:
+               import subprocess
+               subprocess.run(["python", "-m", "spacy", "download", model])
+               self.nlp = spacy.load(model, exclude=EXCLUDED_COMPONENTS)
+       self.nlp.max_length = 2000000  # Increase max length
+
+       self.matcher = DependencyMatcher(self.nlp.vocab)
+       for name, pattern in DEFINITION_PATTERNS.items():
+           self.matcher.add(name, [pattern])
 
    def process_text(self, text: str, max_definitions: int = 100) -> List[Dict[str, str]]:
        try:
-           # Process text in chunks
-           chunk_size = 100000
-           terms_definitions = []
-           
-           for i in range(0, len(text), chunk_size):
-               chunk = text[i:i+chunk_size]
-               doc = self.nlp(chunk)
-               
-               for sent in doc.sents:
-                   if len(terms_definitions) >= max_definitions:
-                       return terms_definitions[:max_definitions]
-                       
-                   terms = self._extract_terms(sent)
-                   terms_definitions.extend(terms)
-                   
-           return terms_definitions[:max_definitions]
+           return list(self.iter_terms([text], max_definitions=max_definitions))
            
        except Exception as e:
            logging.error(f"NLP processing error: {str(e)}")
            return []
+
+   def iter_terms(self, segments: Iterable[Union[str, Dict[str, str]]],
+                  max_definitions: int = 100) -> Iterator[Dict[str, str]]:
+       """
+       Yield term/definition pairs from a stream of text segments (e.g. PDF pages).
+
+       Incoming text is re-cut on paragraph and sentence boundaries, so
+       sentences split across pages are parsed whole, and streamed through
+       nlp.pipe in batches (across n_process processes when configured).
+       Segments that are already {'term', 'definition'} dicts (e.g. glossary
+       table rows) are passed straight through without parsing.
+       """
+       stats = {'words': 0, 'segments': 0, 'sentences': 0, 'terms': 0}
+       start = time.perf_counter()
+       direct = deque()
+       index = TermIndex()
+
+       def counted(texts: Iterator[Union[str, Dict[str, str]]]) -> Iterator[str]:
+           for text in texts:
+               if isinstance(text, dict):
+                   if index.add(text['term']):
+                       direct.append(text)
+                   # Stop reading input once enough ready-made terms are queued
+                   if stats['terms'] + len(direct) >= max_definitions:
+                       return
+                   continue
+               stats['words'] += len(text.split())
+               stats['segments'] += 1
+               yield text
+
+       docs = self.nlp.pipe(
+           counted(self._split_segments(segments)),
+           batch_size=self.batch_size,
+           n_process=self.n_process
+       )
+
+       def found_terms(doc=None) -> Iterator[Dict[str, str]]:
+           while direct:
+               yield direct.popleft()
+           if doc is not None:
+               yield from self._extract_terms(doc, index)
+
+       try:
+           for doc in docs:
+               stats['sentences'] += sum(1 for _ in doc.sents)
+               for term in found_terms(doc):
+                   yield term
+                   stats['terms'] += 1
+                   if stats['terms'] >= max_definitions:
+                       return
+           for term in found_terms():
+               yield term
+               stats['terms'] += 1
+               if stats['terms'] >= max_definitions:
+                   return
+       finally:
+           elapsed = time.perf_counter() - start
+           stats['seconds'] = round(elapsed, 3)
+           stats['words_per_sec'] = round(stats['words'] / elapsed, 1) if elapsed else 0.0
+           self.last_stats = stats
+           logging.info(
+               f"NLP processed {stats['words']} words ({stats['sentences']} sentences) in {stats['segments']} segments "
+               f"at {stats['words_per_sec']} words/sec"
+           )
+
+   def _split_segments(self, segments: Iterable[Union[str, Dict[str, str]]]) -> Iterator[Union[str, Dict[str, str]]]:
+       """Re-cut a text stream into pieces of at most SEGMENT_CHARS ending on a boundary."""
+       buffer = ""
+       for segment in segments:
+           if isinstance(segment, dict):
+               yield segment
+               continue
+           buffer = f"{buffer}\n{segment}" if buffer else segment
+           while len(buffer) > SEGMENT_CHARS:
+               cut = self._boundary(buffer, SEGMENT_CHARS) or SEGMENT_CHARS
+               yield buffer[:cut]
+               buffer = buffer[cut:]
+           # Hand over everything up to the last complete sentence right away
+           cut = self._boundary(buffer, len(buffer))
+           if cut:
+               yield buffer[:cut]
+               buffer = buffer[cut:]
+       if buffer.strip():
+           yield buffer
+
+   def _boundary(self, text: str, limit: int) -> int:
+       """Offset just past the last paragraph break, else sentence end, within text[:limit]."""
+       window = text[:limit]
+       paragraph = window.rfind("\n\n")
+       if paragraph > 0:
+           return paragraph + 2
+       sentence_end = None
+       for sentence_end in SENTENCE_END.finditer(window):
+           pass
+       if sentence_end:
+           return sentence_end.end()
+       if limit < len(text):
+           # No boundary at all: fall back to the last whitespace
+           space = window.rfind(" ")
+           return space + 1 if space > 0 else limit
+       return 0
            
-   def _extract_terms(self, doc) -> List[Dict[str, str]]:
+   def _extract_terms(self, doc, index: "TermIndex") -> List[Dict[str, str]]:
+       """
+       Find definitional statements in a Doc with the compiled dependency patterns.
+
+       Terms are whole noun chunks (without leading determiners), definitions
+       are the full subtree of the defining phrase, and terms already present
+       in the document's index are skipped. The index compares surface forms,
+       so inflected variants ("cells", "cell") are kept with a shared lemma
+       key and left to TermClusters, which answers them with one generation.
+       """
+       matches = self.matcher(doc)
+       if not matches:
+           return []
+       chunks = {token.i: chunk for chunk in doc.noun_chunks for token in chunk}
+
        terms = []
-       for token in doc:
-           if token.dep_ == "nsubj" and token.head.lemma_ in ["be", "mean", "refer"]:
-               definition_tokens = [t for t in token.head.children if t.dep_ == "attr"]
-               if definition_tokens:
-                   terms.append({
-                       "term": token.text,
-                       "definition": " ".join(t.text for t in definition_tokens)
-                   })
-       return terms
\ No newline at end of file
+       for match_id, token_ids in sorted(matches, key=lambda match: match[1][0]):
+           roles = PATTERN_ROLES[self.nlp.vocab.strings[match_id]]
+           term_token = doc[token_ids[roles['term']]]
+           definition_token = doc[token_ids[roles['definition']]]
+           if term_token.pos_ == "PRON" or definition_token.pos_ == "PRON":
+               continue
+
+           term_tokens = [t for t in (chunks.get(term_token.i) or [term_token])
+                          if t.dep_ not in ("det", "poss") and not t.is_punct]
+           if not term_tokens:
+               continue
+           term = "".join(t.text_with_ws for t in term_tokens).strip()
+           lemma = " ".join(t.lemma_.lower() for t in term_tokens)
+           definition_span = doc[definition_token.left_edge.i:definition_token.right_edge.i + 1]
+           # Short appositives are usually names or labels ("my friend, John"), not definitions
+           if len(definition_span) < APPOSITIVE_MIN_TOKENS and self.nlp.vocab.strings[match_id] == "appositive":
+               continue
+           definition = definition_span.text.strip(" ,;:")
+           if definition and index.add(term):
+               terms.append({
+                   "term": term,
+                   "definition": definition,
+                   # Lets the simplify stage cluster inflected forms of the same term
+                   "lemma": lemma
+               })
+       return terms
+
+
+class TermIndex:
+   """
+   Terms seen so far in a document, used to drop repeat definitions.
+
+   Terms are compared case- and whitespace-insensitively but not by lemma;
+   merging inflected forms is TermClusters' job, which keeps every variant
+   and fans one generation out to them.
+   """
+
+   def __init__(self):
+       self._keys = set()
+
+   def add(self, key: str) -> bool:
+       """Record a term key; False if it was already present."""
+       key = re.sub(r"\s+", " ", key.strip().lower())
+       if not key or key in self._keys:
+           return False
+       self._keys.add(key)
+       return True
\ No newline at end of file
@@ -0,0 +1,176 @@
+import os
+import re
+import zlib
+import random
+from typing import Callable, Dict, List, Set, Tuple
+
+# Definitions at least this similar (word-pair Jaccard) are the same concept
+# when their terms share a lemma key...
+CLUSTER_THRESHOLD = float(os.environ.get('SAGEAI_CLUSTER_THRESHOLD', 0.5))
+# ...or when the definitions are near-identical and the terms are spelled
+# alike (letter-trigram Jaccard), e.g. "mitochondria" and "mitochondrion".
+# Analogies and mind maps name the term, so unrelated terms never share them.
+NEAR_DUPLICATE_THRESHOLD = 0.85
+TERM_SPELLING_THRESHOLD = 0.5
+# MinHash signature length and LSH banding: 16 bands of 4 rows find pairs
+# from a Jaccard similarity of about (1/16)^(1/4) = 0.5 with high probability
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+
+MERSENNE_PRIME = (1 << 61) - 1
+WORD = re.compile(r"[a-z0-9]+")
+ARTICLES = {'a', 'an', 'the'}
+
+
+def light_lemma(term: str) -> str:
+    """
+    Lowercased term without articles and with plural endings removed.
+
+    Stands in for spaCy lemmas on terms that were not parsed, such as
+    glossary rows read straight from a spreadsheet.
+    """
+    words = [word for word in WORD.findall(term.lower()) if word not in ARTICLES]
+    if words:
+        words[-1] = _singular(words[-1])
+    return " ".join(words)
+
+
+def _singular(word: str) -> str:
+    if len(word) <= 3 or word.endswith(('ss', 'us', 'is')):
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith(('ches', 'shes', 'xes', 'sses')):
+        return word[:-2]
+    if word.endswith('s'):
+        return word[:-1]
+    return word
+
+
+def shingles(text: str) -> Set[int]:
+    """Hashes of the word pairs of a text (single words for one-word texts), ignoring articles and plurals."""
+    words = [_singular(word) for word in WORD.findall(text.lower()) if word not in ARTICLES]
+    grams = [" ".join(words[i:i + 2]) for i in range(len(words) - 1)] or words
+    return {zlib.crc32(gram.encode('utf-8')) for gram in grams}
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def jaccard(a: Set, b: Set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MinHashLSH:
+    """
+    Locality-sensitive index of shingle sets for near-duplicate lookup.
+
+    Each set is summarised by a MinHash signature that is cut into bands;
+    sets sharing any band bucket are returned as candidates, so a query
+    costs a few dictionary lookups instead of a comparison with every
+    stored set. Permutations come from a fixed seed, so runs are repeatable.
+    """
+
+    def __init__(self, permutations: int = MINHASH_PERMUTATIONS, bands: int = LSH_BANDS, seed: int = 1):
+        rng = random.Random(seed)
+        self._params = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+                        for _ in range(permutations)]
+        self.rows = permutations // bands
+        self.bands = bands
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+
+    def signature(self, hashes: Set[int]) -> List[int]:
+        return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self._params]
+
+    def _band_keys(self, signature: List[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [(band, tuple(signature[band * self.rows:(band + 1) * self.rows])) for band in range(self.bands)]
+
+    def add(self, key: int, signature: List[int]) -> None:
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, []).append(key)
+
+    def candidates(self, signature: List[int]) -> Set[int]:
+        found = set()
+        for band_key in self._band_keys(signature):
+            found.update(self._buckets.get(band_key, ()))
+        return found
+
+
+class TermClusters:
+    """
+    Groups term/definition pairs that describe the same concept.
+
+    A pair joins an existing cluster when its term has the same lemma key
+    as the cluster's representative and the definitions overlap by at least
+    CLUSTER_THRESHOLD, or when the definitions are near-identical and the
+    terms are spelled alike. NLPProcessor only drops exact repeats of a term,
+    so inflected variants from parsed text and from glossary rows both end
+    up here. Candidates come from the lemma key and from a MinHash LSH
+    index of the definitions, and are confirmed with exact Jaccard
+    similarity. Clusters are only ever added to, so assignments made
+    earlier in a stream never change.
+    """
+
+    def __init__(self, threshold: float = CLUSTER_THRESHOLD):
+        self.threshold = threshold
+        self._index = MinHashLSH()
+        self._by_lemma: Dict[str, List[int]] = {}
+        self._shingles: List[Set[int]] = []
+        self._spellings: List[Set[str]] = []
+        self._rows: Dict[int, dict] = {}
+        self.counts = {'terms': 0, 'clusters': 0}
+
+    def assign(self, item: Dict[str, str]) -> Tuple[int, bool]:
+        """Return the cluster id for a term and whether it started a new cluster."""
+        self.counts['terms'] += 1
+        lemma = item.get('lemma') or light_lemma(item['term'])
+        hashes = shingles(item['definition'])
+        signature = self._index.signature(hashes) if hashes else None
+        best, best_score = None, 0.0
+        for cluster in self._by_lemma.get(lemma, []):
+            score = jaccard(hashes, self._shingles[cluster])
+            if score >= self.threshold and score > best_score:
+                best, best_score = cluster, score
+        spelling = trigrams(lemma)
+        for cluster in self._index.candidates(signature) if signature else ():
+            score = jaccard(hashes, self._shingles[cluster])
+            if (score >= NEAR_DUPLICATE_THRESHOLD and score > best_score
+                    and jaccard(spelling, self._spellings[cluster]) >= TERM_SPELLING_THRESHOLD):
+                best, best_score = cluster, score
+        if best is not None:
+            return best, False
+
+        cluster = len(self._shingles)
+        self._shingles.append(hashes)
+        self._spellings.append(spelling)
+        self._by_lemma.setdefault(lemma, []).append(cluster)
+        if signature:
+            self._index.add(cluster, signature)
+        self.counts['clusters'] += 1
+        return cluster, True
+
+    def simplify(self, items: List[Dict[str, str]],
+                 process: Callable[[List[Dict[str, str]]], List[dict]]) -> List[dict]:
+        """
+        Rows for items, calling process() only for the first term of each new cluster.
+
+        The other members get a copy of their representative's generated
+        fields under their own term and definition.
+        """
+        assigned = [self.assign(item) for item in items]
+        new = [(cluster, item) for item, (cluster, created) in zip(items, assigned) if created]
+        if new:
+            for (cluster, _), row in zip(new, process([item for _, item in new])):
+                self._rows[cluster] = row
+        return [
+            dict(self._rows[cluster], term=item['term'], complicated_text=item['definition'])
+            for item, (cluster, _) in zip(items, assigned)
+        ]
+
+    def summary(self) -> str:
+        terms, clusters = self.counts['terms'], self.counts['clusters']
+        return f"{terms} terms in {clusters} clusters ({terms - clusters} answered from a representative)"
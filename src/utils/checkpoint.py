@@ -0,0 +1,177 @@
+import os
+import json
+import fcntl
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_DIR = os.environ.get(
+    'SAGEAI_CHECKPOINT_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'checkpoints')
+)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_hash(filepath: str) -> str:
+    """SHA-256 of a file's contents, read in chunks."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """
+    Per-document progress stored under the document's content hash.
+
+    Extracted pages, the term list and every simplified row are appended to
+    JSON-lines files as they are produced, so a retried or resubmitted
+    document picks up where the previous run stopped.
+
+    Runs of the same document (another maxDefs, another job worker or web
+    process) share the checkpoint, so a run holds an exclusive lock on it
+    from acquire() to release(); use it as a context manager. A run that
+    waited for the lock resumes from whatever the previous holder left.
+    """
+
+    def __init__(self, doc_hash: str, root: str = CHECKPOINT_DIR):
+        self.doc_hash = doc_hash
+        self.path = os.path.join(root, doc_hash)
+        self.lock_path = f"{self.path}.lock"
+        self._lock = threading.Lock()
+        self._lock_file = None
+        os.makedirs(root, exist_ok=True)
+
+    def acquire(self) -> 'Checkpoint':
+        """Wait for the document's lock, which is held until release()."""
+        while self._lock_file is None:
+            lock_file = open(self.lock_path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.info(f"Waiting for another run of {self.doc_hash} to release its checkpoint")
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # clear() unlinks the lock file, so the one we waited on may be gone
+            try:
+                current = os.stat(self.lock_path)
+            except FileNotFoundError:
+                current = None
+            if current is not None and os.path.samestat(current, os.fstat(lock_file.fileno())):
+                self._lock_file = lock_file
+            else:
+                lock_file.close()
+        os.makedirs(self.path, exist_ok=True)
+        return self
+
+    def release(self) -> None:
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def __enter__(self) -> 'Checkpoint':
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+    # Extracted text
+
+    def has_text(self) -> bool:
+        return os.path.exists(self._file('pages.done'))
+
+    def iter_text(self) -> Iterator[Union[str, Dict[str, str]]]:
+        for record in self._read_lines('pages.jsonl'):
+            yield record['text']
+
+    def reset_text(self) -> None:
+        self._remove('pages.jsonl', 'pages.done')
+
+    def append_page(self, text: Union[str, Dict[str, str]]) -> None:
+        self._append('pages.jsonl', {'text': text})
+
+    def finish_text(self) -> None:
+        self._write_marker('pages.done', {})
+
+    # Terms from NLPProcessor
+
+    def has_terms(self, max_definitions: int) -> bool:
+        """True if a finished term list covers max_definitions terms."""
+        marker = self._read_marker('terms.done')
+        if marker is None:
+            return False
+        # A list cut short by its limit only covers requests up to that limit
+        return marker['exhausted'] or marker['max_definitions'] >= max_definitions
+
+    def load_terms(self, max_definitions: int) -> List[Dict[str, str]]:
+        return list(self._read_lines('terms.jsonl'))[:max_definitions]
+
+    def reset_terms(self) -> None:
+        self._remove('terms.jsonl', 'terms.done')
+
+    def append_term(self, term: Dict[str, str]) -> None:
+        self._append('terms.jsonl', term)
+
+    def finish_terms(self, max_definitions: int, count: int) -> None:
+        self._write_marker('terms.done', {
+            'max_definitions': max_definitions,
+            'exhausted': count < max_definitions
+        })
+
+    # Simplified rows
+
+    def completed_rows(self) -> Dict[Tuple[str, str], dict]:
+        """Rows finished by earlier runs, keyed by (term, complicated_text)."""
+        return {(row['term'], row['complicated_text']): row for row in self._read_lines('rows.jsonl')}
+
+    def append_row(self, row: dict) -> None:
+        self._append('rows.jsonl', row)
+
+    def clear(self) -> None:
+        """Remove the checkpoint once the document's outputs are written; call while holding the lock."""
+        shutil.rmtree(self.path, ignore_errors=True)
+        if self._lock_file is not None and os.path.exists(self.lock_path):
+            os.remove(self.lock_path)
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _append(self, name: str, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            with open(self._file(name), 'a', encoding='utf-8') as file:
+                file.write(line + '\n')
+                file.flush()
+
+    def _read_lines(self, name: str) -> Iterator[dict]:
+        path = self._file(name)
+        if not os.path.exists(path):
+            return
+        with open(path, encoding='utf-8') as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be half-written if the process died mid-append
+                    logger.warning(f"Skipping corrupt checkpoint line in {path}")
+
+    def _write_marker(self, name: str, data: dict) -> None:
+        with open(self._file(name), 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+
+    def _read_marker(self, name: str) -> Optional[dict]:
+        path = self._file(name)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+
+    def _remove(self, *names: str) -> None:
+        for name in names:
+            if os.path.exists(self._file(name)):
+                os.remove(self._file(name))
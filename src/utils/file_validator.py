@@ -17,6 +17,18 @@ ALLOWED_EXTENSIONS = {
 
 MAX_FILE_SIZE = 250 * 1024 * 1024  # 250MB
 
+# Leading bytes each file type must start with; Office formats are ZIP containers
+MAGIC_BYTES = {
+    'pdf': [b'%PDF-'],
+    'docx': [b'PK\x03\x04'],
+    'pptx': [b'PK\x03\x04'],
+    'xlsx': [b'PK\x03\x04'],
+    'png': [b'\x89PNG\r\n\x1a\n'],
+    'jpg': [b'\xff\xd8\xff'],
+    'jpeg': [b'\xff\xd8\xff'],
+}
+MAGIC_BYTES_NEEDED = 8
+
 def validate_file(filepath: str) -> Tuple[bool, str]:
     """
     Validate file type and size.
@@ -56,6 +68,12 @@ def validate_file(filepath: str) -> Tuple[bool, str]:
             error_msg = f"File type .{extension} not supported. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
             logger.error(error_msg)
             return False, error_msg
+
+        # Check file content matches its extension
+        with open(filepath, 'rb') as file:
+            valid, message = validate_magic_bytes(file.read(MAGIC_BYTES_NEEDED), extension)
+        if not valid:
+            return False, message
             
         logger.info(f"File validation successful for {filepath}")
         return True, "File validation successful"
@@ -63,4 +81,38 @@ def validate_file(filepath: str) -> Tuple[bool, str]:
     except Exception as e:
         error_msg = f"Validation error: {str(e)}"
         logger.error(error_msg, exc_info=True)
-        return False, error_msg
\ No newline at end of file
+        return False, error_msg
+
+def validate_magic_bytes(head: bytes, extension: str) -> Tuple[bool, str]:
+    """
+    Check the first bytes of a file against the signature its extension implies.
+
+    Args:
+        head (bytes): At least MAGIC_BYTES_NEEDED leading bytes (fewer for tiny files)
+        extension (str): File extension without the dot
+
+    Returns:
+        Tuple[bool, str]: (is_valid, message)
+    """
+    extension = extension.lower()
+    if extension not in ALLOWED_EXTENSIONS:
+        error_msg = f"File type .{extension} not supported. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
+        logger.error(error_msg)
+        return False, error_msg
+
+    if not head:
+        return False, "File is empty"
+
+    if extension == 'csv':
+        # No signature for CSV; reject obviously binary content instead
+        if b'\x00' in head:
+            error_msg = "File content is not valid CSV text"
+            logger.error(error_msg)
+            return False, error_msg
+        return True, "File validation successful"
+
+    if not any(head.startswith(magic) for magic in MAGIC_BYTES[extension]):
+        error_msg = f"File content does not match its .{extension} extension"
+        logger.error(error_msg)
+        return False, error_msg
+    return True, "File validation successful"
@@ -0,0 +1,216 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Histogram buckets (seconds) for stage and request timings
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Metrics:
+    """
+    Process-local counters, gauges and histograms in the Prometheus model.
+
+    Job workers record into their own process's instance and ship it to the
+    web process with snapshot(reset=True); merge() folds those deltas into
+    the web process's instance, which render() exposes on /metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {}
+        self._values: Dict[str, Dict[LabelKey, Any]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: Tuple[float, ...] = TIME_BUCKETS) -> None:
+        """Declare a metric; kind is 'counter', 'gauge' or 'histogram'."""
+        with self._lock:
+            self._meta[name] = (kind, help_text, tuple(buckets))
+            self._values.setdefault(name, {})
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[name][_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            buckets = self._meta[name][2]
+            series = self._values[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = {'buckets': [0] * len(buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram['buckets'][i] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels: str):
+        """Observe the duration of a with-block in the named histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self, reset: bool = False) -> Dict[str, List[Tuple[LabelKey, Any]]]:
+        """
+        Picklable copy of every counter and histogram (gauges are per process
+        and left out). With reset=True the copied values are zeroed, so
+        successive snapshots carry deltas.
+        """
+        with self._lock:
+            data = {}
+            for name, series in self._values.items():
+                if self._meta[name][0] == 'gauge' or not series:
+                    continue
+                data[name] = [(key, _copy(value)) for key, value in series.items()]
+                if reset:
+                    series.clear()
+            return data
+
+    def merge(self, snapshot: Dict[str, List[Tuple[LabelKey, Any]]]) -> None:
+        """Add a snapshot from another process to this instance."""
+        with self._lock:
+            for name, entries in snapshot.items():
+                if name not in self._meta:
+                    continue
+                series = self._values[name]
+                for key, value in entries:
+                    key = tuple(tuple(pair) for pair in key)
+                    current = series.get(key)
+                    if current is None:
+                        series[key] = _copy(value)
+                    elif isinstance(value, dict):
+                        current['buckets'] = [a + b for a, b in zip(current['buckets'], value['buckets'])]
+                        current['sum'] += value['sum']
+                        current['count'] += value['count']
+                    else:
+                        series[key] = current + value
+
+    def forget(self) -> None:
+        """
+        Drop every value after a fork. A forked child (job worker, extraction
+        pool worker) starts from zero: values inherited from the parent would
+        be shipped back in its snapshots and counted twice.
+        """
+        self._lock = threading.Lock()
+        for series in self._values.values():
+            series.clear()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, buckets) in sorted(self._meta.items()):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(self._values[name].items()):
+                    if kind != 'histogram':
+                        lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+                        continue
+                    for bound, count in zip(buckets, value['buckets']):
+                        lines.append(f"{name}_bucket{_format_labels(key + (('le', _format_value(bound)),))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(key + (('le', '+Inf'),))} {value['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(value['sum'])}")
+                    lines.append(f"{name}_count{_format_labels(key)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+
+class TimedIterator:
+    """Iterator wrapper that adds up the time spent waiting for each item."""
+
+    def __init__(self, items: Iterable):
+        self._items = iter(items)
+        self.seconds = 0.0
+
+    def __iter__(self) -> Iterator:
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            return next(self._items)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+    def close(self) -> None:
+        close = getattr(self._items, 'close', None)
+        if close:
+            close()
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _copy(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']}
+    return value
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in key)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """Return the process-wide metrics with the pipeline's metrics declared."""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+            _metrics.describe('sageai_stage_seconds', 'histogram', 'Busy time of each pipeline stage per document')
+            _metrics.describe('sageai_documents_total', 'counter', 'Documents processed, by outcome')
+            _metrics.describe('sageai_pages_total', 'counter', 'Pages or segments extracted')
+            _metrics.describe('sageai_characters_total', 'counter', 'Characters of text extracted')
+            _metrics.describe('sageai_ocr_pages_total', 'counter', 'Images and scanned PDF pages read with OCR')
+            _metrics.describe('sageai_ocr_tiles_total', 'counter', 'Image strips passed to tesseract')
+            _metrics.describe('sageai_ocr_page_seconds', 'histogram', 'OCR time per image or scanned PDF page')
+            _metrics.describe('sageai_sentences_total', 'counter', 'Sentences parsed by spaCy')
+            _metrics.describe('sageai_terms_total', 'counter', 'Terms found in documents')
+            _metrics.describe('sageai_terms_clustered_total', 'counter', "Terms answered from a near-duplicate term's generation")
+            _metrics.describe('sageai_generation_calls_total', 'counter', 'Model generation calls')
+            _metrics.describe('sageai_generated_tokens_total', 'counter', 'Tokens generated by the model')
+            _metrics.describe('sageai_generation_seconds', 'histogram', 'Duration of model generation calls')
+            _metrics.describe('sageai_generation_ttft_seconds', 'histogram', 'Time to first token of model generation calls')
+            _metrics.describe('sageai_cache_lookups_total', 'counter', 'Simplification cache lookups, by result')
+            _metrics.describe('sageai_http_requests_total', 'counter', 'HTTP requests, by endpoint and status')
+            _metrics.describe('sageai_http_request_seconds', 'histogram', 'HTTP request latency, by endpoint')
+            _metrics.describe('sageai_jobs_pending', 'gauge', 'Jobs queued or running')
+            _metrics.describe('sageai_job_worker_restarts_total', 'counter', 'Job workers replaced after exiting unexpectedly')
+            _metrics.describe('sageai_process_rss_bytes', 'gauge', 'Resident memory of the web process serving this scrape')
+            _metrics.describe('sageai_startup_seconds', 'gauge', 'Seconds from process start until the app was ready to serve')
+        return _metrics
+
+
+def _forget_after_fork() -> None:
+    global _metrics_lock
+    _metrics_lock = threading.Lock()
+    if _metrics is not None:
+        _metrics.forget()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_after_fork)
@@ -0,0 +1,213 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+MODEL_MEMORY_BUDGET_MB = int(os.environ.get('SAGEAI_MODEL_MEMORY_MB', 6144))
+
+
+def current_rss_mb() -> float:
+    """Return the resident set size of this process in MB (0.0 if unknown)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource
+            # ru_maxrss is KB on Linux and bytes on macOS; this is only a fallback
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        except Exception:
+            return 0.0
+
+
+class ModelRegistry:
+    """
+    Process-wide, thread-safe cache of loaded models.
+
+    Models are registered with a factory and an estimated size. The first
+    caller to ask for a model loads it; every later caller reuses the same
+    instance. When loading a model would exceed the memory budget, the least
+    recently used models that are not currently borrowed are evicted first.
+    """
+
+    def __init__(self, memory_budget_mb: int = MODEL_MEMORY_BUDGET_MB):
+        self.memory_budget_mb = memory_budget_mb
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._sizes: Dict[str, int] = {}
+        self._instances: "OrderedDict[str, Any]" = OrderedDict()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._borrowed: Dict[str, int] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[[], Any], size_mb: int = 0) -> None:
+        """Register a model factory under a name with its estimated size in MB."""
+        with self._lock:
+            self._factories[name] = factory
+            self._sizes[name] = size_mb
+            self._load_locks.setdefault(name, threading.Lock())
+            self._borrowed.setdefault(name, 0)
+            self._stats.setdefault(name, {
+                'loads': 0,
+                'hits': 0,
+                'evictions': 0,
+                'load_seconds': 0.0,
+                'rss_delta_mb': 0.0
+            })
+
+    def get(self, name: str) -> Any:
+        """Return the loaded instance for name, loading it on first use."""
+        return self._get(name, pin=False)
+
+    @contextmanager
+    def borrow(self, name: str):
+        """Borrow a model for the duration of a block so it cannot be evicted."""
+        instance = self._get(name, pin=True)
+        try:
+            yield instance
+        finally:
+            with self._lock:
+                self._borrowed[name] -= 1
+
+    def _get(self, name: str, pin: bool) -> Any:
+        """
+        Return the instance for name, loading it if needed. With pin=True the
+        borrow count is raised under the same lock the instance is handed out
+        under, so no eviction can slip in between.
+        """
+        with self._lock:
+            if name not in self._factories:
+                raise KeyError(f"No model registered under '{name}'")
+            if name in self._instances:
+                return self._hit(name, pin)
+            load_lock = self._load_locks[name]
+
+        # Only one thread loads a given model; the others wait and reuse it
+        with load_lock:
+            with self._lock:
+                if name in self._instances:
+                    return self._hit(name, pin)
+                self._make_room(name)
+
+            logger.info(f"Loading model '{name}'")
+            rss_before = current_rss_mb()
+            start = time.perf_counter()
+            instance = self._factories[name]()
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self._instances[name] = instance
+                if pin:
+                    self._borrowed[name] += 1
+                stats = self._stats[name]
+                stats['loads'] += 1
+                stats['load_seconds'] += elapsed
+                stats['rss_delta_mb'] = max(current_rss_mb() - rss_before, 0.0)
+            logger.info(f"Model '{name}' loaded in {elapsed:.2f}s")
+            return instance
+
+    def _hit(self, name: str, pin: bool) -> Any:
+        # Caller holds self._lock
+        self._instances.move_to_end(name)
+        self._stats[name]['hits'] += 1
+        if pin:
+            self._borrowed[name] += 1
+        return self._instances[name]
+
+    def warm_up(self, names: Optional[Iterable[str]] = None, background: bool = False) -> Optional[threading.Thread]:
+        """Load the given (or all registered) models ahead of the first request."""
+        names = list(names) if names is not None else list(self._factories)
+
+        def _load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    logger.error(f"Warm-up failed for model '{name}': {str(e)}", exc_info=True)
+
+        if background:
+            thread = threading.Thread(target=_load_all, name='model-warm-up', daemon=True)
+            thread.start()
+            return thread
+        _load_all()
+        return None
+
+    def evict(self, name: str) -> bool:
+        """Drop a loaded model so its memory can be reclaimed."""
+        with self._lock:
+            if name not in self._instances or self._borrowed.get(name):
+                return False
+            del self._instances[name]
+            self._stats[name]['evictions'] += 1
+        logger.info(f"Evicted model '{name}'")
+        return True
+
+    def loaded_mb(self) -> int:
+        """Estimated memory held by the currently loaded models."""
+        with self._lock:
+            return sum(self._sizes[name] for name in self._instances)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return load/reuse counters for every registered model."""
+        with self._lock:
+            return {
+                'memory_budget_mb': self.memory_budget_mb,
+                'loaded_mb': sum(self._sizes[name] for name in self._instances),
+                'models': {
+                    name: dict(stats, loaded=name in self._instances, size_mb=self._sizes[name])
+                    for name, stats in self._stats.items()
+                }
+            }
+
+    def _make_room(self, name: str) -> None:
+        """Evict idle models, oldest first, until name fits in the budget."""
+        needed = self._sizes[name]
+        for candidate in list(self._instances):
+            if self.loaded_mb() + needed <= self.memory_budget_mb:
+                return
+            if not self._borrowed.get(candidate):
+                self.evict(candidate)
+        if self.loaded_mb() + needed > self.memory_budget_mb:
+            logger.warning(
+                f"Loading '{name}' ({needed}MB) exceeds the model memory budget "
+                f"of {self.memory_budget_mb}MB; all loaded models are in use"
+            )
+
+
+def _load_extractor():
+    from src.extractors.text_extractor import TextExtractor
+    return TextExtractor()
+
+
+def _load_nlp_processor():
+    from src.processors.nlp_processor import NLPProcessor
+    return NLPProcessor()
+
+
+def _load_simplifier():
+    from src.ai.simplifier import Simplifier
+    return Simplifier()
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    """Return the process-wide registry with the pipeline models registered."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+            _registry.register('extractor', _load_extractor, size_mb=10)
+            _registry.register('nlp', _load_nlp_processor, size_mb=250)
+            # Only the in-process backend holds the language model in this process
+            from src.ai.backends import BACKEND
+            _registry.register('simplifier', _load_simplifier, size_mb=4000 if BACKEND == 'gpt4all' else 50)
+        return _registry
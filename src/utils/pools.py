@@ -0,0 +1,84 @@
+import os
+import atexit
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+_pools: Dict[str, Union[ProcessPoolExecutor, ThreadPoolExecutor]] = {}
+_lock = threading.Lock()
+
+
+def cpu_count() -> int:
+    """Number of CPUs this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def get_process_pool(name: str, max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Return a persistent process pool shared by every caller using the same name.
+
+    Pools are created on first use and kept for the life of the process so
+    worker start-up is paid once rather than per document.
+    """
+    with _lock:
+        pool = _pools.get(name)
+        if pool is None:
+            workers = max_workers or cpu_count()
+            logger.info(f"Starting '{name}' process pool with {workers} workers")
+            pool = ProcessPoolExecutor(max_workers=workers)
+            _pools[name] = pool
+        return pool
+
+
+def start_process_pool(name: str, max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Return the named process pool with its worker processes already forked.
+
+    Executors fork their workers on the first submit. Forking while another
+    thread holds a lock (a model load, a backend's stream lock) leaves the
+    child with a lock nobody will release, so callers that go on to start
+    threads or load models start their pool first.
+    """
+    pool = get_process_pool(name, max_workers)
+    pool.submit(os.getpid).result()
+    return pool
+
+
+def get_thread_pool(name: str, max_workers: Optional[int] = None) -> ThreadPoolExecutor:
+    """
+    Return a persistent thread pool shared by every caller using the same name.
+
+    Suited to work that waits on subprocesses or C code that releases the GIL.
+    """
+    with _lock:
+        pool = _pools.get(name)
+        if pool is None:
+            workers = max_workers or cpu_count()
+            logger.info(f"Starting '{name}' thread pool with {workers} workers")
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+            _pools[name] = pool
+        return pool
+
+
+def shutdown_pools() -> None:
+    """Shut down every shared pool (registered to run at exit)."""
+    with _lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+def _forget_pools() -> None:
+    # Pools inherited through fork have no live workers in the child
+    _pools.clear()
+
+
+atexit.register(shutdown_pools)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_pools)
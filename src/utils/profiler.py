@@ -0,0 +1,112 @@
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Seconds between stack samples
+PROFILE_INTERVAL = float(os.environ.get('SAGEAI_PROFILE_INTERVAL', 0.005))
+PROFILE_MAX_DEPTH = 64
+
+# Leaf frames of threads that are blocked waiting rather than working
+IDLE_FRAMES = {
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('queue.py', 'get'),
+    ('queue.py', 'put'),
+    ('selectors.py', 'select'),
+    ('socket.py', 'accept'),
+    ('socket.py', 'readinto'),
+    ('connection.py', '_recv'),
+    ('connection.py', 'wait')
+}
+
+
+class SamplingProfiler:
+    """
+    Low-overhead statistical profiler built on sys._current_frames().
+
+    A background thread snapshots the Python stacks of the profiled threads
+    (all threads by default) every `interval` seconds and counts identical
+    stacks. Nothing is traced, so the profiled code runs at full speed and
+    the profiler can be switched on for a single request under real load.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL, thread_ids: Optional[Iterable[int]] = None,
+                 include_idle: bool = False):
+        self.interval = interval
+        self.thread_ids = set(thread_ids) if thread_ids else None
+        self.include_idle = include_idle
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'SamplingProfiler':
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> 'SamplingProfiler':
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def __enter__(self) -> 'SamplingProfiler':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def folded(self) -> str:
+        """Stacks in the folded format read by flamegraph tools ("a;b;c count")."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self._stacks.most_common())
+
+    def top(self, limit: int = 20) -> List[Dict[str, object]]:
+        """Functions with the most samples, by own (leaf) and cumulative samples."""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self._stacks.items():
+            own[stack[-1]] += count
+            for frame in set(stack):
+                total[frame] += count
+        sampled = sum(self._stacks.values()) or 1
+        return [{
+            'function': frame,
+            'own_samples': own[frame],
+            'total_samples': total[frame],
+            'own_percent': round(100.0 * own[frame] / sampled, 1),
+            'total_percent': round(100.0 * total[frame] / sampled, 1)
+        } for frame, _ in own.most_common(limit)]
+
+    def summary(self, limit: int = 20) -> Dict[str, object]:
+        return {
+            'samples': self.samples,
+            'interval_seconds': self.interval,
+            'top': self.top(limit)
+        }
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_ids and thread_id not in self.thread_ids):
+                    continue
+                stack, idle = _stack(frame)
+                if stack and (self.include_idle or not idle):
+                    self._stacks[stack] += 1
+
+
+def _stack(frame) -> Tuple[Tuple[str, ...], bool]:
+    """Outermost-first frame labels, and whether the innermost frame is an idle wait."""
+    labels = []
+    leaf = frame
+    while frame is not None and len(labels) < PROFILE_MAX_DEPTH:
+        code = frame.f_code
+        labels.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    code = leaf.f_code
+    idle = (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+    return tuple(reversed(labels)), idle
@@ -0,0 +1,75 @@
+import os
+import re
+import json
+import time
+import logging
+import tempfile
+from contextlib import suppress
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Keys are a SHA-256 hex digest and a definition limit
+DATASET_KEY = re.compile(r'^[0-9a-f]{64}-\d+$')
+
+
+class ResultStore:
+    """
+    Index of finished datasets keyed by document content hash.
+
+    Each entry maps (document hash, max definitions) to the output files
+    produced for it, so an identical upload can be answered without running
+    the pipeline again. Entries whose files have since been deleted are
+    treated as missing.
+    """
+
+    def __init__(self, output_dir: str):
+        self.index_dir = os.path.join(output_dir, '.results')
+        os.makedirs(self.index_dir, exist_ok=True)
+
+    def lookup(self, doc_hash: str, max_definitions: int) -> Optional[Dict[str, Any]]:
+        """Return the stored result for a document, or None if it has not been processed."""
+        return self.get(self.key(doc_hash, max_definitions))
+
+    def get(self, dataset: str) -> Optional[Dict[str, Any]]:
+        """Return the stored result for a key from key(), or None if there is none."""
+        if not DATASET_KEY.match(dataset):
+            return None
+        path = os.path.join(self.index_dir, f"{dataset}.json")
+        try:
+            with open(path, encoding='utf-8') as file:
+                result = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Unreadable result entry {path}: {str(e)}")
+            return None
+        # Entries from before the outputs map, or with deleted files, are stale
+        outputs = result.get('outputs')
+        if not outputs or not all(os.path.exists(output) for output in outputs.values()):
+            logger.info(f"Outputs for {dataset} are gone, dropping result entry")
+            # Another worker may have dropped it first
+            with suppress(FileNotFoundError):
+                os.remove(path)
+            return None
+        return result
+
+    def save(self, doc_hash: str, max_definitions: int, result: Dict[str, Any]) -> None:
+        """Record the outputs produced for a document; concurrent saves of one key never mix."""
+        path = self._entry_path(doc_hash, max_definitions)
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, prefix=f"{os.path.basename(path)}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(dict(result, doc_hash=doc_hash, created=time.time()), file)
+            os.replace(tmp_path, path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def key(doc_hash: str, max_definitions: int) -> str:
+        return f"{doc_hash}-{max_definitions}"
+
+    def _entry_path(self, doc_hash: str, max_definitions: int) -> str:
+        return os.path.join(self.index_dir, f"{self.key(doc_hash, max_definitions)}.json")
@@ -0,0 +1,77 @@
+import queue
+import threading
+from typing import Iterable, Iterator, List, Optional
+
+
+class _StageError:
+    """Carries an exception from a stage thread to its consumer."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_DONE = object()
+
+
+def threaded(items: Iterator, maxsize: int, stop: threading.Event, name: str,
+             threads: Optional[List[threading.Thread]] = None) -> Iterator:
+    """
+    Run a generator in a background thread and return an iterator over its items.
+
+    Items are handed over through a bounded queue, so a slow consumer applies
+    backpressure to the producer. Setting stop makes both sides give up; the
+    producer thread is added to threads, if given, so the caller can join it
+    and know the generator has been closed.
+    """
+    buffer = queue.Queue(maxsize)
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put(item):
+                    return
+            put(_DONE)
+        except Exception as e:
+            put(_StageError(e))
+        finally:
+            items.close()
+
+    thread = threading.Thread(target=produce, name=f'pipeline-{name}', daemon=True)
+    thread.start()
+    if threads is not None:
+        threads.append(thread)
+
+    def consume() -> Iterator:
+        while not stop.is_set():
+            try:
+                item = buffer.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                return
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+
+    return consume()
+
+
+def batches(items: Iterable, size: int) -> Iterator[List]:
+    """Group an iterator into lists of up to size items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,106 @@
+import os
+import uuid
+import hashlib
+from typing import List, Optional
+
+from flask import Request, current_app
+from werkzeug.exceptions import UnsupportedMediaType
+from werkzeug.utils import secure_filename
+
+from src.utils.file_validator import MAGIC_BYTES_NEEDED, validate_magic_bytes
+
+
+class UploadFile:
+    """
+    Writable file object that streams an upload straight to its final path.
+
+    Werkzeug's form parser writes each chunk of the request body here as it
+    arrives. The first bytes are checked against the file type signature
+    before anything else is accepted, and the content hash is computed in
+    the same pass, so large uploads are never buffered or copied.
+    """
+
+    def __init__(self, directory: str, filename: Optional[str]):
+        self.filename = secure_filename(filename or '') or 'upload'
+        self.extension = self.filename.rsplit('.', 1)[1].lower() if '.' in self.filename else ''
+        self.path = os.path.join(directory, f"{uuid.uuid4().hex}_{self.filename}")
+        self.kept = False
+        self._file = open(self.path, 'wb+')
+        self._digest = hashlib.sha256()
+        self._head = b''
+        self._checked = False
+
+    def write(self, data: bytes) -> int:
+        if not self._checked:
+            self._head += data[:MAGIC_BYTES_NEEDED - len(self._head)]
+            if len(self._head) >= MAGIC_BYTES_NEEDED:
+                self._check()
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        # The parser seeks back to the start once the part is complete, which
+        # is the first point a file shorter than the signature can be checked
+        if not self._checked:
+            self._check()
+        return self._file.seek(offset, whence)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def readline(self, size: int = -1) -> bytes:
+        return self._file.readline(size)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def hexdigest(self) -> str:
+        """SHA-256 of everything written so far."""
+        return self._digest.hexdigest()
+
+    def keep(self) -> None:
+        """Hand the file on; it will no longer be deleted when the request ends."""
+        self.kept = True
+        self._file.close()
+
+    def discard(self) -> None:
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _check(self) -> None:
+        self._checked = True
+        valid, message = validate_magic_bytes(self._head, self.extension)
+        if not valid:
+            self.discard()
+            raise UnsupportedMediaType(message)
+
+
+class StreamingRequest(Request):
+    """Request class whose file uploads are written directly into UPLOAD_FOLDER."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._uploads: List[UploadFile] = []
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        upload = UploadFile(current_app.config['UPLOAD_FOLDER'], filename)
+        self._uploads.append(upload)
+        return upload
+
+    def close(self) -> None:
+        super().close()
+        # Remove uploads the view did not hand on (rejected, cached or duplicate)
+        for upload in self._uploads:
+            if not upload.kept:
+                upload.discard()
@@ -0,0 +1,34 @@
+"""
+Production entry point for a multi-worker WSGI server:
+
+    gunicorn -c gunicorn.conf.py
+
+With preload_app (see gunicorn.conf.py) this module is imported once in the
+gunicorn master, which loads the models before forking, so every web worker
+and the job processes it starts share the model memory copy-on-write
+instead of each loading its own copy.
+"""
+import os
+import time
+
+from src.main import app, jobs, mark_ready
+from src.utils.model_registry import current_rss_mb, get_registry
+
+# Load the models at import time (in the gunicorn master when preload_app is on)
+PRELOAD_MODELS = os.environ.get('SAGEAI_PRELOAD_MODELS', '1') != '0'
+
+
+def preload_models() -> None:
+    start = time.perf_counter()
+    get_registry().warm_up()
+    app.logger.info(f"Models preloaded in {time.perf_counter() - start:.2f}s, RSS {current_rss_mb():.1f}MB")
+
+
+def start_worker() -> None:
+    """Run in each web worker after fork: start its job queue and report readiness."""
+    jobs.start()
+    mark_ready()
+
+
+if PRELOAD_MODELS:
+    preload_models()
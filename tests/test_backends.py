@@ -0,0 +1,45 @@
+from src.ai.backends import InferenceBackend, collect, estimate_tokens
+from src.ai.result_cache import ResultCache
+from src.ai.simplifier import Simplifier
+
+
+def test_collect_stops_at_a_stop_sequence_split_across_chunks():
+    closed = []
+
+    def chunks():
+        try:
+            yield from ["An answer", ".\n", "\nSimplify", " this text: next prompt"]
+        finally:
+            closed.append(True)
+
+    text, stats = collect(chunks(), stop=["\n\n"])
+    assert text == "An answer."
+    assert stats['stopped'] and stats['tokens'] == 3
+    # The stream is closed, which ends generation on streaming backends
+    assert closed
+
+
+def test_collect_stops_after_enough_sentences():
+    text, stats = collect(iter(["One. ", "Two! ", "Three? ", "Four."]), sentences=2)
+    assert text == "One. Two!"
+    assert stats['stopped']
+
+
+def test_collect_keeps_everything_without_a_stop():
+    text, stats = collect(iter(["No", " stop", " here"]))
+    assert text == "No stop here"
+    assert not stats['stopped']
+
+
+class Unused(InferenceBackend):
+    model_name = 'unused'
+
+
+def test_token_budget_grows_with_the_definition_up_to_its_ceiling(tmp_path):
+    simplifier = Simplifier(cache=ResultCache(str(tmp_path / 'cache.sqlite')), backend=Unused())
+    short = simplifier.token_budget('analogy', "Tiny.")
+    longer = simplifier.token_budget('analogy', "word " * 100)
+    huge = simplifier.token_budget('analogy', "word " * 10000)
+
+    assert short < longer < huge == 60
+    assert estimate_tokens("") == 0 and estimate_tokens("abcd" * 10) == 10
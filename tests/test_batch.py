@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from src import batch
+from src.batch import discover, plan_work
+
+
+def write(path, size=10):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'x' * size)
+    return str(path.resolve())
+
+
+def item_paths(items):
+    return [[(part['path'], part['start'], part['stop']) for part in item['parts']] for item in items]
+
+
+def test_discover_expands_directories_and_manifests_once(tmp_path):
+    first = write(tmp_path / 'docs' / 'a.pdf')
+    second = write(tmp_path / 'docs' / 'nested' / 'b.docx')
+    write(tmp_path / 'docs' / 'skip.exe')
+    third = write(tmp_path / 'other' / 'c.csv')
+    (tmp_path / 'list.txt').write_text("# course files\ndocs/a.pdf\n\nother/c.csv\n")
+    (tmp_path / 'list.jsonl').write_text(json.dumps({'path': 'docs/nested/b.docx'}) + "\n")
+
+    found = discover([str(tmp_path / 'docs'), str(tmp_path / 'list.txt'), str(tmp_path / 'list.jsonl')])
+    assert found == [first, second, third]
+
+
+def test_discover_rejects_unknown_and_missing_inputs(tmp_path):
+    with pytest.raises(ValueError):
+        discover([write(tmp_path / 'program.exe')])
+    with pytest.raises(FileNotFoundError):
+        discover([str(tmp_path / 'missing.pdf')])
+
+
+def test_small_files_are_packed_and_items_sorted_largest_first(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, 'PACK_MAX_BYTES', 100)
+    monkeypatch.setattr(batch, 'PACK_TARGET_BYTES', 100)
+    small = [write(tmp_path / f"s{i}.csv", 40) for i in range(5)]
+    medium = write(tmp_path / 'medium.docx', 150)
+    large = write(tmp_path / 'large.docx', 500)
+
+    items = plan_work(small + [medium, large])
+    assert item_paths(items) == [
+        [(large, 0, None)],
+        [(medium, 0, None)],
+        [(path, 0, None) for path in small[:3]],
+        [(path, 0, None) for path in small[3:]],
+    ]
+    assert [item['bytes'] for item in items] == [500, 150, 120, 80]
+
+
+def test_long_pdfs_are_split_into_page_ranges(tmp_path, monkeypatch):
+    from src.extractors import text_extractor
+
+    monkeypatch.setattr(batch, 'PACK_MAX_BYTES', 100)
+    monkeypatch.setattr(batch, 'SPLIT_PAGES', 4)
+    pages = {write(tmp_path / 'long.pdf', 1000): 10, write(tmp_path / 'short.pdf', 300): 7}
+    monkeypatch.setattr(text_extractor, 'pdf_page_count', lambda path: pages[path])
+    long_pdf, short_pdf = pages
+
+    items = plan_work([long_pdf, short_pdf])
+    assert item_paths(items) == [
+        [(long_pdf, 0, 4)],
+        [(long_pdf, 4, 8)],
+        [(short_pdf, 0, None)],
+        [(long_pdf, 8, 10)],
+    ]
+    assert [item['parts'][0]['part_count'] for item in items] == [3, 3, 1, 3]
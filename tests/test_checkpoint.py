@@ -0,0 +1,77 @@
+import os
+import threading
+
+from src.utils.checkpoint import Checkpoint
+
+
+def test_resume_from_stored_text_terms_and_rows(tmp_path):
+    with Checkpoint('doc', root=str(tmp_path)) as checkpoint:
+        checkpoint.append_page("Page one")
+        checkpoint.append_page({'term': 'Osmosis', 'definition': 'Water crossing a membrane'})
+        checkpoint.finish_text()
+        checkpoint.append_term({'term': 'Cell', 'definition': 'Unit of life'})
+        checkpoint.finish_terms(max_definitions=5, count=1)
+        checkpoint.append_row({'term': 'Cell', 'complicated_text': 'Unit of life', 'analogy': 'A brick'})
+
+    with Checkpoint('doc', root=str(tmp_path)) as resumed:
+        assert resumed.has_text()
+        assert list(resumed.iter_text()) == [
+            "Page one", {'term': 'Osmosis', 'definition': 'Water crossing a membrane'}
+        ]
+        # The list ran out before its limit of 5, so it also covers larger limits
+        assert resumed.has_terms(100)
+        assert resumed.load_terms(100) == [{'term': 'Cell', 'definition': 'Unit of life'}]
+        assert resumed.completed_rows()[('Cell', 'Unit of life')]['analogy'] == 'A brick'
+
+
+def test_term_list_cut_short_only_covers_smaller_limits(tmp_path):
+    with Checkpoint('doc', root=str(tmp_path)) as checkpoint:
+        for i in range(5):
+            checkpoint.append_term({'term': f'T{i}', 'definition': 'd'})
+        checkpoint.finish_terms(max_definitions=5, count=5)
+        assert checkpoint.has_terms(3)
+        assert len(checkpoint.load_terms(3)) == 3
+        assert not checkpoint.has_terms(10)
+
+
+def test_half_written_line_is_skipped(tmp_path):
+    with Checkpoint('doc', root=str(tmp_path)) as checkpoint:
+        checkpoint.append_page("Complete")
+        with open(os.path.join(checkpoint.path, 'pages.jsonl'), 'a', encoding='utf-8') as file:
+            file.write('{"text": "Cut o')
+        assert list(checkpoint.iter_text()) == ["Complete"]
+
+
+def test_second_run_waits_until_the_first_clears(tmp_path):
+    first = Checkpoint('doc', root=str(tmp_path)).acquire()
+    first.append_row({'term': 'Cell', 'complicated_text': 'Unit of life'})
+    acquired = threading.Event()
+    second = Checkpoint('doc', root=str(tmp_path))
+
+    def run_second():
+        second.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=run_second)
+    thread.start()
+    assert not acquired.wait(0.2)
+
+    # The first run finishing removes its files while the second is still waiting
+    first.clear()
+    first.release()
+    assert acquired.wait(5)
+    thread.join()
+    assert os.path.isdir(second.path)
+    assert second.completed_rows() == {}
+    second.append_row({'term': 'Cell', 'complicated_text': 'Unit of life'})
+
+    # A third run must not get the lock while the second still holds it
+    third = Checkpoint('doc', root=str(tmp_path))
+    third_acquired = threading.Event()
+    thread = threading.Thread(target=lambda: (third.acquire(), third_acquired.set()))
+    thread.start()
+    assert not third_acquired.wait(0.2)
+    second.release()
+    assert third_acquired.wait(5)
+    thread.join()
+    third.release()
@@ -0,0 +1,89 @@
+import csv
+import json
+import os
+
+import pytest
+
+from src.output.data_writer import CSVSink, DataWriter, JSONLSink, iter_json_array, output_paths
+
+
+def row(term):
+    return {'term': term, 'complicated_text': f'{term} text', 'simplified_definition': 's',
+            'analogy': 'a', 'mind_map_prompt': 'm'}
+
+
+def test_files_appear_only_when_complete(tmp_path):
+    paths = output_paths(str(tmp_path), 'doc', ['csv', 'jsonl'])
+    with DataWriter(paths) as writer:
+        writer.write(row('Cell'))
+        assert not os.path.exists(paths['csv'])
+        assert not os.path.exists(paths['jsonl'])
+    with open(paths['csv'], newline='', encoding='utf-8') as file:
+        assert [line['term'] for line in csv.DictReader(file)] == ['Cell']
+    with open(paths['jsonl'], encoding='utf-8') as file:
+        assert [json.loads(line)['term'] for line in file] == ['Cell']
+    assert sorted(os.listdir(tmp_path)) == ['doc_dataset.csv', 'doc_dataset.jsonl']
+
+
+def test_failed_write_leaves_nothing_behind(tmp_path):
+    paths = output_paths(str(tmp_path), 'doc', ['csv', 'jsonl'])
+    with pytest.raises(RuntimeError):
+        with DataWriter(paths) as writer:
+            writer.write(row('Cell'))
+            raise RuntimeError("simplifier crashed")
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize('sink_class', [CSVSink, JSONLSink])
+def test_concurrent_writers_to_one_destination_do_not_mix(tmp_path, sink_class):
+    path = str(tmp_path / f'doc_dataset.{sink_class.extension}')
+    first, second = sink_class(path), sink_class(path)
+    assert first.tmp_path != second.tmp_path
+    for i in range(3):
+        first.write(row(f'first-{i}'))
+        second.write(row(f'second-{i}'))
+
+    # Aborting one writer must not discard the other's work
+    second.abort()
+    first.close()
+    with open(path, encoding='utf-8') as file:
+        content = file.read()
+    assert 'first-2' in content and 'second' not in content
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+
+def test_json_array_from_jsonl(tmp_path):
+    paths = output_paths(str(tmp_path), 'doc', ['jsonl'])
+    with DataWriter(paths) as writer:
+        writer.write(row('Cell'))
+        writer.write(row('Atom'))
+    rendered = json.loads("".join(iter_json_array(paths['jsonl'])))
+    assert [item['term'] for item in rendered] == ['Cell', 'Atom']
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        output_paths(str(tmp_path), 'doc', ['xml'])
+
+
+def test_a_failing_close_discards_every_unfinished_file(tmp_path, monkeypatch):
+    paths = output_paths(str(tmp_path), 'doc', ['csv', 'jsonl'])
+    finish = CSVSink._finish
+
+    def full_disk(self):
+        finish(self)
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(CSVSink, '_finish', full_disk)
+    with pytest.raises(OSError):
+        with DataWriter(paths) as writer:
+            writer.write(row('Cell'))
+    assert os.listdir(tmp_path) == []
+
+
+def test_parquet_writes_missing_fields_as_empty_strings(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    paths = output_paths(str(tmp_path), 'doc', ['parquet'])
+    with DataWriter(paths) as writer:
+        writer.write(dict(row('Cell'), analogy=None))
+    assert pq.read_table(paths['parquet']).column('analogy').to_pylist() == ['']
@@ -0,0 +1,119 @@
+import http.client
+import threading
+import time
+
+import pytest
+
+from src.ai import stub_server
+from src.ai.backends import HTTPBackend
+
+
+class Recorder:
+    """Counts the connections a stub server accepts and the requests it serves at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.active = 0
+        self.peak = 0
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(delay=0.0, close_after_answer=False, hang_up=False):
+        server = stub_server.make_server(port=0, delay=delay)
+        recorder = Recorder()
+        handler = server.RequestHandlerClass
+
+        class RecordingHandler(handler):
+            def setup(self):
+                super().setup()
+                with recorder.lock:
+                    recorder.connections += 1
+
+            def do_POST(self):
+                if hang_up:
+                    self.close_connection = True
+                    return
+                with recorder.lock:
+                    recorder.active += 1
+                    recorder.peak = max(recorder.peak, recorder.active)
+                try:
+                    super().do_POST()
+                finally:
+                    with recorder.lock:
+                        recorder.active -= 1
+                if close_after_answer:
+                    # Drop the connection without telling the client, like an idle timeout
+                    self.close_connection = True
+
+        server.RequestHandlerClass = RecordingHandler
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}/v1", recorder
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_requests_reuse_one_keep_alive_connection(serve):
+    url, recorder = serve()
+    backend = HTTPBackend(url, model_name='stub', concurrency=2)
+
+    answers = [backend.generate("Explain osmosis", max_tokens=8) for _ in range(3)]
+    answers += ["".join(backend.stream("Explain osmosis", max_tokens=8)) for _ in range(3)]
+
+    assert answers[0] == "Explain osmosis"
+    assert answers[3:] == answers[:3]
+    assert recorder.connections == 1
+    backend.close()
+
+
+def test_in_flight_requests_are_capped_at_the_concurrency(serve):
+    url, recorder = serve(delay=0.1)
+    backend = HTTPBackend(url, model_name='stub', concurrency=2)
+
+    threads = [threading.Thread(target=backend.generate, args=("Explain osmosis", 8)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert recorder.peak == 2
+    assert recorder.connections == 2
+    backend.close()
+
+
+def test_slow_answers_time_out(serve):
+    url, _ = serve(delay=1.0)
+    backend = HTTPBackend(url, model_name='stub', timeout=0.2)
+
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        backend.generate("Explain osmosis", max_tokens=8)
+    assert time.perf_counter() - start < 1.0
+
+
+def test_a_connection_closed_by_the_server_is_retried_once_on_a_fresh_one(serve):
+    url, recorder = serve(close_after_answer=True)
+    backend = HTTPBackend(url, model_name='stub')
+
+    assert backend.generate("First question", max_tokens=8) == "First question"
+    time.sleep(0.05)
+    assert backend.generate("Second question", max_tokens=8) == "Second question"
+    assert recorder.connections == 2
+    backend.close()
+
+
+def test_a_fresh_connection_that_fails_is_not_retried(serve):
+    url, recorder = serve(hang_up=True)
+    backend = HTTPBackend(url, model_name='stub')
+
+    with pytest.raises(http.client.RemoteDisconnected):
+        backend.generate("Explain osmosis", max_tokens=8)
+    assert recorder.connections == 1
+
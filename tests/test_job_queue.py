@@ -0,0 +1,179 @@
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from src.jobs.job_queue import JobQueue, QueueFullError
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def blocking_target(release):
+    def target(task, report):
+        release.wait(5)
+        return {'terms_processed': 1}
+    return target
+
+
+def finished_target(task, report):
+    return {'terms_processed': 1}
+
+
+def test_job_runs_and_reports_progress_and_result(tmp_path):
+    def target(task, report):
+        report('extracting', pages=2)
+        return {'terms_processed': 3}
+
+    jobs = JobQueue(str(tmp_path), target=target, workers=0, warm_up=False)
+    job_id, created = jobs.submit({'filename': 'a.pdf', 'filepath': '/server/side/path'})
+
+    assert created
+    assert wait_for(lambda: jobs.get(job_id)['status'] == 'done')
+    job = jobs.get(job_id)
+    assert job['result'] == {'terms_processed': 3}
+    assert job['progress'] == {'stage': 'extracting', 'pages': 2}
+    # Server-side task details are not exposed
+    assert 'task' not in job
+
+
+def test_failing_job_is_marked_failed_and_its_key_released(tmp_path):
+    def target(task, report):
+        raise RuntimeError("no text found")
+
+    jobs = JobQueue(str(tmp_path), target=target, workers=0, warm_up=False)
+    job_id, _ = jobs.submit({'filename': 'a.pdf'}, dedup_key='abc-100')
+
+    assert wait_for(lambda: jobs.get(job_id)['status'] == 'failed')
+    assert jobs.get(job_id)['error'] == "no text found"
+    retried, created = jobs.submit({'filename': 'a.pdf'}, dedup_key='abc-100')
+    assert created and retried != job_id
+
+
+def test_status_is_served_from_disk_by_another_queue(tmp_path):
+    jobs = JobQueue(str(tmp_path), target=finished_target, workers=0, warm_up=False)
+    job_id, _ = jobs.submit({'filename': 'a.pdf'})
+    assert wait_for(lambda: jobs.get(job_id)['status'] == 'done')
+
+    other = JobQueue(str(tmp_path), target=finished_target, workers=0, warm_up=False)
+    assert other.get(job_id)['result'] == {'terms_processed': 1}
+    assert other.get('missing') is None
+
+
+def test_full_queue_refuses_new_jobs(tmp_path):
+    release = threading.Event()
+    jobs = JobQueue(str(tmp_path), target=blocking_target(release), workers=0, warm_up=False, max_pending=1)
+    jobs.submit({'filename': 'a.pdf'})
+    with pytest.raises(QueueFullError):
+        jobs.submit({'filename': 'b.pdf'})
+    release.set()
+
+
+def test_same_key_joins_the_running_job(tmp_path):
+    release = threading.Event()
+    jobs = JobQueue(str(tmp_path), target=blocking_target(release), workers=0, warm_up=False)
+
+    first, created = jobs.submit({'filename': 'a.pdf'}, dedup_key='abc-100')
+    second, joined = jobs.submit({'filename': 'a.pdf'}, dedup_key='abc-100')
+    other, other_created = jobs.submit({'filename': 'a.pdf'}, dedup_key='abc-5')
+
+    assert created and not joined and other_created
+    assert second == first
+    assert other != first
+    release.set()
+    assert wait_for(lambda: jobs.pending() == 0)
+
+
+def submit_from_another_process(job_dir, dedup_key):
+    """Submit through a second web process's queue on the same job directory."""
+    def child(results):
+        jobs = JobQueue(job_dir, target=finished_target, workers=0, warm_up=False)
+        results.put(jobs.submit({'filename': 'a.pdf'}, dedup_key=dedup_key))
+        wait_for(lambda: jobs.pending() == 0)
+
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    process = context.Process(target=child, args=(results,))
+    process.start()
+    submitted = results.get(timeout=10)
+    process.join(10)
+    return submitted
+
+
+def test_dedup_key_is_shared_between_processes(tmp_path):
+    release = threading.Event()
+    jobs = JobQueue(str(tmp_path), target=blocking_target(release), workers=0, warm_up=False)
+
+    job_id, created = jobs.submit({'filename': 'a.pdf'}, dedup_key='abc-100')
+    joined_id, joined_created = submit_from_another_process(str(tmp_path), 'abc-100')
+
+    assert created and not joined_created
+    assert joined_id == job_id
+    release.set()
+    assert wait_for(lambda: jobs.get(job_id)['status'] == 'done')
+
+    # Once the job finishes the key can start a new one
+    new_id, new_created = submit_from_another_process(str(tmp_path), 'abc-100')
+    assert new_created and new_id != job_id
+
+
+def test_claim_of_a_finished_job_is_taken_over(tmp_path):
+    release = threading.Event()
+    release.set()
+    jobs = JobQueue(str(tmp_path), target=blocking_target(release), workers=0, warm_up=False)
+    job_id, _ = jobs.submit({'filename': 'a.pdf'}, dedup_key='abc-100')
+    assert wait_for(lambda: jobs.pending() == 0)
+    # A claim left behind, e.g. by a process that died before releasing it
+    (tmp_path / 'abc-100.lock').write_text('{"job_id": "%s", "owner": 1}' % job_id)
+
+    new_id, created = JobQueue(str(tmp_path), target=blocking_target(release), workers=0,
+                               warm_up=False).submit({'filename': 'a.pdf'}, dedup_key='abc-100')
+    assert created and new_id != job_id
+
+
+def crash_or_finish(task, report):
+    if task.get('crash'):
+        os._exit(9)
+    return {'terms_processed': 1}
+
+
+def test_dead_worker_fails_its_job_and_is_replaced(tmp_path):
+    jobs = JobQueue(str(tmp_path), target=crash_or_finish, workers=1, warm_up=False)
+    try:
+        crashed, _ = jobs.submit({'filename': 'a.pdf', 'crash': True}, dedup_key='abc-100')
+        assert wait_for(lambda: jobs.get(crashed)['status'] == 'failed', timeout=15)
+        assert 'exit code 9' in jobs.get(crashed)['error']
+        assert jobs.pending() == 0
+        assert not (tmp_path / 'abc-100.lock').exists()
+
+        # The key is free again and the replacement worker runs the next job
+        retried, created = jobs.submit({'filename': 'a.pdf'}, dedup_key='abc-100')
+        assert created and retried != crashed
+        assert wait_for(lambda: jobs.get(retried)['status'] == 'done', timeout=15)
+    finally:
+        jobs.shutdown()
+
+
+def test_pending_counts_under_the_job_table_lock(tmp_path):
+    release = threading.Event()
+    jobs = JobQueue(str(tmp_path), target=blocking_target(release), workers=0, warm_up=False)
+    jobs.submit({'filename': 'a.pdf'})
+    counts = []
+
+    with jobs._lock:
+        reader = threading.Thread(target=lambda: counts.append(jobs.pending()))
+        reader.start()
+        reader.join(0.1)
+        # The collector prunes the table under this lock, so pending() must wait for it
+        assert reader.is_alive()
+    reader.join(5)
+    release.set()
+    assert counts == [1]
@@ -0,0 +1,60 @@
+import multiprocessing
+
+from src.utils.metrics import Metrics, get_metrics
+
+
+def make_metrics():
+    metrics = Metrics()
+    metrics.describe('jobs_total', 'counter', 'Jobs')
+    metrics.describe('pending', 'gauge', 'Pending jobs')
+    metrics.describe('latency_seconds', 'histogram', 'Latency', buckets=(0.1, 1))
+    return metrics
+
+
+def test_render_uses_the_prometheus_text_format():
+    metrics = make_metrics()
+    metrics.inc('jobs_total', status='done')
+    metrics.inc('jobs_total', 2, status='done')
+    metrics.set('pending', 4)
+    metrics.observe('latency_seconds', 0.5, endpoint='/upload')
+
+    lines = metrics.render().splitlines()
+    assert '# TYPE jobs_total counter' in lines
+    assert 'jobs_total{status="done"} 3' in lines
+    assert 'pending 4' in lines
+    assert 'latency_seconds_bucket{endpoint="/upload",le="0.1"} 0' in lines
+    assert 'latency_seconds_bucket{endpoint="/upload",le="1"} 1' in lines
+    assert 'latency_seconds_bucket{endpoint="/upload",le="+Inf"} 1' in lines
+    assert 'latency_seconds_count{endpoint="/upload"} 1' in lines
+
+
+def test_snapshots_carry_deltas_that_merge_into_another_instance():
+    worker, web = make_metrics(), make_metrics()
+    worker.inc('jobs_total', status='done')
+    worker.observe('latency_seconds', 0.05)
+    worker.set('pending', 9)
+    web.merge(worker.snapshot(reset=True))
+    worker.inc('jobs_total', status='done')
+    web.merge(worker.snapshot(reset=True))
+
+    rendered = web.render()
+    assert 'jobs_total{status="done"} 2' in rendered
+    assert 'latency_seconds_count 1' in rendered
+    # Gauges are per process and stay out of snapshots
+    assert 'pending 9' not in rendered
+
+
+def report_child_snapshot(results):
+    results.put(get_metrics().snapshot())
+
+
+def test_forked_children_start_from_zero():
+    get_metrics().inc('sageai_pages_total', 5)
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    process = context.Process(target=report_child_snapshot, args=(results,))
+    process.start()
+    snapshot = results.get(timeout=10)
+    process.join(10)
+
+    assert 'sageai_pages_total' not in snapshot
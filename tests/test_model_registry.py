@@ -0,0 +1,95 @@
+import threading
+
+from src.utils.model_registry import ModelRegistry
+
+
+class Factory:
+    """Builds numbered instances and counts how often it was called."""
+
+    def __init__(self, name, delay=None):
+        self.name = name
+        self.calls = 0
+        self.delay = delay
+
+    def __call__(self):
+        if self.delay:
+            self.delay.wait(5)
+        self.calls += 1
+        return f"{self.name}-{self.calls}"
+
+
+def test_models_are_loaded_once_and_reused_across_threads():
+    release = threading.Event()
+    factory = Factory('nlp', delay=release)
+    registry = ModelRegistry()
+    registry.register('nlp', factory)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(registry.get('nlp'))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ['nlp-1'] * 4
+    assert factory.calls == 1
+    stats = registry.stats()['models']['nlp']
+    assert stats['loads'] == 1 and stats['hits'] == 3
+
+
+def test_least_recently_used_models_are_evicted_to_fit_the_budget():
+    registry = ModelRegistry(memory_budget_mb=100)
+    factories = {name: Factory(name) for name in ('a', 'b', 'c')}
+    for name, factory in factories.items():
+        registry.register(name, factory, size_mb=40)
+
+    registry.get('a')
+    registry.get('b')
+    registry.get('a')
+    registry.get('c')
+
+    models = registry.stats()['models']
+    assert [name for name in 'abc' if models[name]['loaded']] == ['a', 'c']
+    assert models['b']['evictions'] == 1
+    assert registry.loaded_mb() == 80
+    # An evicted model is loaded again on its next use
+    assert registry.get('b') == 'b-2'
+
+
+def test_borrowed_models_are_not_evicted():
+    registry = ModelRegistry(memory_budget_mb=50)
+    registry.register('simplifier', Factory('simplifier'), size_mb=40)
+    registry.register('nlp', Factory('nlp'), size_mb=40)
+
+    with registry.borrow('simplifier') as simplifier:
+        assert not registry.evict('simplifier')
+        # Over budget, but the borrowed model stays loaded
+        registry.get('nlp')
+        assert registry.stats()['models']['simplifier']['loaded']
+        assert registry.get('simplifier') is simplifier
+    assert registry.evict('simplifier')
+
+
+def test_borrow_pins_a_model_loaded_by_the_borrow_itself():
+    registry = ModelRegistry()
+    registry.register('nlp', Factory('nlp'))
+
+    with registry.borrow('nlp'):
+        assert not registry.evict('nlp')
+    assert registry.evict('nlp')
+
+
+def test_background_warm_up_loads_every_model_and_survives_failures():
+    registry = ModelRegistry()
+    factory = Factory('nlp')
+    registry.register('nlp', factory)
+    registry.register('broken', lambda: 1 / 0)
+
+    thread = registry.warm_up(background=True)
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert factory.calls == 1
+    assert registry.stats()['models']['nlp']['loaded']
+    assert not registry.stats()['models']['broken']['loaded']
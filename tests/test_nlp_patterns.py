@@ -0,0 +1,166 @@
+import pytest
+import spacy
+from spacy.tokens import Doc
+
+from src.processors.nlp_processor import NLPProcessor, TermIndex
+
+
+@pytest.fixture(scope='module')
+def processor():
+    return NLPProcessor(nlp=spacy.blank('en'))
+
+
+def parse(processor, rows):
+    """Build a parsed Doc from (word, head index, dep, pos, lemma) rows."""
+    words, heads, deps, pos, lemmas = zip(*rows)
+    return Doc(processor.nlp.vocab, words=list(words), heads=list(heads), deps=list(deps),
+               pos=list(pos), lemmas=list(lemmas))
+
+
+def extract(processor, rows, index=None):
+    terms = processor._extract_terms(parse(processor, rows), index or TermIndex())
+    return [(term['term'], term['definition'], term['lemma']) for term in terms]
+
+
+COPULA = [
+    ("A", 1, "det", "DET", "a"),
+    ("cell", 2, "nsubj", "NOUN", "cell"),
+    ("is", 2, "ROOT", "AUX", "be"),
+    ("the", 5, "det", "DET", "the"),
+    ("basic", 5, "amod", "ADJ", "basic"),
+    ("unit", 2, "attr", "NOUN", "unit"),
+    ("of", 5, "prep", "ADP", "of"),
+    ("life", 6, "pobj", "NOUN", "life"),
+    (".", 2, "punct", "PUNCT", "."),
+]
+
+
+def test_copula(processor):
+    assert extract(processor, COPULA) == [("cell", "the basic unit of life", "cell")]
+
+
+def test_defined_as(processor):
+    rows = [
+        ("Osmosis", 2, "nsubjpass", "NOUN", "osmosis"),
+        ("is", 2, "auxpass", "AUX", "be"),
+        ("defined", 2, "ROOT", "VERB", "define"),
+        ("as", 2, "prep", "ADP", "as"),
+        ("the", 5, "det", "DET", "the"),
+        ("movement", 3, "pobj", "NOUN", "movement"),
+        ("of", 5, "prep", "ADP", "of"),
+        ("water", 6, "pobj", "NOUN", "water"),
+        (".", 2, "punct", "PUNCT", "."),
+    ]
+    assert extract(processor, rows) == [("Osmosis", "the movement of water", "osmosis")]
+
+
+def test_refers_to(processor):
+    rows = [
+        ("Entropy", 1, "nsubj", "NOUN", "entropy"),
+        ("refers", 1, "ROOT", "VERB", "refer"),
+        ("to", 1, "prep", "ADP", "to"),
+        ("the", 4, "det", "DET", "the"),
+        ("degree", 2, "pobj", "NOUN", "degree"),
+        ("of", 4, "prep", "ADP", "of"),
+        ("disorder", 5, "pobj", "NOUN", "disorder"),
+        (".", 1, "punct", "PUNCT", "."),
+    ]
+    assert extract(processor, rows) == [("Entropy", "the degree of disorder", "entropy")]
+
+
+def test_means(processor):
+    rows = [
+        ("Photosynthesis", 1, "nsubj", "NOUN", "photosynthesis"),
+        ("means", 1, "ROOT", "VERB", "mean"),
+        ("converting", 1, "xcomp", "VERB", "convert"),
+        ("light", 2, "dobj", "NOUN", "light"),
+        ("into", 2, "prep", "ADP", "into"),
+        ("energy", 4, "pobj", "NOUN", "energy"),
+        (".", 1, "punct", "PUNCT", "."),
+    ]
+    assert extract(processor, rows) == [("Photosynthesis", "converting light into energy", "photosynthesis")]
+
+
+def test_which_is_and_its_relative_pronoun_is_skipped(processor):
+    # The copula pattern also matches "which are the powerhouse ..."; its PRON subject is no term
+    rows = [
+        ("Mitochondria", 10, "nsubj", "NOUN", "mitochondria"),
+        (",", 0, "punct", "PUNCT", ","),
+        ("which", 3, "nsubj", "PRON", "which"),
+        ("are", 0, "relcl", "AUX", "be"),
+        ("the", 5, "det", "DET", "the"),
+        ("powerhouse", 3, "attr", "NOUN", "powerhouse"),
+        ("of", 5, "prep", "ADP", "of"),
+        ("the", 8, "det", "DET", "the"),
+        ("cell", 6, "pobj", "NOUN", "cell"),
+        (",", 0, "punct", "PUNCT", ","),
+        ("make", 10, "ROOT", "VERB", "make"),
+        ("energy", 10, "dobj", "NOUN", "energy"),
+        (".", 10, "punct", "PUNCT", "."),
+    ]
+    assert extract(processor, rows) == [("Mitochondria", "the powerhouse of the cell", "mitochondria")]
+
+
+def test_appositive(processor):
+    rows = [
+        ("DNA", 7, "nsubj", "PROPN", "DNA"),
+        (",", 0, "punct", "PUNCT", ","),
+        ("a", 3, "det", "DET", "a"),
+        ("molecule", 0, "appos", "NOUN", "molecule"),
+        ("with", 3, "prep", "ADP", "with"),
+        ("genes", 4, "pobj", "NOUN", "gene"),
+        (",", 0, "punct", "PUNCT", ","),
+        ("replicates", 7, "ROOT", "VERB", "replicate"),
+        (".", 7, "punct", "PUNCT", "."),
+    ]
+    assert extract(processor, rows) == [("DNA", "a molecule with genes", "dna")]
+
+
+def test_short_appositives_are_not_definitions(processor):
+    rows = [
+        ("My", 1, "poss", "PRON", "my"),
+        ("friend", 5, "nsubj", "NOUN", "friend"),
+        (",", 1, "punct", "PUNCT", ","),
+        ("John", 1, "appos", "PROPN", "John"),
+        (",", 1, "punct", "PUNCT", ","),
+        ("sings", 5, "ROOT", "VERB", "sing"),
+        (".", 5, "punct", "PUNCT", "."),
+    ]
+    assert extract(processor, rows) == []
+
+
+def test_pronoun_subjects_are_skipped(processor):
+    rows = [
+        ("It", 1, "nsubj", "PRON", "it"),
+        ("is", 1, "ROOT", "AUX", "be"),
+        ("a", 3, "det", "DET", "a"),
+        ("process", 1, "attr", "NOUN", "process"),
+        (".", 1, "punct", "PUNCT", "."),
+    ]
+    assert extract(processor, rows) == []
+
+
+def test_repeated_terms_are_dropped_but_inflected_variants_are_kept(processor):
+    plural = [
+        ("Cells", 1, "nsubj", "NOUN", "cell"),
+        ("are", 1, "ROOT", "AUX", "be"),
+        ("units", 1, "attr", "NOUN", "unit"),
+        ("of", 2, "prep", "ADP", "of"),
+        ("life", 3, "pobj", "NOUN", "life"),
+        (".", 1, "punct", "PUNCT", "."),
+    ]
+    singular = [(word, head + len(plural), dep, pos, lemma) for word, head, dep, pos, lemma in COPULA]
+    index = TermIndex()
+
+    # Both share the lemma key that TermClusters groups them by
+    assert extract(processor, plural + singular, index) == [
+        ("Cells", "units of life", "cell"), ("cell", "the basic unit of life", "cell")
+    ]
+    assert extract(processor, COPULA, index) == []
+
+
+def test_term_index_normalises_case_and_spacing():
+    index = TermIndex()
+    assert index.add("Cell  membrane")
+    assert not index.add(" cell membrane ")
+    assert not index.add("")
@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+from PIL import Image, ImageDraw
+
+from src.extractors import ocr_engine, text_extractor
+from src.extractors.text_extractor import TextExtractor
+from src.utils.metrics import get_metrics
+
+
+@pytest.fixture
+def scanned_pdf(tmp_path):
+    """A PDF of image-only pages, as a scanner produces."""
+    pages = []
+    for i in range(3):
+        page = Image.new('RGB', (850, 1100), 'white')
+        ImageDraw.Draw(page).text((100, 100), f"Scanned page {i + 1}", fill='black')
+        pages.append(page)
+    path = tmp_path / 'scan.pdf'
+    pages[0].save(path, save_all=True, append_images=pages[1:], resolution=100)
+    return str(path)
+
+
+@pytest.fixture
+def fake_tesseract(monkeypatch):
+    threads = set()
+
+    def ocr_tile(tile):
+        threads.add(threading.current_thread().name)
+        return "recognised text"
+
+    monkeypatch.setattr(ocr_engine, '_ocr_tile', ocr_tile)
+    monkeypatch.setattr(text_extractor, '_ocr_engines', {})
+    return threads
+
+
+def ocr_pages_counted():
+    return sum(value for _, value in get_metrics().snapshot().get('sageai_ocr_pages_total', []))
+
+
+def test_scanned_pages_fall_back_to_ocr_with_one_engine(scanned_pdf, fake_tesseract):
+    before = ocr_pages_counted()
+    pages = list(TextExtractor().iter_pdf_pages(scanned_pdf, workers=4))
+
+    assert pages == ["recognised text"] * 3
+    assert len(text_extractor._ocr_engines) == 1
+    assert ocr_pages_counted() - before == 3
+
+
+def test_serial_callers_ocr_on_a_single_thread(scanned_pdf, fake_tesseract):
+    pages = list(TextExtractor().iter_extract(scanned_pdf, workers=1))
+
+    assert pages == ["recognised text"] * 3
+    assert list(text_extractor._ocr_engines) == [1]
+    assert {name.rsplit('_', 1)[0] for name in fake_tesseract} == {'ocr-1'}
+
+
+def test_page_parallel_workers_report_their_ocr_metrics(scanned_pdf, fake_tesseract, monkeypatch):
+    monkeypatch.setattr(text_extractor, 'PDF_PARALLEL_MIN_PAGES', 2)
+    before = ocr_pages_counted()
+    pages = list(TextExtractor().iter_pdf_pages(scanned_pdf, workers=2))
+
+    assert pages == ["recognised text"] * 3
+    # OCR ran in the pool workers, whose counts were merged into this process
+    assert not text_extractor._ocr_engines
+    assert ocr_pages_counted() - before == 3
@@ -0,0 +1,150 @@
+import fcntl
+import json
+import os
+import threading
+from functools import partial
+
+import pytest
+import spacy
+
+from src import pipeline
+from src.ai import simplifier as simplifier_module
+from src.ai.backends import InferenceBackend
+from src.ai.result_cache import ResultCache
+from src.ai.simplifier import Simplifier
+from src.ai.stub_server import fake_completion
+from src.extractors.text_extractor import TextExtractor
+from src.processors.nlp_processor import NLPProcessor
+from src.utils.checkpoint import Checkpoint, file_hash
+from src.utils.model_registry import ModelRegistry
+
+STAGES = ('pipeline-extract', 'pipeline-nlp', 'pipeline-simplify')
+
+
+class StubBackend(InferenceBackend):
+    """Answers like the stub completion server and records the terms it was asked about."""
+
+    model_name = 'stub'
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, prompt, max_tokens, stop=()):
+        self.prompts.append(prompt)
+        return fake_completion(prompt, max_tokens)
+
+
+class FailingSimplifier:
+    def process_batch(self, items):
+        raise RuntimeError("model crashed")
+
+
+class FailingExtractor:
+    def iter_extract(self, filepath):
+        yield {'term': 'Osmosis', 'definition': 'Water crossing a membrane by diffusion'}
+        raise RuntimeError("disk read failed")
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    backend = StubBackend()
+    registry = ModelRegistry()
+    registry.register('extractor', TextExtractor)
+    registry.register('nlp', lambda: NLPProcessor(nlp=spacy.blank('en')))
+    registry.register('simplifier', lambda: Simplifier(
+        cache=ResultCache(str(tmp_path / 'cache.sqlite')), backend=backend
+    ))
+    checkpoints = str(tmp_path / 'checkpoints')
+    monkeypatch.setattr(pipeline, 'get_registry', lambda: registry)
+    monkeypatch.setattr(pipeline, 'Checkpoint', partial(Checkpoint, root=checkpoints))
+    monkeypatch.setattr(simplifier_module, 'BATCH_SIZE', 2)
+    return {'backend': backend, 'registry': registry, 'checkpoints': checkpoints, 'output': str(tmp_path / 'output')}
+
+
+def glossary(path, count):
+    terms = [(f"Term{i}", f"Definition number {i} about topic {i * 7} in unit {i * 13}") for i in range(count)]
+    path.write_text("Term,Definition\n" + "".join(f"{term},{definition}\n" for term, definition in terms))
+    return str(path), terms
+
+
+def read_rows(result):
+    with open(result['outputs']['jsonl'], encoding='utf-8') as file:
+        return [json.loads(line) for line in file]
+
+
+def stage_threads():
+    return [thread for thread in threading.enumerate() if thread.name in STAGES]
+
+
+def assert_unlocked(checkpoints, doc_hash):
+    with open(os.path.join(checkpoints, f"{doc_hash}.lock"), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def test_rows_come_out_in_document_order(env, tmp_path):
+    path, terms = glossary(tmp_path / 'glossary.csv', 9)
+
+    result = pipeline.run_pipeline(path, env['output'], max_definitions=20)
+
+    rows = read_rows(result)
+    assert result['terms_processed'] == 9
+    assert [(row['term'], row['complicated_text']) for row in rows] == terms
+    assert rows[0]['simplified_definition'] == "Term0 explained simply."
+    # Finished runs leave no checkpoint behind
+    assert not os.path.exists(os.path.join(env['checkpoints'], file_hash(path)))
+
+
+def test_extraction_errors_reach_the_caller_and_stop_every_stage(env, tmp_path):
+    path, _ = glossary(tmp_path / 'glossary.csv', 3)
+    env['registry'].register('extractor', FailingExtractor)
+
+    with pytest.raises(RuntimeError, match="disk read failed"):
+        pipeline.run_pipeline(path, env['output'])
+
+    assert stage_threads() == []
+    assert os.listdir(env['output']) == []
+    assert_unlocked(env['checkpoints'], file_hash(path))
+
+
+def test_simplifier_errors_stop_the_stages_before_the_checkpoint_is_released(env, tmp_path):
+    path, _ = glossary(tmp_path / 'glossary.csv', 500)
+    env['registry'].register('simplifier', FailingSimplifier)
+
+    with pytest.raises(RuntimeError, match="model crashed"):
+        pipeline.run_pipeline(path, env['output'], max_definitions=500)
+
+    # Every stage has finished, so nothing appends to the checkpoint after the lock is gone
+    assert stage_threads() == []
+    assert_unlocked(env['checkpoints'], file_hash(path))
+
+
+def test_resume_reuses_checkpointed_terms_and_rows(env, tmp_path):
+    path, terms = glossary(tmp_path / 'glossary.csv', 4)
+    env['registry'].register('extractor', FailingExtractor)
+    with Checkpoint(file_hash(path), root=env['checkpoints']) as checkpoint:
+        for term, definition in terms:
+            checkpoint.append_term({'term': term, 'definition': definition})
+        checkpoint.finish_terms(max_definitions=10, count=len(terms))
+        checkpoint.append_row({'term': 'Term1', 'complicated_text': terms[1][1],
+                               'simplified_definition': 'From the last run.', 'analogy': 'A', 'mind_map_prompt': 'M'})
+
+    result = pipeline.run_pipeline(path, env['output'], max_definitions=10)
+
+    rows = read_rows(result)
+    assert [row['term'] for row in rows] == ['Term0', 'Term1', 'Term2', 'Term3']
+    assert rows[1]['simplified_definition'] == 'From the last run.'
+    asked = "".join(env['backend'].prompts)
+    assert 'Term0' in asked and 'Term1' not in asked
+
+
+def test_resume_from_checkpointed_text_skips_extraction(env, tmp_path):
+    path, terms = glossary(tmp_path / 'glossary.csv', 3)
+    env['registry'].register('extractor', FailingExtractor)
+    with Checkpoint(file_hash(path), root=env['checkpoints']) as checkpoint:
+        for term, definition in terms:
+            checkpoint.append_page({'term': term, 'definition': definition})
+        checkpoint.finish_text()
+
+    result = pipeline.run_pipeline(path, env['output'])
+
+    assert [row['term'] for row in read_rows(result)] == ['Term0', 'Term1', 'Term2']
@@ -0,0 +1,16 @@
+import os
+
+from src.utils.pools import get_process_pool, get_thread_pool, start_process_pool
+
+
+def test_pools_are_shared_by_name():
+    assert get_thread_pool('test-shared', 2) is get_thread_pool('test-shared')
+
+
+def test_started_pools_have_forked_every_worker():
+    pool = start_process_pool('test-started', 2)
+
+    assert pool is get_process_pool('test-started')
+    # Forked now, before the caller starts threads, rather than on its first real task
+    assert len(pool._processes) == 2
+    assert pool.submit(os.getpid).result() != os.getpid()
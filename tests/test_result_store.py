@@ -0,0 +1,85 @@
+import os
+
+from src.utils.result_store import ResultStore
+
+DOC_HASH = 'ab' * 32
+
+
+def store_outputs(tmp_path, name):
+    paths = {}
+    for fmt in ('csv', 'jsonl'):
+        path = tmp_path / f'{name}_dataset.{fmt}'
+        path.write_text('term\n')
+        paths[fmt] = str(path)
+    return paths
+
+
+def test_results_are_keyed_by_document_and_definition_limit(tmp_path):
+    store = ResultStore(str(tmp_path))
+    outputs = store_outputs(tmp_path, 'notes_5')
+    store.save(DOC_HASH, 5, {'outputs': outputs, 'terms_processed': 5})
+
+    assert store.lookup(DOC_HASH, 5)['outputs'] == outputs
+    assert store.lookup(DOC_HASH, 100) is None
+    assert store.lookup('cd' * 32, 5) is None
+    assert store.get(ResultStore.key(DOC_HASH, 5))['terms_processed'] == 5
+
+
+def test_keys_that_are_not_dataset_keys_are_refused(tmp_path):
+    store = ResultStore(str(tmp_path))
+    store.save(DOC_HASH, 5, {'outputs': store_outputs(tmp_path, 'notes_5')})
+
+    assert store.get(f'{DOC_HASH}--5') is None
+    assert store.get(f'../.results/{DOC_HASH}-5') is None
+    assert store.get('abc-5') is None
+
+
+def test_entries_whose_files_are_gone_are_dropped(tmp_path):
+    store = ResultStore(str(tmp_path))
+    outputs = store_outputs(tmp_path, 'notes_5')
+    store.save(DOC_HASH, 5, {'outputs': outputs})
+    os.remove(outputs['csv'])
+
+    assert store.lookup(DOC_HASH, 5) is None
+    assert os.listdir(store.index_dir) == []
+
+
+def test_entries_without_outputs_are_stale(tmp_path):
+    store = ResultStore(str(tmp_path))
+    store.save(DOC_HASH, 5, {'output_path': 'old.csv'})
+    assert store.lookup(DOC_HASH, 5) is None
+
+
+def test_a_stale_entry_dropped_by_another_worker_is_not_an_error(tmp_path, monkeypatch):
+    from src.utils import result_store
+
+    store = ResultStore(str(tmp_path))
+    store.save(DOC_HASH, 5, {'outputs': {'csv': str(tmp_path / 'gone.csv')}})
+    load = result_store.json.load
+
+    def load_then_lose(file):
+        data = load(file)
+        # The other worker removes the entry between our read and our remove
+        os.remove(file.name)
+        return data
+
+    monkeypatch.setattr(result_store.json, 'load', load_then_lose)
+    assert store.lookup(DOC_HASH, 5) is None
+
+
+def test_concurrent_saves_of_one_key_leave_one_whole_entry(tmp_path):
+    import threading
+
+    store = ResultStore(str(tmp_path))
+    outputs = store_outputs(tmp_path, 'notes_5')
+    threads = [
+        threading.Thread(target=store.save, args=(DOC_HASH, 5, {'outputs': outputs, 'terms_processed': i}))
+        for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert store.lookup(DOC_HASH, 5)['terms_processed'] in range(8)
+    assert os.listdir(store.index_dir) == [f"{ResultStore.key(DOC_HASH, 5)}.json"]
@@ -0,0 +1,72 @@
+from src.ai.backends import InferenceBackend
+from src.ai.result_cache import ResultCache
+from src.ai.simplifier import BATCH_PROMPT_HEADER, Simplifier
+
+
+class ReplyBackend(InferenceBackend):
+    """Answers batched prompts with a fixed reply and anything else with a fixed sentence."""
+
+    model_name = 'reply'
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.prompts = []
+
+    def generate(self, prompt, max_tokens, stop=()):
+        self.prompts.append(prompt)
+        return self.reply if prompt.startswith(BATCH_PROMPT_HEADER) else "Answer from a single-field prompt."
+
+
+def make_simplifier(tmp_path, reply=''):
+    return Simplifier(cache=ResultCache(str(tmp_path / 'cache.sqlite')), backend=ReplyBackend(reply))
+
+
+def test_label_variants_are_recognised(tmp_path):
+    parsed = make_simplifier(tmp_path)._parse_batch_response(
+        "[1] SIMPLIFIED: One.\n"
+        "[1] analogy : Two.\n"
+        "[1] MINDMAP: Three.\n"
+        "  [2]  Mind   Map:Four.\n",
+        2
+    )
+    assert parsed == [
+        {'simplified_definition': 'One.', 'analogy': 'Two.', 'mind_map_prompt': 'Three.'},
+        {'mind_map_prompt': 'Four.'},
+    ]
+
+
+def test_wrapped_lines_continue_the_previous_field(tmp_path):
+    parsed = make_simplifier(tmp_path)._parse_batch_response(
+        "[1] SIMPLIFIED: Water moves\n"
+        "   through a skin.\n"
+        "\n"
+        "[1] ANALOGY: Like a sponge.\n",
+        1
+    )
+    assert parsed == [{'simplified_definition': 'Water moves through a skin.', 'analogy': 'Like a sponge.'}]
+
+
+def test_out_of_range_items_and_their_continuations_are_dropped(tmp_path):
+    parsed = make_simplifier(tmp_path)._parse_batch_response(
+        "Here are the answers.\n"
+        "[0] SIMPLIFIED: Nothing asked.\n"
+        "[3] ANALOGY: Not asked either.\n"
+        "   still not asked.\n"
+        "[2] ANALOGY: Asked.\n",
+        2
+    )
+    assert parsed == [{}, {'analogy': 'Asked.'}]
+
+
+def test_missing_fields_fall_back_to_their_own_prompts(tmp_path):
+    simplifier = make_simplifier(tmp_path, "[1] SIMPLIFIED: Short.\n[1] MINDMAP: Map.\n[2] ANALOGY: Like it.\n")
+    rows = simplifier.process_batch([
+        {'term': 'Osmosis', 'definition': 'Diffusion of water across a membrane'},
+        {'term': 'Mitosis', 'definition': 'Division of a cell nucleus'},
+    ])
+
+    assert [row['simplified_definition'] for row in rows] == ['Short.', "Answer from a single-field prompt."]
+    assert [row['analogy'] for row in rows] == ["Answer from a single-field prompt.", 'Like it.']
+    assert [row['mind_map_prompt'] for row in rows] == ['Map.', "Answer from a single-field prompt."]
+    # One batched call plus one per missing field
+    assert len(simplifier.backend.prompts) == 4
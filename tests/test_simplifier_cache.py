@@ -0,0 +1,79 @@
+import pytest
+
+from src.ai import simplifier as simplifier_module
+from src.ai.backends import InferenceBackend
+from src.ai.result_cache import ResultCache
+from src.ai.simplifier import BATCH_PROMPT_HEADER, Simplifier
+
+
+class ScriptedBackend(InferenceBackend):
+    """Answers batched prompts in the expected format and anything else with a fixed sentence."""
+
+    model_name = 'scripted'
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, prompt, max_tokens, stop=()):
+        self.prompts.append(prompt)
+        if prompt.startswith(BATCH_PROMPT_HEADER):
+            return ("[1] SIMPLIFIED: Water moves through a skin.\n"
+                    "[1] ANALOGY: Like a sponge soaking up water.\n"
+                    "[1] MIND MAP: Osmosis - water - membrane")
+        return "Answer from a single-field prompt."
+
+
+ITEM = {'term': 'Osmosis', 'definition': 'The diffusion of water across a semipermeable membrane'}
+
+
+@pytest.fixture
+def backend():
+    return ScriptedBackend()
+
+
+@pytest.fixture
+def simplifier(tmp_path, backend):
+    return Simplifier(cache=ResultCache(str(tmp_path / 'cache.sqlite')), backend=backend)
+
+
+def test_batched_answers_are_reused_by_later_batches(simplifier, backend):
+    first = simplifier.process_batch([ITEM])
+    calls = len(backend.prompts)
+    second = simplifier.process_batch([ITEM])
+
+    assert first == second
+    assert first[0]['analogy'] == "Like a sponge soaking up water."
+    assert len(backend.prompts) == calls == 1
+
+
+def test_single_field_prompts_do_not_reuse_batched_answers(simplifier, backend):
+    simplifier.process_batch([ITEM])
+    analogy = simplifier.generate_analogy(ITEM['term'], ITEM['definition'])
+
+    assert analogy == "Answer from a single-field prompt."
+    assert len(backend.prompts) == 2
+
+
+def test_changing_the_batch_prompt_invalidates_batched_answers(simplifier, backend, monkeypatch):
+    simplifier.process_batch([ITEM])
+    monkeypatch.setattr(simplifier_module, 'BATCH_TEMPLATES', {
+        field: template.replace("middle school", "primary school")
+        for field, template in simplifier_module.BATCH_TEMPLATES.items()
+    })
+    simplifier.process_batch([ITEM])
+
+    assert len(backend.prompts) == 2
+
+
+def test_fields_the_batch_missed_are_cached_under_their_own_prompt(simplifier, backend, monkeypatch):
+    monkeypatch.setattr(backend, 'generate', lambda prompt, max_tokens, stop=(): (
+        backend.prompts.append(prompt) or
+        ("[1] SIMPLIFIED: Water moves through a skin.\n[1] ANALOGY: Like a sponge.\n"
+         if prompt.startswith(BATCH_PROMPT_HEADER) else "Mind map from its own prompt.")
+    ))
+    row = simplifier.process_batch([ITEM])[0]
+    calls = len(backend.prompts)
+
+    assert row['mind_map_prompt'] == "Mind map from its own prompt."
+    assert simplifier.process_batch([ITEM]) == [row]
+    assert len(backend.prompts) == calls == 2
@@ -0,0 +1,64 @@
+import threading
+
+import pytest
+
+from src.utils.streams import batches, threaded
+
+
+def test_batches_keep_order_and_the_remainder():
+    assert list(batches(iter(range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(batches(iter([]), 3)) == []
+
+
+def test_threaded_yields_every_item_in_order():
+    stop = threading.Event()
+    assert list(threaded((i for i in range(100)), 4, stop, 'test')) == list(range(100))
+
+
+def test_threaded_raises_producer_errors_in_the_consumer():
+    def failing():
+        yield 1
+        raise ValueError("extraction failed")
+
+    items = threaded(failing(), 4, threading.Event(), 'test')
+    assert next(items) == 1
+    with pytest.raises(ValueError, match="extraction failed"):
+        next(items)
+
+
+def test_stop_ends_both_sides():
+    produced = []
+
+    def endless():
+        while True:
+            produced.append(len(produced))
+            yield produced[-1]
+
+    stop = threading.Event()
+    items = threaded(endless(), 2, stop, 'test')
+    assert next(items) == 0
+    stop.set()
+    assert list(items) == []
+    # The bounded buffer kept the producer from running ahead
+    assert len(produced) < 10
+
+
+def test_joined_producers_have_closed_their_generators():
+    closed = []
+
+    def endless():
+        try:
+            while True:
+                yield 1
+        finally:
+            closed.append(True)
+
+    stop = threading.Event()
+    threads = []
+    items = threaded(endless(), 2, stop, 'test', threads)
+    assert next(items) == 1
+    stop.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(threads) == 1 and not threads[0].is_alive()
+    assert closed == [True]
@@ -0,0 +1,156 @@
+import pytest
+
+from src.extractors import structured
+from src.extractors.structured import (
+    blocks_to_segments, iter_docx_blocks, iter_pptx_blocks, split_bold_term
+)
+
+DEFINITION = "the movement of water across a membrane"
+
+
+@pytest.mark.parametrize('runs', [
+    [("Osmosis", True), (": " + DEFINITION, None)],
+    [("Osmosis:", True), (" " + DEFINITION, False)],
+    [("Osmosis", True), (" ", None), ("— " + DEFINITION, None)],
+])
+def test_bold_term_paragraphs_are_split(runs):
+    assert split_bold_term(runs) == ("Osmosis", DEFINITION)
+
+
+@pytest.mark.parametrize('runs', [
+    [("Osmosis", True), (" is " + DEFINITION, None)],
+    [("Osmosis", None), (": " + DEFINITION, None)],
+    [("Osmosis", True), (": water", None)],
+    [("Everything in bold: " + DEFINITION, True)],
+])
+def test_other_paragraphs_are_not_split(runs):
+    assert split_bold_term(runs) is None
+
+
+def test_blocks_become_terms_and_joined_text():
+    blocks = [
+        {'kind': 'heading', 'text': 'Cells', 'location': 'paragraph 1'},
+        {'kind': 'paragraph', 'text': 'Osmosis: ...', 'location': 'paragraph 2',
+         'term': 'Osmosis', 'definition': DEFINITION},
+        {'kind': 'bullet', 'text': 'Cells divide.', 'location': 'paragraph 3'},
+    ]
+    assert list(blocks_to_segments(blocks)) == [
+        {'term': 'Osmosis', 'definition': DEFINITION}, "Cells\n\nCells divide."
+    ]
+
+
+def test_long_text_is_split_into_segments(monkeypatch):
+    monkeypatch.setattr(structured, 'BLOCK_SEGMENT_CHARS', 10)
+    blocks = [{'kind': 'paragraph', 'text': 'x' * 6, 'location': ''} for _ in range(3)]
+    assert list(blocks_to_segments(blocks)) == ["xxxxxx\n\nxxxxxx", "xxxxxx"]
+
+
+def test_docx_blocks_in_reading_order(tmp_path):
+    from docx import Document
+
+    document = Document()
+    document.add_heading("Cell Biology", level=1)
+    paragraph = document.add_paragraph()
+    paragraph.add_run("Osmosis").bold = True
+    paragraph.add_run(": " + DEFINITION)
+    document.add_paragraph("Cells divide by mitosis.", style='List Bullet')
+    table = document.add_table(rows=2, cols=2)
+    for row, cells in zip(table.rows, [('Term', 'Definition'), ('Atom', 'The smallest unit of matter')]):
+        for cell, text in zip(row.cells, cells):
+            cell.text = text
+    document.sections[0].header.paragraphs[0].text = "Unit 3"
+    path = tmp_path / 'notes.docx'
+    document.save(path)
+
+    blocks = list(iter_docx_blocks(str(path)))
+    assert [(block['kind'], block['text']) for block in blocks] == [
+        ('heading', "Cell Biology"),
+        ('paragraph', "Osmosis: " + DEFINITION),
+        ('bullet', "Cells divide by mitosis."),
+        ('table', "Atom: The smallest unit of matter"),
+        ('header', "Unit 3"),
+    ]
+    assert blocks[1]['term'] == "Osmosis"
+    assert blocks[3]['term'] == "Atom" and blocks[3]['location'] == "table 1"
+
+
+
+def add_hyperlink(paragraph, url, text):
+    from docx.opc.constants import RELATIONSHIP_TYPE
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+
+    hyperlink = OxmlElement('w:hyperlink')
+    hyperlink.set(qn('r:id'), paragraph.part.relate_to(url, RELATIONSHIP_TYPE.HYPERLINK, is_external=True))
+    run = OxmlElement('w:r')
+    text_element = OxmlElement('w:t')
+    text_element.text = text
+    run.append(text_element)
+    hyperlink.append(run)
+    paragraph._p.append(hyperlink)
+
+
+def test_docx_hyperlinked_words_are_kept(tmp_path):
+    from docx import Document
+
+    document = Document()
+    paragraph = document.add_paragraph()
+    paragraph.add_run("Osmosis").bold = True
+    paragraph.add_run(": the movement of ")
+    add_hyperlink(paragraph, "https://example.org/water", "water")
+    paragraph.add_run(" across a membrane")
+    linked = document.add_paragraph("Cells are described in ")
+    add_hyperlink(linked, "https://example.org/cells", "cell theory")
+    linked.add_run(".")
+    path = tmp_path / 'links.docx'
+    document.save(path)
+
+    blocks = list(iter_docx_blocks(str(path)))
+    assert blocks[0]['text'] == "Osmosis: " + DEFINITION
+    assert (blocks[0]['term'], blocks[0]['definition']) == ("Osmosis", DEFINITION)
+    assert blocks[1]['text'] == "Cells are described in cell theory."
+
+
+def test_paragraph_text_supplies_the_definition():
+    runs = [("Osmosis", True), (": the movement of ", None), (" across a membrane", None)]
+    assert split_bold_term(runs, "Osmosis: " + DEFINITION) == ("Osmosis", DEFINITION)
+    # A term the runs cannot see (such as a linked one) is not guessed at
+    assert split_bold_term(runs, "See Osmosis: " + DEFINITION) is None
+
+
+def make_deck(path, slides):
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    deck = Presentation()
+    for index in range(slides):
+        slide = deck.slides.add_slide(deck.slide_layouts[5])
+        slide.shapes.title.text = f"Slide {index + 1}"
+        group = slide.shapes.add_group_shape()
+        box = group.shapes.add_textbox(Inches(1), Inches(2), Inches(4), Inches(1))
+        run = box.text_frame.paragraphs[0].add_run()
+        run.text = f"Term {index + 1}"
+        run.font.bold = True
+        box.text_frame.paragraphs[0].add_run().text = ": " + DEFINITION
+        slide.notes_slide.notes_text_frame.text = f"Say hello {index + 1}"
+    deck.save(path)
+
+
+def test_pptx_blocks_include_groups_and_notes(tmp_path):
+    path = str(tmp_path / 'deck.pptx')
+    make_deck(path, 2)
+
+    blocks = list(iter_pptx_blocks(path, workers=1))
+    assert [(block['kind'], block['location']) for block in blocks[:3]] == [
+        ('heading', 'slide 1'), ('paragraph', 'slide 1'), ('note', 'slide 1 notes')
+    ]
+    assert blocks[1]['term'] == "Term 1" and blocks[1]['definition'] == DEFINITION
+    assert len(blocks) == 6
+
+
+def test_slide_parallel_extraction_matches_serial(tmp_path, monkeypatch):
+    path = str(tmp_path / 'deck.pptx')
+    make_deck(path, 6)
+    monkeypatch.setattr(structured, 'PPTX_PARALLEL_MIN_SLIDES', 2)
+
+    assert list(iter_pptx_blocks(path, workers=2)) == list(iter_pptx_blocks(path, workers=1))
@@ -0,0 +1,65 @@
+from src.extractors.tabular import (
+    ROWS_PER_SEGMENT, detect_glossary, iter_csv_rows, iter_table_segments, segment_chars
+)
+from src.extractors.text_extractor import TextExtractor
+
+
+def test_glossary_headers_are_detected_in_any_column():
+    assert detect_glossary(['#', 'Term', 'Definition']) == (1, 2)
+    assert detect_glossary(['Meaning', 'Vocabulary']) == (1, 0)
+    assert detect_glossary(['Name', 'Age']) is None
+
+
+def test_generic_headers_need_a_glossary_header_opposite():
+    assert detect_glossary(['Term', 'Description']) == (0, 1)
+    assert detect_glossary(['Name', 'Definition']) == (0, 1)
+    # Inventories and product lists are left to NLP
+    assert detect_glossary(['Name', 'Description']) is None
+    assert detect_glossary(['SKU', 'Name', 'Description', 'Price']) is None
+    rows = [['Name', 'Description'], ['Widget', 'A small blue widget for sale']]
+    assert list(iter_table_segments(rows)) == ["Name: Widget; Description: A small blue widget for sale."]
+
+
+def test_glossary_rows_become_terms_without_nlp():
+    rows = [['Term', 'Definition'], ['Osmosis', 'Water crossing a membrane'], ['', 'orphan'], [], ['Cell', 'Unit of life']]
+    assert list(iter_table_segments(rows)) == [
+        {'term': 'Osmosis', 'definition': 'Water crossing a membrane'},
+        {'term': 'Cell', 'definition': 'Unit of life'},
+    ]
+
+
+def test_other_tables_become_compact_row_text():
+    rows = [['Country', 'Capital']] + [['France', 'Paris']] * (ROWS_PER_SEGMENT + 1)
+    segments = list(iter_table_segments(rows))
+
+    assert len(segments) == 2
+    assert segments[0].splitlines()[0] == "Country: France; Capital: Paris."
+    assert segments[1] == "Country: France; Capital: Paris."
+
+
+def test_csv_dialect_is_sniffed(tmp_path):
+    path = tmp_path / 'glossary.csv'
+    path.write_text("term;definition\nAtom;The smallest unit of an element\n", encoding='utf-8')
+
+    assert list(iter_csv_rows(str(path))) == [['term', 'definition'], ['Atom', 'The smallest unit of an element']]
+    segments = list(TextExtractor().iter_tabular(str(path)))
+    assert segments == [{'term': 'Atom', 'definition': 'The smallest unit of an element'}]
+    assert segment_chars(segments[0]) == len('Atom') + len('The smallest unit of an element')
+
+
+def test_xlsx_sheets_are_streamed(tmp_path):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    workbook.active.append(['Word', 'Meaning'])
+    workbook.active.append(['Erosion', 'Wearing away of rock by water or wind'])
+    notes = workbook.create_sheet('Notes')
+    notes.append(['Topic', 'Pages'])
+    notes.append(['Geology', 12])
+    path = tmp_path / 'course.xlsx'
+    workbook.save(path)
+
+    assert list(TextExtractor().iter_tabular(str(path))) == [
+        {'term': 'Erosion', 'definition': 'Wearing away of rock by water or wind'},
+        "Topic: Geology; Pages: 12.",
+    ]
@@ -0,0 +1,90 @@
+from src.processors.term_clusters import MinHashLSH, TermClusters, jaccard, light_lemma, shingles
+
+DEFINITION = "The powerhouse of the cell that produces energy through cellular respiration"
+
+
+def test_light_lemma_drops_articles_and_plurals():
+    assert light_lemma("The Cells") == "cell"
+    assert light_lemma("an ecosystem") == "ecosystem"
+    assert light_lemma("Boxes") == "box"
+    assert light_lemma("Process") == "process"
+
+
+def test_minhash_finds_near_duplicates_and_skips_unrelated_sets():
+    index = MinHashLSH()
+    near = shingles(DEFINITION)
+    index.add(0, index.signature(near))
+    index.add(1, index.signature(shingles("A tax on imported goods paid to the government")))
+
+    query = shingles(DEFINITION + " in eukaryotes")
+    assert jaccard(near, query) >= 0.8
+    assert index.candidates(index.signature(query)) == {0}
+
+
+def test_signatures_are_repeatable():
+    hashes = shingles(DEFINITION)
+    assert MinHashLSH().signature(hashes) == MinHashLSH().signature(hashes)
+
+
+def test_same_lemma_and_overlapping_definitions_share_a_cluster():
+    clusters = TermClusters()
+    first, created = clusters.assign({'term': 'The cell', 'definition': "The basic unit of all living things"})
+    second, joined = clusters.assign({'term': 'cells', 'definition': "The basic unit of all living organisms"})
+
+    assert created and not joined
+    assert second == first
+
+
+def test_near_identical_definitions_of_alike_terms_share_a_cluster():
+    clusters = TermClusters()
+    first, _ = clusters.assign({'term': 'mitochondria', 'definition': DEFINITION})
+    second, created = clusters.assign({'term': 'mitochondrion', 'definition': DEFINITION + "."})
+    assert not created and second == first
+
+
+def test_different_terms_never_merge_on_definition_alone():
+    clusters = TermClusters()
+    clusters.assign({'term': 'osmosis', 'definition': DEFINITION})
+    _, created = clusters.assign({'term': 'tariff', 'definition': DEFINITION})
+    assert created
+    assert clusters.counts == {'terms': 2, 'clusters': 2}
+
+
+def test_simplify_generates_once_per_cluster():
+    calls = []
+
+    def process(items):
+        calls.append([item['term'] for item in items])
+        return [{'term': item['term'], 'complicated_text': item['definition'],
+                 'simplified_definition': f"simple {item['term']}", 'analogy': 'a', 'mind_map_prompt': 'm'}
+                for item in items]
+
+    clusters = TermClusters()
+    rows = clusters.simplify([
+        {'term': 'mitochondria', 'definition': DEFINITION},
+        {'term': 'mitochondrion', 'definition': DEFINITION + "."},
+        {'term': 'tariff', 'definition': "A tax on imported goods paid to the government"},
+    ], process)
+
+    assert calls == [['mitochondria', 'tariff']]
+    assert [row['term'] for row in rows] == ['mitochondria', 'mitochondrion', 'tariff']
+    # Members keep their own term and definition but reuse the representative's answer
+    assert rows[1]['simplified_definition'] == "simple mitochondria"
+    assert rows[1]['complicated_text'] == DEFINITION + "."
+
+
+def test_inflected_variants_from_parsed_text_share_one_generation():
+    clusters = TermClusters()
+    calls = []
+
+    def process(items):
+        calls.append([item['term'] for item in items])
+        return [{'term': item['term'], 'complicated_text': item['definition'], 'analogy': 'A brick'} for item in items]
+
+    rows = clusters.simplify([
+        {'term': 'Cells', 'definition': 'the basic units of life', 'lemma': 'cell'},
+        {'term': 'cell', 'definition': 'the basic unit of life', 'lemma': 'cell'},
+    ], process)
+
+    assert calls == [['Cells']]
+    assert [(row['term'], row['analogy']) for row in rows] == [('Cells', 'A brick'), ('cell', 'A brick')]
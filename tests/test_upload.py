@@ -0,0 +1,38 @@
+import io
+import os
+
+import pytest
+
+from src import main
+
+
+@pytest.fixture
+def client():
+    main.app.config['TESTING'] = True
+    return main.app.test_client()
+
+
+@pytest.mark.parametrize('max_definitions', ['0', '-5'])
+def test_max_definitions_below_one_is_rejected(client, max_definitions):
+    before = set(os.listdir(main.UPLOAD_FOLDER))
+    response = client.post('/upload', data={
+        'file': (io.BytesIO(b'%PDF-1.4\n%%EOF\n'), 'notes.pdf'),
+        'maxDefs': max_definitions
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 400
+    assert 'maxDefs' in response.get_json()['error']
+    assert main.jobs.pending() == 0
+    # The streamed upload is removed with the request
+    assert set(os.listdir(main.UPLOAD_FOLDER)) == before
+
+
+def test_file_whose_content_does_not_match_its_extension_is_rejected(client):
+    before = set(os.listdir(main.UPLOAD_FOLDER))
+    response = client.post('/upload', data={
+        'file': (io.BytesIO(b'PK\x03\x04' + b'\x00' * 64), 'notes.pdf')
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 400
+    assert 'does not match' in response.get_json()['error']
+    assert set(os.listdir(main.UPLOAD_FOLDER)) == before
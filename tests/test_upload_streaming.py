@@ -0,0 +1,53 @@
+import hashlib
+import os
+
+import pytest
+from werkzeug.exceptions import UnsupportedMediaType
+
+from src.utils.file_validator import validate_magic_bytes
+from src.utils.uploads import UploadFile
+
+PDF = b'%PDF-1.4\n' + b'x' * 5000 + b'\n%%EOF\n'
+
+
+@pytest.mark.parametrize('head, extension, valid', [
+    (b'%PDF-1.7\n', 'pdf', True),
+    (b'PK\x03\x04rest', 'DOCX', True),
+    (b'\x89PNG\r\n\x1a\n', 'png', True),
+    (b'term,definition', 'csv', True),
+    (b'PK\x03\x04rest', 'pdf', False),
+    (b'binary\x00data', 'csv', False),
+    (b'', 'pdf', False),
+    (b'%PDF-1.7\n', 'exe', False),
+])
+def test_signatures_must_match_the_extension(head, extension, valid):
+    assert validate_magic_bytes(head, extension)[0] is valid
+
+
+def test_upload_is_hashed_while_it_is_written(tmp_path):
+    upload = UploadFile(str(tmp_path), '../notes.pdf')
+    for start in range(0, len(PDF), 1000):
+        upload.write(PDF[start:start + 1000])
+    upload.seek(0)
+    upload.close()
+
+    assert os.path.dirname(upload.path) == str(tmp_path)
+    assert upload.path.endswith('_notes.pdf')
+    assert upload.hexdigest() == hashlib.sha256(PDF).hexdigest()
+    with open(upload.path, 'rb') as file:
+        assert file.read() == PDF
+
+
+def test_wrong_signature_is_rejected_on_the_first_chunk(tmp_path):
+    upload = UploadFile(str(tmp_path), 'notes.pdf')
+    with pytest.raises(UnsupportedMediaType):
+        upload.write(b'PK\x03\x04 not really a pdf')
+    assert os.listdir(tmp_path) == []
+
+
+def test_files_shorter_than_a_signature_are_checked_when_complete(tmp_path):
+    upload = UploadFile(str(tmp_path), 'tiny.png')
+    upload.write(b'\x89P')
+    with pytest.raises(UnsupportedMediaType):
+        upload.seek(0)
+    assert os.listdir(tmp_path) == []